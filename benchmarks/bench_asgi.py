@@ -0,0 +1,170 @@
+"""
+Charge HTTP sur les endpoints de lecture : déploiement ASGI (uvicorn) contre
+WSGI (serveur wsgiref multi-thread), requêtes par seconde et latences de queue
+
+    pip install uvicorn
+    python benchmarks/bench_asgi.py --requests 2000 --concurrency 32
+
+Chaque serveur tourne dans un processus séparé sur le même journal SQLite
+synthétique ; le client est une boucle asyncio (une connexion par requête).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import synthetic_rows  # noqa: E402
+from core.storage import TransactionStore  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ['/api/analysis', '/api/predict', '/api/recommendations', '/api/statistics', '/api/health']
+
+WSGI_SERVER = """
+import sys
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.core.wsgi import get_wsgi_application
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+make_server('127.0.0.1', int(sys.argv[1]), get_wsgi_application(),
+            server_class=ThreadingWSGIServer, handler_class=QuietHandler).serve_forever()
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, env):
+    if kind == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'moneywise.asgi:application',
+                   '--port', str(port), '--log-level', 'warning', '--no-access-log']
+    else:
+        command = [sys.executable, '-c', WSGI_SERVER, str(port)]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'Le serveur {kind} ne répond pas sur le port {port}')
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def load(port, paths, requests, concurrency):
+    """``requests`` requêtes réparties sur les chemins, ``concurrency`` en vol"""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                status = await get(port, paths[index % len(paths)])
+            except OSError:
+                status = None
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests_per_second': requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'errors': errors,
+    }
+
+
+def bench(kind, args, env):
+    port = free_port()
+    process = start_server(kind, port, env)
+    try:
+        # Préchauffage : construction de l'assistant, chargement du modèle
+        asyncio.run(load(port, args.paths, len(args.paths) * 4, 1))
+        return asyncio.run(load(port, args.paths, args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--requests', type=int, default=2_000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--paths', nargs='+', default=PATHS)
+    parser.add_argument('--servers', nargs='+', default=['wsgi', 'asgi'], choices=['wsgi', 'asgi'])
+    parser.add_argument('--settings', default='moneywise.settings',
+                        help='Module de settings des deux serveurs (variante de middlewares...)')
+    parser.add_argument('--json', action='store_true', help='Affiche les résultats bruts')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        TransactionStore(path).append_many(synthetic_rows(args.rows))
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=args.settings,
+            MONEYWISE_STORE_PATH=path,
+            MONEYWISE_CHECKPOINT_DIR=os.path.join(directory, 'checkpoints'),
+            MONEYWISE_TRAINING_ASYNC='1',
+        )
+        for kind in args.servers:
+            results[kind] = bench(kind, args, env)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{args.requests} requêtes, {args.concurrency} en parallèle, {args.rows} transactions')
+    print(f"{'serveur':>8} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erreurs':>8}")
+    for kind, result in results.items():
+        print(f"{kind:>8} {result['requests_per_second']:>8.0f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
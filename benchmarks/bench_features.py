@@ -0,0 +1,68 @@
+"""
+Construction de la matrice d'entraînement : fenêtres glissantes vectorisées contre
+l'ancienne boucle Python sur des dicts
+
+    python benchmarks/bench_features.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import synthetic_rows  # noqa: E402
+from core.features import FinancialDataProcessor  # noqa: E402
+from core.ledger import TransactionLedger  # noqa: E402
+
+
+def legacy_prepare_training_data(transactions):
+    """Implémentation historique (boucle sur une liste de dicts)"""
+    features = []
+    targets = []
+    for i in range(len(transactions) - 7):
+        week_data = transactions[i:i+7]
+        amounts = [t['amount'] for t in week_data]
+        days_of_week = [t['day_of_week'] for t in week_data]
+        max_amount = max(abs(a) for a in amounts) if max(abs(a) for a in amounts) > 0 else 1
+        normalized_amounts = [a / max_amount for a in amounts]
+        feature_vector = normalized_amounts + [
+            days_of_week[-1] / 7,
+            week_data[-1]['month'] / 12,
+            1 if week_data[-1]['is_weekend'] else 0,
+            week_data[-1]['category_encoded'] / 10
+        ]
+        features.append(feature_vector)
+        targets.append(transactions[i+7]['amount'])
+    return np.array(features), np.array(targets)
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} {'boucle (s)':>12} {'vectorisé (s)':>14} {'accélération':>13}")
+    for size in args.sizes:
+        rows = synthetic_rows(size)
+        ledger = TransactionLedger()
+        ledger.extend_columns(*zip(*rows))
+        transactions = ledger.to_dicts()
+
+        (legacy_X, _), legacy = timed(legacy_prepare_training_data, transactions)
+        (X, _), vectorized = timed(FinancialDataProcessor.prepare_training_data, ledger)
+        assert np.allclose(legacy_X, X)
+        print(f'{size:>10} {legacy:>12.3f} {vectorized:>14.4f} {legacy / vectorized:>12.0f}x')
+
+
+if __name__ == '__main__':
+    main()
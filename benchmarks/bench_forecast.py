@@ -0,0 +1,104 @@
+"""
+Prévisions : une passe 1×11 par fenêtre contre l'inférence par lots récursive,
+débit selon la taille du lot, lots multi-tenant (poids empilés) et mémoïsation
+
+    python benchmarks/bench_forecast.py --batches 1 100 10000 --horizon 7
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import synthetic_rows  # noqa: E402
+from core.assistant import FinancialAssistant  # noqa: E402
+from core.features import FinancialDataProcessor  # noqa: E402
+from core.forecasting import network_weights, recursive_forecast, stack_weights  # noqa: E402
+from core.ledger import TransactionLedger  # noqa: E402
+from core.neural import NeuralNetwork  # noqa: E402
+from core.storage import TransactionStore  # noqa: E402
+from core.training import TrainingQueue  # noqa: E402
+
+
+def per_window(network, windows, days, months, categories):
+    """Ancienne approche : une passe avant 1×11 par fenêtre"""
+    outputs = []
+    for i in range(len(windows)):
+        features, scales = FinancialDataProcessor.assemble_features(
+            windows[i:i + 1], days[i:i + 1], months[i:i + 1], categories[i:i + 1])
+        outputs.append(network.predict(features)[0][0] * scales[0])
+    return outputs
+
+
+def rate(function, count, repeat=3):
+    """Prévisions par seconde (meilleure de ``repeat`` mesures)"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 100, 10_000])
+    parser.add_argument('--horizon', type=int, default=7)
+    parser.add_argument('--tenants', type=int, default=1_000)
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    network = NeuralNetwork(input_size=11, hidden_size=15)
+    ledger = TransactionLedger()
+    ledger.extend_columns(*zip(*synthetic_rows(max(args.batches) + 7)))
+    start = date.today()
+
+    print(f"{'lot':>8} {'1×11 (fenêtres/s)':>18} {'lot, h=1 (/s)':>14} "
+          f"{f'lot, h={args.horizon} (jours/s)':>22}")
+    for batch in args.batches:
+        windows = np.lib.stride_tricks.sliding_window_view(ledger.amounts, 7)[:batch]
+        days, months = ledger.days_of_week[6:batch + 6], ledger.months[6:batch + 6]
+        categories = ledger.category_codes[6:batch + 6]
+        weights = network_weights(network)
+        single = rate(lambda: per_window(network, windows, days, months, categories), batch)
+        batched = rate(lambda: recursive_forecast(
+            weights, windows, days, months, categories, start, 1), batch)
+        horizon = rate(lambda: recursive_forecast(
+            weights, windows, days, months, categories, start, args.horizon), batch * args.horizon)
+        print(f'{batch:>8} {single:>18.0f} {batched:>14.0f} {horizon:>22.0f}')
+
+    # Un réseau par tenant : un seul produit matriciel par lots et par pas
+    networks = [NeuralNetwork(input_size=11, hidden_size=15) for _ in range(args.tenants)]
+    windows = np.lib.stride_tricks.sliding_window_view(ledger.amounts, 7)[:args.tenants]
+    count = len(windows)
+    stacked = stack_weights(networks[:count])
+    tenants = rate(lambda: recursive_forecast(
+        stacked, windows, ledger.days_of_week[6:count + 6], ledger.months[6:count + 6],
+        ledger.category_codes[6:count + 6], start, args.horizon), count)
+    print(f'{count} tenants (poids empilés), h={args.horizon} : {tenants:.0f} tenants/s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TransactionStore(os.path.join(directory, 'bench.sqlite3'))
+        store.append_many(synthetic_rows(10_000), tenant='bench')
+        assistant = FinancialAssistant(
+            store, os.path.join(directory, 'checkpoints'), tenant='bench',
+            training_queue=TrainingQueue(asynchronous=False))
+        started = time.perf_counter()
+        first = assistant.forecast(args.horizon)
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(1000):
+            assert assistant.forecast(args.horizon) is first
+        warm = (time.perf_counter() - started) / 1000
+        print(f'assistant.forecast({args.horizon}) : {cold * 1e3:.2f} ms au premier appel, '
+              f'{warm * 1e6:.1f} µs mémorisé')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Taille et temps de sérialisation des transactions par format de réponse :
+enregistrements JSON (sortie historique de JsonResponse) contre colonnes JSON,
+MessagePack et Arrow IPC, avec l'encodeur standard et orjson
+
+    pip install orjson msgpack pyarrow   # formats optionnels
+    python benchmarks/bench_formats.py --rows 100000
+
+Le temps compte l'extraction depuis le registre (dictionnaires ou colonnes)
+et l'encodage, comme dans ``/api/transactions``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.core.serializers.json import DjangoJSONEncoder  # noqa: E402
+
+from core import serialization  # noqa: E402
+from core.ledger import TransactionLedger  # noqa: E402
+from synthetic import synthetic_ledger  # noqa: E402
+
+
+def build_ledger(rows):
+    ids, amounts, categories, codes, descriptions, timestamps = zip(*synthetic_ledger(rows))
+    ledger = TransactionLedger(capacity=rows)
+    ledger.extend_columns(np.array(ids), np.array(amounts), categories, np.array(codes),
+                          descriptions, np.array(timestamps))
+    return ledger
+
+
+def encoders(ledger):
+    """(nom, fonction produisant le corps) des formats disponibles"""
+    positions = np.arange(len(ledger))
+    meta = {'success': True, 'count': len(ledger), 'total': len(ledger), 'has_more': False,
+            'next_cursor': None}
+
+    def records(dumps):
+        return lambda: dumps(dict(meta, transactions=[
+            ledger.record(position) for position in positions]))
+
+    def columns(name, dumps=None):
+        return lambda: serialization.encode_columns(
+            name, ledger.record_columns(positions), meta, dumps)
+
+    # Sortie actuelle : JsonResponse (encodeur standard, séparateurs par défaut)
+    current = records(lambda data: json.dumps(data, cls=DjangoJSONEncoder).encode())
+    yield 'enregistrements JSON (actuel)', current
+    yield 'enregistrements JSON, stdlib compact', records(serialization.stdlib_dumps)
+    if serialization.orjson is not None:
+        yield 'enregistrements JSON, orjson', records(serialization.orjson_dumps)
+    yield 'colonnes JSON, stdlib', columns('columns', serialization.stdlib_dumps)
+    if serialization.orjson is not None:
+        yield 'colonnes JSON, orjson', columns('columns', serialization.orjson_dumps)
+    if serialization.available('msgpack'):
+        yield 'colonnes MessagePack', columns('msgpack')
+    if serialization.available('arrow'):
+        yield 'Arrow IPC', columns('arrow')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ledger = build_ledger(args.rows)
+    print(f'{len(ledger)} transactions, médiane de {args.repeat} mesures\n')
+    print(f"{'format':<38} {'octets':>12} {'taille':>8} {'temps (ms)':>11} {'vitesse':>8}")
+    reference = None
+    for name, encode in encoders(ledger):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            body = encode()
+            timings.append(time.perf_counter() - started)
+        elapsed = float(np.median(timings))
+        reference = reference or (len(body), elapsed)
+        print(f'{name:<38} {len(body):>12,} {len(body) / reference[0]:>7.0%} '
+              f'{elapsed * 1000:>11.1f} {reference[1] / elapsed:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Coût de démarrage : ``manage.py check`` et démarrage à froid d'un worker WSGI
+(temps d'import via ``python -X importtime``, mémoire résidente maximale)
+
+    python benchmarks/bench_startup.py
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import json, resource, sys, time
+started = time.perf_counter()
+from django.core.management import execute_from_command_line
+execute_from_command_line(['manage.py', 'check'])
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'numpy_loaded': 'numpy' in sys.modules,
+}))
+"""
+
+WORKER = """
+import json, resource, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+application = get_wsgi_application()
+boot = time.perf_counter() - started
+numpy_at_boot = 'numpy' in sys.modules
+rss_at_boot = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+client = Client(SERVER_NAME='localhost')
+started = time.perf_counter()
+client.get('/api/health')
+first = time.perf_counter() - started
+started = time.perf_counter()
+client.get('/api/health')
+second = time.perf_counter() - started
+print(json.dumps({
+    'boot_seconds': boot,
+    'numpy_loaded_at_boot': numpy_at_boot,
+    'max_rss_kb_at_boot': rss_at_boot,
+    'first_request_seconds': first,
+    'second_request_seconds': second,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def run(code, directory):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='moneywise.settings',
+        MONEYWISE_STORE_PATH=os.path.join(directory, 'bench.sqlite3'),
+        MONEYWISE_CHECKPOINT_DIR=os.path.join(directory, 'checkpoints'),
+    )
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['import_seconds'], result['top_imports'] = parse_importtime(process.stderr)
+    return result
+
+
+def parse_importtime(stderr, top=5):
+    """Somme des temps cumulés des imports de premier niveau et les plus coûteux"""
+    total = 0
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Les imports imbriqués sont indentés de deux espaces par niveau
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+            imports.append((int(cumulative), name.strip()))
+    imports.sort(reverse=True)
+    return total / 1e6, [f'{name} ({micros / 1000:.0f} ms)' for micros, name in imports[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--json', action='store_true', help='Affiche les résultats bruts')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {'check': run(CHECK, directory), 'worker': run(WORKER, directory)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    check, worker = results['check'], results['worker']
+    print('manage.py check')
+    print(f"  durée          {check['seconds'] * 1000:8.0f} ms")
+    print(f"  imports        {check['import_seconds'] * 1000:8.0f} ms  numpy chargé : {check['numpy_loaded']}")
+    print(f"  RSS max        {check['max_rss_kb'] / 1024:8.1f} Mo")
+    print(f"  imports lourds {', '.join(check['top_imports'])}")
+    print('worker WSGI')
+    print(f"  démarrage      {worker['boot_seconds'] * 1000:8.0f} ms  numpy chargé : {worker['numpy_loaded_at_boot']}")
+    print(f"  RSS au boot    {worker['max_rss_kb_at_boot'] / 1024:8.1f} Mo")
+    print(f"  1re requête    {worker['first_request_seconds'] * 1000:8.0f} ms  (construction de l'assistant)")
+    print(f"  2e requête     {worker['second_request_seconds'] * 1000:8.1f} ms")
+    print(f"  RSS max        {worker['max_rss_kb'] / 1024:8.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Latence d'insertion : journal SQLite append-only contre l'ancien blob JSON en cache
+
+    python benchmarks/bench_storage.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from core.ledger import DATE_FORMAT, TransactionLedger, from_timestamp, to_timestamp  # noqa: E402
+from core.storage import TransactionStore  # noqa: E402
+
+CATEGORIES = ['loyer', 'nourriture', 'transport', 'loisirs', 'sante', 'education', 'shopping', 'autres']
+
+
+def synthetic_rows(size, seed=0):
+    rng = np.random.default_rng(seed)
+    start = to_timestamp(datetime(2020, 1, 1))
+    timestamps = np.sort(start + rng.integers(0, 5 * 365 * 86400, size))
+    amounts = np.round(rng.normal(-40, 120, size), 2)
+    codes = rng.integers(0, len(CATEGORIES), size)
+    return [
+        (i, float(amounts[i]), CATEGORIES[codes[i]], int(codes[i]), f'Transaction {i % 500}',
+         int(timestamps[i]))
+        for i in range(size)
+    ]
+
+
+def legacy_dict(row):
+    moment = from_timestamp(row[5])
+    return {
+        'id': row[0], 'amount': row[1], 'category': row[2], 'category_encoded': row[3],
+        'description': row[4], 'date': moment.strftime(DATE_FORMAT),
+        'day_of_week': moment.weekday(), 'month': moment.month,
+        'is_weekend': moment.weekday() >= 5, 'year': moment.year,
+    }
+
+
+def bench_json_blob(rows, inserts):
+    """Ancienne approche : chaque insertion re-sérialise tout le registre"""
+    cache = LocMemCache('bench', {})
+    transactions = [legacy_dict(row) for row in rows]
+    timings = []
+    for i in range(inserts):
+        transactions.append(legacy_dict((len(transactions), -10.0, 'autres', 7, 'bench', rows[-1][5])))
+        started = time.perf_counter()
+        cache.set('financial_data', json.dumps(transactions), timeout=None)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_store(rows, inserts):
+    """Nouvelle approche : une ligne écrite par insertion, puis relecture au démarrage"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = TransactionStore(os.path.join(directory, 'bench.sqlite3'))
+        store.append_many(rows)
+        timings = []
+        for i in range(inserts):
+            started = time.perf_counter()
+            store.append(-10.0, 'autres', 7, 'bench', rows[-1][5])
+            timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        ledger = TransactionLedger()
+        ledger.extend_columns(**store.load_columns())
+        rebuild = time.perf_counter() - started
+        store.close()
+    return timings, rebuild
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--inserts', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} {'blob JSON (ms)':>16} {'SQLite (ms)':>13} {'relecture (s)':>14}")
+    for size in args.sizes:
+        rows = synthetic_rows(size)
+        blob = bench_json_blob(rows, args.inserts)
+        store, rebuild = bench_store(rows, args.inserts)
+        print(f'{size:>10} {np.median(blob) * 1000:>16.2f} {np.median(store) * 1000:>13.3f} '
+              f'{rebuild:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Entraînement : descente de gradient plein lot (500 époques) contre mini-lots + Adam
+avec arrêt anticipé, à poids initiaux identiques
+
+    python benchmarks/bench_training.py --sizes 5000 20000 100000
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import synthetic_rows  # noqa: E402
+from core.features import FinancialDataProcessor  # noqa: E402
+from core.ledger import TransactionLedger  # noqa: E402
+from core.neural import NeuralNetwork  # noqa: E402
+
+
+def legacy_train(network, X, y, epochs=500):
+    """Boucle historique : gradient plein lot, taux d'apprentissage fixe"""
+    y = y.reshape(-1, 1)
+    m = X.shape[0]
+    for _ in range(epochs):
+        output = network.forward(X)
+        dZ2 = output - y
+        dW2 = (1/m) * np.dot(network.a1.T, dZ2)
+        db2 = (1/m) * np.sum(dZ2, axis=0, keepdims=True)
+        dA1 = np.dot(dZ2, network.W2.T)
+        dZ1 = dA1 * network.relu_derivative(network.z1)
+        dW1 = (1/m) * np.dot(X.T, dZ1)
+        db1 = (1/m) * np.sum(dZ1, axis=0, keepdims=True)
+        network.W2 -= network.learning_rate * dW2
+        network.b2 -= network.learning_rate * db2
+        network.W1 -= network.learning_rate * dW1
+        network.b1 -= network.learning_rate * db1
+
+
+def holdout_loss(network, X, y):
+    return float(np.mean((network.predict(X) - y.reshape(-1, 1)) ** 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5_000, 20_000, 100_000])
+    parser.add_argument('--optimizer', default='adam', choices=['sgd', 'momentum', 'adam'])
+    args = parser.parse_args()
+
+    print(f"{'lignes':>8} {'plein lot (s)':>14} {'perte':>10} {'mini-lots (s)':>14} "
+          f"{'perte':>10} {'époques':>8}")
+    for size in args.sizes:
+        ledger = TransactionLedger()
+        ledger.extend_columns(*zip(*synthetic_rows(size)))
+        X, y = FinancialDataProcessor.prepare_training_data(ledger)
+        # Évaluation sur les 10 % les plus récents, exclus de l'entraînement
+        cut = int(len(X) * 0.9)
+
+        np.random.seed(0)
+        reference = NeuralNetwork(input_size=11, hidden_size=15)
+        legacy = copy.deepcopy(reference)
+        started = time.perf_counter()
+        legacy_train(legacy, X[:cut], y[:cut])
+        legacy_time = time.perf_counter() - started
+
+        engine = copy.deepcopy(reference)
+        started = time.perf_counter()
+        run = engine.train(X[:cut], y[:cut], epochs=500, optimizer=args.optimizer, seed=0)
+        engine_time = time.perf_counter() - started
+
+        print(f'{size:>8} {legacy_time:>14.2f} {holdout_loss(legacy, X[cut:], y[cut:]):>10.5f} '
+              f'{engine_time:>14.2f} {holdout_loss(engine, X[cut:], y[cut:]):>10.5f} '
+              f"{run['epochs']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Test de charge multi-thread de l'assistant : écritures concurrentes (aucune
+transaction perdue ni dupliquée), lectures pendant l'entraînement, débit de
+lecture selon le nombre de threads
+
+    python benchmarks/stress_concurrency.py --writers 8 --inserts 250 --threads 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import synthetic_rows  # noqa: E402
+from core.assistant import FinancialAssistant  # noqa: E402
+from core.storage import TransactionStore  # noqa: E402
+from core.training import TrainingQueue  # noqa: E402
+
+# Tenant distinct du tenant par défaut : pas de reprise du cache Django
+TENANT = 'stress'
+
+
+class ExclusiveLock:
+    """Référence : un seul verrou pour les lectures comme pour les écritures"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def read(self):
+        with self._lock:
+            yield
+
+    write = read
+
+
+def build(directory, rows):
+    store = TransactionStore(os.path.join(directory, 'stress.sqlite3'))
+    store.append_many(synthetic_rows(rows), tenant=TENANT)
+    return FinancialAssistant(
+        store, os.path.join(directory, 'checkpoints'), tenant=TENANT,
+        training_queue=TrainingQueue(asynchronous=True))
+
+
+def run_threads(count, target):
+    errors = []
+
+    def guarded(index):
+        try:
+            target(index)
+        except Exception as exc:  # remonté après le join
+            errors.append(exc)
+
+    threads = [threading.Thread(target=guarded, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def read_mix(assistant, index):
+    """Une lecture parmi celles servies par les vues"""
+    kind = index % 4
+    if kind == 0:
+        return assistant.get_spending_analysis()
+    if kind == 1:
+        return assistant.get_weekly_report()
+    if kind == 2:
+        with assistant.lock.read():
+            positions, _ = assistant.transactions.select(100, descending=True)
+            return [assistant.transactions.record(position) for position in positions]
+    return assistant.predict_next_week()
+
+
+def stress_writes(directory, rows, writers, inserts, readers):
+    """Insertions concurrentes pendant des lectures et des entraînements"""
+    assistant = build(directory, rows)
+    stop = threading.Event()
+    reads = [0] * readers
+
+    def write(index):
+        for i in range(inserts):
+            assistant.add_transaction(-float(i % 50 + 1), 'nourriture', f'w{index}-{i}')
+
+    def read(index):
+        while not stop.is_set():
+            read_mix(assistant, reads[index] + index)
+            reads[index] += 1
+
+    reader_threads = threading.Thread(target=run_threads, args=(readers, read))
+    reader_threads.start()
+    started = time.perf_counter()
+    try:
+        run_threads(writers, write)
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        reader_threads.join()
+    assistant.training_queue.join()
+
+    ledger = assistant.transactions
+    ids = ledger.ids
+    expected = rows + writers * inserts
+    descriptions = {record['description'] for record in ledger[rows:]}
+    reloaded = TransactionStore(assistant.store.path).load_columns(tenant=TENANT)
+    checks = {
+        'ledger_rows': len(ledger) == expected,
+        'store_rows': assistant.store.count(TENANT) == expected,
+        'ids_unique_increasing': bool(np.all(np.diff(ids) > 0)),
+        'ids_match_store': np.array_equal(ids, reloaded['ids']),
+        'every_insert_once': len(descriptions) == writers * inserts,
+        'aggregates_consistent': not assistant.check_consistency(),
+    }
+    return {
+        'inserts_per_second': writers * inserts / elapsed,
+        'reads_during_writes': sum(reads),
+        'checks': checks,
+    }
+
+
+def predictions_isolated(assistant, threads, repeat=200):
+    """Prédictions concurrentes sur des entrées distinctes : chaque thread
+    doit obtenir exactement le résultat calculé seul"""
+    network = assistant.network
+    rng = np.random.default_rng(0)
+    inputs = [rng.normal(size=(1, network.input_size)) for _ in range(threads)]
+    expected = [network.predict(X) for X in inputs]
+    mismatches = []
+
+    def predict(index):
+        for _ in range(repeat):
+            if not np.array_equal(network.predict(inputs[index]), expected[index]):
+                mismatches.append(index)
+
+    run_threads(threads, predict)
+    return not mismatches
+
+
+def read_throughput(assistant, threads, seconds):
+    stop = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def read(index):
+        while time.perf_counter() < stop:
+            read_mix(assistant, counts[index] + index)
+            counts[index] += 1
+
+    run_threads(threads, read)
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--inserts', type=int, default=250)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = stress_writes(directory, args.rows, args.writers, args.inserts, args.readers)
+        print(f'{args.writers} rédacteurs x {args.inserts} insertions, {args.readers} lecteurs')
+        print(f"  {result['inserts_per_second']:.0f} insertions/s, "
+              f"{result['reads_during_writes']} lectures pendant les écritures")
+        for name, ok in result['checks'].items():
+            print(f"  {name:<24} {'ok' if ok else 'ÉCHEC'}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        assistant = build(directory, args.rows)
+        ok = predictions_isolated(assistant, max(args.threads))
+        print(f"prédictions concurrentes isolées : {'ok' if ok else 'ÉCHEC'}")
+
+        print(f"{'threads':>8} {'lectures/s (RW)':>16} {'lectures/s (exclusif)':>22}")
+        shared_lock = assistant.lock
+        for threads in args.threads:
+            assistant.lock = shared_lock
+            shared = read_throughput(assistant, threads, args.seconds)
+            assistant.lock = ExclusiveLock()
+            exclusive = read_throughput(assistant, threads, args.seconds)
+            print(f'{threads:>8} {shared:>16.0f} {exclusive:>22.0f}')
+        assistant.lock = shared_lock
+
+    if not all(result['checks'].values()) or not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
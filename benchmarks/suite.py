@@ -0,0 +1,301 @@
+"""
+Suite de benchmarks reproductible des opérations principales, comparée à une
+référence enregistrée : la commande échoue si une mesure régresse au-delà du seuil
+
+    python benchmarks/suite.py --save-baseline            # référence de la machine
+    python benchmarks/suite.py --output resultats.json    # comparaison à la référence
+    python benchmarks/suite.py --sizes 1000 1000000 --only analysis endpoint
+
+Chaque taille de registre est chargée dans son propre tenant à partir du
+générateur synthétique (graine fixe). Les ré-entraînements automatiques sont
+suspendus pour que les cas mesurés n'incluent pas leur coût, et les résultats
+mémorisés ou en cache sont invalidés avant chaque appel : les temps reflètent
+le calcul complet. Chaque cas est mesuré en ``--repeat`` séries d'au moins
+``--min-time`` secondes, chacune précédée d'une charge de calibration fixe. La
+comparaison porte sur la meilleure série, moins sensible que la médiane aux
+interruptions, et la référence est mise à l'échelle de la vitesse de la machine
+au moment de chaque mesure : une machine partagée ralentie ne passe pas pour
+une régression.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Endpoints mesurés : (nom, méthode, chemin, corps JSON)
+ENDPOINTS = [
+    ('home', 'GET', '/', None),
+    ('dashboard', 'GET', '/api/dashboard', None),
+    ('analysis', 'GET', '/api/analysis', None),
+    ('predict', 'GET', '/api/predict', None),
+    ('forecast', 'GET', '/api/forecast?horizon=30', None),
+    ('recommendations', 'GET', '/api/recommendations', None),
+    ('statistics', 'GET', '/api/statistics', None),
+    ('weekly_report', 'GET', '/api/weekly-report', None),
+    ('alerts', 'GET', '/api/alerts', None),
+    ('transactions', 'GET', '/api/transactions?limit=100', None),
+    ('health', 'GET', '/api/health', None),
+    ('metrics', 'GET', '/api/metrics', None),
+    ('checkpoints', 'GET', '/api/model/checkpoints', None),
+    ('predict_batch', 'POST', '/api/predict/batch',
+     {'windows': [[-20.0, -35.5, -12.0, -80.0, 2500.0, -45.0, -9.9]] * 100, 'horizon': 7}),
+    ('set_budget', 'POST', '/api/budget/set', {'category': 'loisirs', 'budget': 300}),
+    ('add_transaction', 'POST', '/api/transaction/add',
+     {'amount': -12.5, 'category': 'nourriture', 'description': 'Boulangerie'}),
+]
+
+
+_CALIBRATION_VALUES = np.random.default_rng(0).random(20_000)
+
+
+def calibration():
+    """Charge fixe indépendante du code mesuré (Python pur et NumPy), témoin de
+    la vitesse de la machine"""
+    sum(i * i for i in range(10_000))
+    np.sort(_CALIBRATION_VALUES)
+
+
+def measure(function, repeat=5, min_time=0.05, max_number=10_000):
+    """Durée par appel de ``function`` : le nombre d'appels par série est calibré
+    sur un premier appel (qui sert aussi de préchauffage)
+
+    Chaque série est précédée d'une exécution de la charge de calibration : son
+    meilleur temps (``calibration``) situe la vitesse de la machine au moment
+    même de la mesure.
+    """
+    started = time.perf_counter()
+    function()
+    first = time.perf_counter() - started
+    number = int(min(max_number, max(1, min_time / max(first, 1e-9))))
+    timings = []
+    calibrations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        calibration()
+        calibrations.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'calibration': min(calibrations),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def setup_environment(directory):
+    """Django configuré sur un journal et des points de sauvegarde temporaires"""
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'moneywise.settings'
+    os.environ['MONEYWISE_STORE_PATH'] = os.path.join(directory, 'bench.sqlite3')
+    os.environ['MONEYWISE_CHECKPOINT_DIR'] = os.path.join(directory, 'checkpoints')
+    os.environ['MONEYWISE_TRAINING_ASYNC'] = '0'
+    import django
+    django.setup()
+
+
+def load_tenant(size, seed):
+    """Assistant d'un tenant chargé avec ``size`` transactions synthétiques"""
+    from core import services
+    from core.training import TrainingQueue
+    from synthetic import synthetic_ledger
+
+    class PausedTrainingQueue(TrainingQueue):
+        """Les demandes de ré-entraînement sont ignorées pendant les mesures"""
+
+        def submit(self, assistant, reason='manual', mode='auto', options=None):
+            return None
+
+    tenant = f'bench-{size}'
+    registry = services.get_registry()
+    store = registry.get(tenant).store
+    store.clear(tenant)
+    # Identifiants attribués par le journal, partagé avec les autres tenants
+    store.append_batch((row[1:] for row in synthetic_ledger(size, seed=seed)), tenant=tenant)
+    registry.evict(tenant)
+    assistant = registry.get(tenant)
+    assistant.training_queue = PausedTrainingQueue()
+    return assistant
+
+
+def bench_size(size, args):
+    """Mesures d'un registre de ``size`` transactions : ``{cas: statistiques}``"""
+    from django.test import Client
+
+    from core.features import FinancialDataProcessor
+    from core.neural import NeuralNetwork
+
+    np.random.seed(args.seed)
+    assistant = load_tenant(size, args.seed)
+    client = Client(SERVER_NAME='localhost', HTTP_X_TENANT_ID=assistant.tenant)
+    results = {}
+
+    def run(name, function):
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            return
+        results[f'{name}[{size}]'] = measure(function, args.repeat, args.min_time)
+        print(f"  {name:<32} {results[f'{name}[{size}]']['median'] * 1e3:>12.3f} ms", flush=True)
+
+    def uncached(function):
+        # Nouvelle révision : résultats mémorisés et réponses en cache invalidés
+        def call():
+            assistant._touch()
+            return function()
+        return call
+
+    run('load_data', assistant.load_data)
+    run('get_spending_analysis', uncached(assistant.get_spending_analysis))
+    run('get_statistics', assistant.get_statistics)
+    run('get_weekly_report', assistant.get_weekly_report)
+    run('get_dashboard', uncached(assistant.get_dashboard))
+    run('forecast', uncached(lambda: assistant.forecast(30)))
+
+    X, y = FinancialDataProcessor.prepare_training_data(assistant.transactions)
+    run('prepare_training_data',
+        lambda: FinancialDataProcessor.prepare_training_data(assistant.transactions))
+
+    def train():
+        network = NeuralNetwork(input_size=X.shape[1], hidden_size=15)
+        network.train(X, y, epochs=args.epochs, patience=args.epochs, seed=args.seed)
+    run('NeuralNetwork.train', train)
+    network = NeuralNetwork(input_size=X.shape[1], hidden_size=15)
+    run('NeuralNetwork.predict', lambda: network.predict(X))
+
+    for name, method, path, body in ENDPOINTS:
+        if method == 'GET':
+            call = uncached(lambda path=path: client.get(path))
+        else:
+            call = lambda path=path, body=body: client.post(  # noqa: E731
+                path, json.dumps(body), content_type='application/json')
+
+        def checked(call=call, path=path):
+            response = call()
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} : statut {response.status_code}')
+        run(f'endpoint {name}', checked)
+
+    # En dernier : ces cas ajoutent des lignes au registre
+    run('add_transaction', lambda: assistant.add_transaction(-12.5, 'nourriture', 'Boulangerie'))
+    records = [(line, {'amount': -12.5, 'category': 'nourriture', 'description': 'Import'})
+               for line in range(1, 1001)]
+    run('import_transactions_1000',
+        lambda: assistant.import_transactions(records, train=False))
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Régressions : meilleure série plus lente que la référence de plus de
+    ``threshold`` (relatif) et de ``min_delta`` secondes (cas très courts), une
+    fois la référence mise à l'échelle de la vitesse de la machine pendant chacune
+    des deux mesures (rapport des temps de calibration)"""
+    regressions = []
+    print(f"\n{'cas':<48} {'référence':>12} {'mesure':>12} {'écart':>8}")
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<48} {'—':>12} {current['min'] * 1e3:>10.3f}ms {'nouveau':>8}")
+            continue
+        expected = reference['min'] * current['calibration'] / reference['calibration']
+        ratio = current['min'] / expected - 1
+        regressed = ratio > threshold and current['min'] - expected > min_delta
+        print(f"{name:<48} {expected * 1e3:>10.3f}ms {current['min'] * 1e3:>10.3f}ms "
+              f"{ratio:>+7.0%}{' ✗' if regressed else ''}")
+        if regressed:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='Durée minimale de chaque série (secondes)')
+    parser.add_argument('--epochs', type=int, default=5, help='Époques du cas NeuralNetwork.train')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help='Préfixes des cas à mesurer')
+    parser.add_argument('--output', help='Fichier JSON des résultats')
+    parser.add_argument('--baseline', default=BASELINE, help='Référence à comparer')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Enregistre les résultats comme nouvelle référence')
+    # Sur une machine partagée, les mesures courtes varient encore de ±30 % d'une
+    # exécution à l'autre malgré la calibration
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Régression relative tolérée (0.5 : 50 %%)')
+    parser.add_argument('--min-delta', type=float, default=5e-5,
+                        help='Écart absolu minimal pour une régression (secondes)')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        setup_environment(directory)
+        import logging
+        logging.disable(logging.INFO)
+        for size in args.sizes:
+            print(f'Registre de {size} transactions', flush=True)
+            results.update(bench_size(size, args))
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f'\nRéférence enregistrée : {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f'\nPas de référence ({args.baseline}) : lancez --save-baseline')
+        return
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    reference = baseline['environment']
+    if (reference['machine'], reference['cpu_count']) != (platform.machine(), os.cpu_count()):
+        print(f"\nAttention : référence mesurée sur une autre machine "
+              f"({reference['platform']}, {reference['cpu_count']} CPU)")
+    regressions = compare(results, baseline['results'], args.threshold, args.min_delta)
+    if regressions:
+        print(f'\n{len(regressions)} régression(s) au-delà de {args.threshold:.0%} :')
+        for name, ratio in regressions:
+            print(f'  {name} : {ratio:+.0%}')
+        sys.exit(1)
+    print(f'\nAucune régression au-delà de {args.threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Registre synthétique réaliste : salaire et loyer mensuels, dépenses courantes
+par catégorie (fréquences et montants log-normaux propres à chacune), libellés
+récurrents, dates réparties jusqu'à aujourd'hui
+
+Les lignes ``(id, montant, catégorie, code, libellé, timestamp)`` sont
+déterministes pour une graine et une date de fin données.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.ledger import SECONDS_PER_DAY, to_timestamp
+
+CATEGORY_CODES = {
+    'loyer': 0, 'nourriture': 1, 'transport': 2, 'loisirs': 3,
+    'sante': 4, 'education': 5, 'shopping': 6, 'autres': 7,
+}
+
+# Dépenses courantes : (poids, montant médian, dispersion log-normale, libellés)
+SPENDING = {
+    'nourriture': (0.38, 28.0, 0.7, ('Carrefour', 'Boulangerie', 'Marché', 'Lidl', 'Restaurant U')),
+    'transport': (0.20, 18.0, 0.8, ('Navigo', 'SNCF', 'Essence', 'Uber', 'Parking')),
+    'loisirs': (0.14, 35.0, 0.9, ('Cinéma', 'Restaurant', 'Concert', 'Bar', 'Spotify')),
+    'shopping': (0.10, 55.0, 1.0, ('Amazon', 'Fnac', 'Zara', 'Decathlon', 'Ikea')),
+    'sante': (0.06, 40.0, 0.8, ('Pharmacie', 'Médecin', 'Dentiste', 'Mutuelle')),
+    'education': (0.03, 60.0, 0.9, ('Librairie', 'Cours en ligne', 'Fournitures')),
+    'autres': (0.09, 30.0, 1.1, ('Virement', 'Cadeau', 'Retrait DAB', 'Frais bancaires')),
+}
+
+# Part des lignes « autres » qui sont des remboursements (montant positif)
+REFUND_RATE = 0.05
+
+
+def synthetic_ledger(size, seed=0, end=None, days=3 * 365):
+    """``size`` transactions sur les ``days`` jours précédant ``end`` (aujourd'hui
+    par défaut), triées par date"""
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    first = to_timestamp(start)
+
+    # Revenus et loyers : un de chaque par mois (dans la limite de la taille demandée)
+    months = min(days // 30, size // 10)
+    month_starts = first + np.arange(months) * 30 * SECONDS_PER_DAY
+    salary = (month_starts + rng.integers(0, 3, months) * SECONDS_PER_DAY + 9 * 3600,
+              np.round(rng.normal(2800, 150, months), 2))
+    rent = (month_starts + rng.integers(0, 5, months) * SECONDS_PER_DAY + 10 * 3600,
+            -np.full(months, 850.0))
+
+    # Dépenses courantes, de préférence en journée
+    count = size - 2 * months
+    names = list(SPENDING)
+    weights = np.array([SPENDING[name][0] for name in names])
+    picks = rng.choice(len(names), size=count, p=weights / weights.sum())
+    medians = np.array([SPENDING[name][1] for name in names])[picks]
+    spreads = np.array([SPENDING[name][2] for name in names])[picks]
+    amounts = -np.round(medians * np.exp(rng.normal(0, spreads)), 2)
+    refunds = (np.array(names)[picks] == 'autres') & (rng.random(count) < REFUND_RATE)
+    amounts[refunds] *= -1
+    times = (first + rng.integers(0, days, count) * SECONDS_PER_DAY
+             + rng.integers(7 * 3600, 23 * 3600, count))
+    labels = rng.integers(0, 5, count)
+
+    timestamps = np.concatenate([salary[0], rent[0], times])
+    values = np.concatenate([salary[1], rent[1], amounts])
+    categories = ['salaire'] * months + ['loyer'] * months + [names[pick] for pick in picks]
+    descriptions = (['Salaire mensuel'] * months + ['Loyer appartement'] * months
+                    + [SPENDING[names[pick]][3][label % len(SPENDING[names[pick]][3])]
+                       for pick, label in zip(picks, labels)])
+
+    order = np.argsort(timestamps, kind='stable')
+    return [
+        (i, float(values[j]), categories[j], CATEGORY_CODES.get(categories[j], 7),
+         descriptions[j], int(timestamps[j]))
+        for i, j in enumerate(order.tolist())
+    ]
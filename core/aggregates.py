@@ -0,0 +1,141 @@
+"""
+Agrégats incrémentaux du registre : mis à jour en O(1) à chaque transaction
+"""
+
+import bisect
+import math
+
+import numpy as np
+
+from core.metrics import stage
+
+
+class AggregateStore:
+    """Sommes et compteurs courants par catégorie, par mois et par signe"""
+
+    def __init__(self, budgets=None):
+        self.budgets = dict(budgets or {})
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.income_total = 0.0
+        self.income_count = 0
+        self.expense_total = 0.0
+        self.expense_count = 0
+        self.largest_income = None
+        self.largest_expense = None
+        self.first_timestamp = None
+        self.category_expenses = {}
+        self.category_counts = {}
+        self.monthly_totals = {}
+        self.months = []
+
+    @classmethod
+    def from_ledger(cls, ledger, budgets=None):
+        """Reconstruit les agrégats depuis le registre complet (réductions vectorisées)"""
+        store = cls(budgets)
+        store.merge_ledger(ledger)
+        return store
+
+    @stage('aggregation')
+    def merge_ledger(self, ledger, start=0):
+        """Intègre les lignes ``ledger[start:]`` en un seul passage vectorisé"""
+        if len(ledger) <= start:
+            return
+        amounts = ledger.amounts[start:]
+        incomes = amounts[amounts > 0]
+        expenses_mask = amounts < 0
+        expenses = amounts[expenses_mask]
+
+        self.count += int(amounts.size)
+        self.income_total += float(incomes.sum())
+        self.income_count += int(incomes.size)
+        self.expense_total += float(expenses.sum())
+        self.expense_count += int(expenses.size)
+        if incomes.size:
+            self.largest_income = max(self.largest_income or 0.0, float(incomes.max()))
+        if expenses.size:
+            self.largest_expense = min(self.largest_expense or 0.0, float(expenses.min()))
+        first = int(ledger.timestamps[start:].min())
+        if self.first_timestamp is None or first < self.first_timestamp:
+            self.first_timestamp = first
+
+        refs = ledger.category_refs[start:]
+        pool_size = len(ledger.category_pool)
+        sums = np.bincount(refs[expenses_mask], weights=expenses, minlength=pool_size)
+        counts = np.bincount(refs[expenses_mask], minlength=pool_size)
+        for code, category in enumerate(ledger.category_pool.values):
+            if counts[code]:
+                self.category_expenses[category] = (
+                    self.category_expenses.get(category, 0.0) + float(sums[code]))
+                self.category_counts[category] = (
+                    self.category_counts.get(category, 0) + int(counts[code]))
+
+        keys = ledger.years[start:].astype(np.int64) * 100 + ledger.months[start:]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=amounts)
+        for key, total in zip(unique_keys.tolist(), totals.tolist()):
+            self._add_month(key, total)
+
+    @stage('aggregation')
+    def add(self, amount, category, year, month, timestamp):
+        """Intègre une transaction en temps constant"""
+        amount = float(amount)
+        self.count += 1
+        if amount > 0:
+            self.income_total += amount
+            self.income_count += 1
+            if self.largest_income is None or amount > self.largest_income:
+                self.largest_income = amount
+        elif amount < 0:
+            self.expense_total += amount
+            self.expense_count += 1
+            if self.largest_expense is None or amount < self.largest_expense:
+                self.largest_expense = amount
+            self.category_expenses[category] = self.category_expenses.get(category, 0.0) + amount
+            self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        self._add_month(year * 100 + month, amount)
+
+    def set_budget(self, category, budget):
+        self.budgets[category] = budget
+
+    def _add_month(self, key, amount):
+        if key not in self.monthly_totals:
+            self.monthly_totals[key] = 0.0
+            bisect.insort(self.months, key)
+        self.monthly_totals[key] += amount
+
+    # ---------- Vérification ----------
+
+    def verify(self, ledger):
+        """Compare les agrégats à un recalcul complet et retourne les écarts"""
+        return self.compare(AggregateStore.from_ledger(ledger, self.budgets))
+
+    def compare(self, expected):
+        """Noms des agrégats qui diffèrent de ceux de ``expected``"""
+        mismatches = []
+        for name in ('count', 'income_count', 'expense_count', 'first_timestamp'):
+            if getattr(self, name) != getattr(expected, name):
+                mismatches.append(name)
+        for name in ('income_total', 'expense_total', 'largest_income', 'largest_expense'):
+            if not _close(getattr(self, name), getattr(expected, name)):
+                mismatches.append(name)
+        for name in ('category_expenses', 'monthly_totals'):
+            ours, theirs = getattr(self, name), getattr(expected, name)
+            if ours.keys() != theirs.keys() or not all(
+                    _close(ours[key], theirs[key]) for key in ours):
+                mismatches.append(name)
+        if self.category_counts != expected.category_counts:
+            mismatches.append('category_counts')
+        if self.months != expected.months:
+            mismatches.append('months')
+        return mismatches
+
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
@@ -0,0 +1,201 @@
+"""
+Alertes budgétaires événementielles : dépenses par catégorie et par période,
+alerte au seul franchissement d'un seuil
+
+Les budgets sont mensuels ; pour une période hebdomadaire, le budget est
+ramené à la semaine (12/52). Les dépenses sont comptées pour toutes les
+périodes, les alertes ne concernent que les périodes configurées. Une alerte
+n'est émise que lorsque le nombre de seuils franchis par un compteur
+(période, clé de période, catégorie) augmente entre avant et après une
+écriture ; un seuil redescendu (budget relevé) est ainsi réarmé.
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+from core.dates import PERIODS, SECONDS_PER_DAY, from_timestamp
+from core.metrics import stage
+
+# Valeurs par défaut, surchargées par settings.MONEYWISE_BUDGET_ALERTS
+BUDGET_ALERTS = {
+    'periods': ('month',),
+    # Parts du budget de la période
+    'thresholds': (0.8, 1.0),
+}
+
+# Budget de la période, rapporté au budget mensuel
+PERIOD_BUDGET_RATIO = {'month': 1.0, 'week': 12 / 52}
+
+
+def period_keys(period, timestamps, years, months):
+    """Clés de période (AAAAMM, ou jour du lundi de la semaine) de colonnes du registre"""
+    if period == 'month':
+        return years.astype(np.int64) * 100 + months
+    days = timestamps // SECONDS_PER_DAY
+    # Le 1er janvier 1970 était un jeudi
+    return days - (days + 3) % 7
+
+
+def period_key(period, timestamp):
+    """Clé de période d'un timestamp (variante scalaire de ``period_keys``)"""
+    if period == 'month':
+        moment = from_timestamp(timestamp)
+        return moment.year * 100 + moment.month
+    days = int(timestamp) // SECONDS_PER_DAY
+    return days - (days + 3) % 7
+
+
+def period_label(period, key):
+    """Libellé lisible d'une clé de période : « 2026-10 » ou « 2026-W42 »"""
+    if period == 'month':
+        return f'{key // 100}-{key % 100:02d}'
+    year, week, _ = from_timestamp(key * SECONDS_PER_DAY).isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+def _scaled(period, budget):
+    """Budget mensuel ``budget`` rapporté à la période"""
+    return None if budget is None else budget * PERIOD_BUDGET_RATIO[period]
+
+
+class BudgetAlerts:
+    """Compteurs de dépenses par période et détection des franchissements de seuils
+
+    ``budgets`` est le dictionnaire des budgets mensuels de l'assistant (partagé,
+    non copié). Les méthodes qui modifient l'état retournent les alertes émises ;
+    l'appelant les publie une fois ses verrous relâchés.
+    """
+
+    def __init__(self, budgets, periods=BUDGET_ALERTS['periods'],
+                 thresholds=BUDGET_ALERTS['thresholds']):
+        unknown = set(periods) - set(PERIODS)
+        if unknown:
+            raise ValueError(f"Périodes inconnues : {', '.join(sorted(unknown))}")
+        self.budgets = budgets
+        self.periods = tuple(periods)
+        self.thresholds = tuple(sorted(thresholds))
+        self.reset()
+
+    def reset(self):
+        # (période, clé) -> {catégorie: dépenses (positives)}
+        self.spent = {}
+
+    def period_budget(self, period, category):
+        """Budget de ``category`` pour une période (``None`` sans budget)"""
+        return _scaled(period, self.budgets.get(category))
+
+    def _level(self, spent, budget):
+        """Nombre de seuils franchis (dépenses strictement supérieures à la part du budget)
+
+        Une catégorie sans budget n'en franchit aucun ; un budget nul les franchit
+        tous dès la première dépense.
+        """
+        if budget is None:
+            return 0
+        if budget <= 0:
+            return len(self.thresholds) if spent > 0 else 0
+        return bisect_left(self.thresholds, spent / budget)
+
+    def _crossed(self, period, key, category, before, after, budget_before):
+        """Alertes des seuils franchis entre ``before`` (dépenses, budget de la
+        période ``budget_before``) et ``after`` (budget courant)"""
+        budget = self.period_budget(period, category)
+        previous = self._level(before, budget_before)
+        level = self._level(after, budget)
+        if level <= previous:
+            return []
+        return [{
+            'type': 'budget_threshold',
+            'category': category,
+            'period': period,
+            'period_key': period_label(period, key),
+            'threshold': threshold,
+            'spent': after,
+            'budget': budget,
+            'ratio': after / budget if budget else None,
+            'message': (f'Budget {category} : {threshold:.0%} atteint '
+                        f'({period_label(period, key)})'),
+        } for threshold in self.thresholds[previous:level]]
+
+    @stage('alerts')
+    def add(self, amount, category, timestamp):
+        """Intègre une transaction ; seules les dépenses comptent"""
+        if amount >= 0:
+            return []
+        alerts = []
+        for period in PERIODS:
+            key = period_key(period, timestamp)
+            totals = self.spent.setdefault((period, key), {})
+            before = totals.get(category, 0.0)
+            totals[category] = before - float(amount)
+            if period in self.periods:
+                alerts.extend(self._crossed(period, key, category, before, totals[category],
+                                            self.period_budget(period, category)))
+        return alerts
+
+    @stage('alerts')
+    def merge_ledger(self, ledger, start=0, notify=True):
+        """Intègre les lignes ``ledger[start:]`` en un passage vectorisé par période
+
+        Un seuil franchi par plusieurs lignes du lot ne produit qu'une alerte.
+        """
+        if len(ledger) <= start:
+            return []
+        amounts = ledger.amounts[start:]
+        expenses = amounts < 0
+        if not expenses.any():
+            return []
+        refs = ledger.category_refs[start:][expenses]
+        pool = ledger.category_pool.values
+        alerts = []
+        for period in PERIODS:
+            keys = period_keys(period, ledger.timestamps[start:][expenses],
+                               ledger.years[start:][expenses], ledger.months[start:][expenses])
+            groups, inverse = np.unique(keys * len(pool) + refs, return_inverse=True)
+            sums = np.bincount(inverse, weights=-amounts[expenses])
+            check = notify and period in self.periods
+            for group, total in zip(groups.tolist(), sums.tolist()):
+                key, code = divmod(group, len(pool))
+                totals = self.spent.setdefault((period, key), {})
+                before = totals.get(pool[code], 0.0)
+                totals[pool[code]] = before + total
+                if check:
+                    alerts.extend(self._crossed(period, key, pool[code], before, before + total,
+                                                self.period_budget(period, pool[code])))
+        return alerts
+
+    def check_budget(self, category, timestamp, previous_budget):
+        """Réévalue la période courante de ``category`` après un changement de budget
+        (``previous_budget`` : budget mensuel précédent, ``None`` s'il n'y en avait pas)"""
+        alerts = []
+        for period in self.periods:
+            key = period_key(period, timestamp)
+            spent = self.spent.get((period, key), {}).get(category, 0.0)
+            alerts.extend(self._crossed(period, key, category, spent, spent,
+                                        _scaled(period, previous_budget)))
+        return alerts
+
+    def totals(self, timestamp, period='month'):
+        """Libellé de la période contenant ``timestamp`` et dépenses par catégorie
+        (dictionnaire partagé, à ne pas modifier)"""
+        key = period_key(period, timestamp)
+        return period_label(period, key), self.spent.get((period, key), {})
+
+    def status(self, timestamp, period='month'):
+        """Dépenses et budgets de la période contenant ``timestamp``, par catégorie"""
+        key = period_key(period, timestamp)
+        totals = self.spent.get((period, key), {})
+        status = {}
+        for category in sorted(set(totals) | set(self.budgets)):
+            spent = totals.get(category, 0.0)
+            budget = self.period_budget(period, category)
+            status[category] = {
+                'spent': spent,
+                'budget': budget,
+                'ratio': spent / budget if budget else None,
+                'thresholds_crossed': self._level(spent, budget),
+            }
+        return {'period': period, 'period_key': period_label(period, key),
+                'categories': status}
+
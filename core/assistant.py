@@ -0,0 +1,934 @@
+"""
+Assistant financier : registre, agrégats, persistance et modèle de prédiction
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.core.cache import cache
+
+from core.aggregates import AggregateStore
+from core.alerts import BUDGET_ALERTS, BudgetAlerts
+from core.checkpoints import CheckpointManager
+from core.concurrency import ReadWriteLock, reading
+from core.events import EventFeed
+from core.features import FinancialDataProcessor
+from core.forecasting import latest_window, network_weights, network_window, recursive_forecast
+from core.importers import chunks, normalize
+from core.metrics import TRANSACTIONS_WRITTEN, stage
+from core.ledger import SECONDS_PER_DAY, TransactionLedger, from_timestamp, to_timestamp
+from core.neural import NeuralNetwork
+from core.retention import RETENTION, DailyRollup, Retention
+from core.search import HYPERPARAMETER_SEARCH, SharedArrays, run_search, search_options, share_features
+from core.tenants import DEFAULT_TENANT
+from core.training import TrainingQueue
+
+# Nombre maximal d'erreurs de validation détaillées dans un rapport d'import
+IMPORT_MAX_ERRORS = 100
+
+# Sections du tableau de bord, sélectionnables par masque de champs
+DASHBOARD_SECTIONS = ('transactions', 'balance', 'analysis', 'predictions', 'recommendations',
+                      'budgets')
+
+# Transactions relues par lot lors d'une synchronisation (compactage entre les lots)
+SYNC_CHUNK = 50_000
+
+# Valeurs par défaut, surchargées par settings.MONEYWISE_INCREMENTAL_TRAINING
+INCREMENTAL_TRAINING = {
+    'full_refit_every': 10,
+    'replay_ratio': 1.0,
+    'drift_factor': 2.0,
+    'epochs': 50,
+}
+
+
+class FinancialAssistant:
+    """Assistant financier d'un tenant, adossé au journal partagé ``store``
+    
+    Le registre, les agrégats et les budgets sont protégés par ``lock`` :
+    les analyses s'exécutent en parallèle, les écritures sont exclusives.
+    ``_journal_lock`` sérialise les écritures dans le journal SQLite et les
+    relectures ; il est toujours pris avant ``lock``, qui ne couvre que la mise
+    à jour en mémoire. Le modèle servi n'est jamais modifié en place
+    (l'entraînement travaille sur une copie substituée à la fin).
+    
+    ``revision`` croît à chaque changement visible (transactions, budgets,
+    modèle servi) : il valide les résultats mémorisés et les réponses en cache.
+    
+    Les événements (``core.events.EVENT_TYPES``) sont publiés dans ``events`` hors du
+    verrou du registre ; les deltas de transactions le sont sous ``_journal_lock``,
+    donc dans l'ordre des identifiants.
+    
+    Le registre ne garde au détail que les transactions récentes (``retention``,
+    voir ``core.retention``) : les agrégats couvrent tout l'historique, les
+    lignes évincées restent lisibles dans le journal.
+    """
+    
+    def __init__(self, store, checkpoint_dir, tenant=DEFAULT_TENANT, training_queue=None,
+                 checkpoint_keep=10, incremental_training=None, hyperparameter_search=None,
+                 events=None, budget_alerts=None, retention=None):
+        self.tenant = tenant
+        self.lock = ReadWriteLock()
+        self._journal_lock = threading.RLock()
+        self._network = None
+        self._network_lock = threading.Lock()
+        if tenant != DEFAULT_TENANT:
+            checkpoint_dir = os.path.join(checkpoint_dir, 'tenants', tenant)
+        self.checkpoints = CheckpointManager(checkpoint_dir, keep=checkpoint_keep)
+        # Version qui sera chargée au premier accès au modèle (validateur HTTP)
+        self.model_version = self.checkpoints.current_version()
+        # Sans point de sauvegarde, le modèle initial (aléatoire) est propre au processus
+        self._untrained = uuid.uuid4().hex
+        self.incremental_training = dict(INCREMENTAL_TRAINING, **(incremental_training or {}))
+        self.hyperparameter_search = dict(HYPERPARAMETER_SEARCH, **(hyperparameter_search or {}))
+        self.transactions = TransactionLedger()
+        self.categories = {
+            'loyer': 0, 'nourriture': 1, 'transport': 2, 'loisirs': 3,
+            'sante': 4, 'education': 5, 'shopping': 6, 'autres': 7
+        }
+        self.store = store
+        budgets = {category: 500 for category in self.categories}
+        budgets.update(store.load_budgets(tenant))
+        self.aggregates = AggregateStore(budgets)
+        self._budgets_tag = _budgets_tag(budgets)
+        self.alerts = BudgetAlerts(self.aggregates.budgets, **dict(BUDGET_ALERTS, **(budget_alerts or {})))
+        self.events = events if events is not None else EventFeed()
+        self.retention = Retention(**dict(RETENTION, **(retention or {})))
+        self.training_queue = training_queue or TrainingQueue()
+        self._revisions = itertools.count(1)
+        self.revision = 0
+        self.modified_at = time.time()
+        self._analytics = {}
+        self._analytics_key = None
+        self._forecasts = {}
+        self._forecasts_key = None
+        self._reset_training_state()
+        self.load_data()
+    
+    @property
+    def budgets(self):
+        return self.aggregates.budgets
+    
+    @property
+    def network(self):
+        """Modèle servi, chargé depuis le dernier point de sauvegarde au premier accès"""
+        if self._network is None:
+            with self._network_lock:
+                if self._network is None:
+                    self._network = self._restore_network()
+        return self._network
+    
+    @network.setter
+    def network(self, network):
+        self._network = network
+        self._touch()
+    
+    @property
+    def validator(self):
+        """État durable servi : dernière transaction intégrée, budgets, version du modèle
+        
+        Contrairement à ``revision`` (compteur propre au processus), identique d'un
+        worker ou d'un redémarrage à l'autre pour un même état : sert de
+        validateur HTTP (ETag). Lu sans verrou.
+        """
+        model = self.model_version if self.model_version is not None else self._untrained
+        return f'{self.transactions.last_id}|{self._budgets_tag}|{model}'
+    
+    def _touch(self):
+        """Signale un changement : nouvelle révision, caches invalidés"""
+        # next() sur un compteur est atomique : aucune révision perdue entre threads
+        self.revision = next(self._revisions)
+        self.modified_at = time.time()
+    
+    def _restore_network(self, version=None):
+        arrays, metadata = self.checkpoints.load(version)
+        if arrays is None:
+            return NeuralNetwork(input_size=11, hidden_size=15)
+        
+        # L'état incrémental n'est repris que s'il correspond au registre courant.
+        # Appelé sous ``_network_lock``, lui-même pris sous le verrou de lecture
+        # (tableau de bord) : ``lock`` n'est jamais demandé ici, seul ``last_id``
+        # (un entier) est lu. Les points de sauvegarde sans ``fitted_id``
+        # (antérieurs à la rétention) repartent d'un ré-entraînement complet.
+        training = metadata.get('training', {})
+        fitted_id = training.get('fitted_id')
+        if fitted_id is not None and fitted_id <= self.transactions.last_id:
+            self.fitted_id = fitted_id
+            self.incremental_fits = training.get('incremental_fits', 0)
+            self.reference_loss = training.get('reference_loss')
+        self.model_version = metadata['version']
+        return NeuralNetwork.from_state(arrays, metadata.get('learning_rate', 0.01))
+    
+    def save_checkpoint(self, network, **metadata):
+        """Enregistre le modèle et l'état de normalisation dans une nouvelle version"""
+        self.model_version = self.checkpoints.save(network.get_state(), dict(
+            metadata,
+            window=network_window(network),
+            hidden_size=network.hidden_size,
+            normalization='per_window_max_abs',
+            learning_rate=network.learning_rate,
+            training={
+                'fitted_id': self.fitted_id,
+                'incremental_fits': self.incremental_fits,
+                'reference_loss': self.reference_loss,
+            },
+        ))
+        return self.model_version
+    
+    def rollback_model(self, version=None):
+        """Revient à une version précédente du modèle"""
+        self.checkpoints.rollback(version)
+        with self._network_lock:
+            self._network = self._restore_network()
+        self._touch()
+        self._publish_forecast()
+        return self.model_version
+    
+    def load_data(self):
+        """Reconstruit l'état en mémoire depuis le journal SQLite"""
+        with self._journal_lock:
+            if self.tenant == DEFAULT_TENANT and not self.store.count(self.tenant):
+                self._import_legacy_cache()
+            with self.lock.write():
+                self.transactions = TransactionLedger()
+                self.aggregates.reset()
+                self.alerts.reset()
+                self.retention.reset()
+                self._touch()
+            self._cleared_id = self.store.journal_state(self.tenant)[1]
+            # L'historique rechargé ne déclenche pas d'alertes
+            self.sync(notify=False)
+    
+    def journal_changed(self):
+        """Le journal du tenant a-t-il changé depuis le dernier chargement
+        (transactions ajoutées ou tenant effacé par un autre processus) ?"""
+        last_id, cleared_id = self.store.journal_state(self.tenant)
+        return cleared_id != self._cleared_id or (
+            last_id is not None and last_id > self.transactions.last_id)
+    
+    def refresh(self):
+        """Rattrape le journal avant une lecture : une requête d'index s'il n'a pas
+        changé, ``_journal_lock`` n'étant pris que s'il y a quelque chose à relire"""
+        if self.journal_changed():
+            self.sync()
+    
+    def sync(self, notify=True):
+        """Intègre les transactions écrites depuis le dernier chargement (autres processus)
+        
+        Le journal est relu par lots de ``SYNC_CHUNK`` lignes, compactés au fil de
+        l'eau : un rechargement complet ne dépasse pas la rétention de plus d'un lot.
+        Si un autre processus a effacé le tenant, l'état en mémoire est vidé avant
+        la relecture.
+        """
+        with self._journal_lock:
+            cleared_id = self.store.journal_state(self.tenant)[1]
+            if cleared_id != self._cleared_id:
+                self._forget()
+                self._cleared_id = cleared_id
+                self.events.publish('sync', {
+                    'reason': 'reset', 'rows': 0, 'revision': self.revision})
+            rows = 0
+            alerts = []
+            while (columns := self.store.load_columns(
+                    after_id=self.transactions.last_id, tenant=self.tenant,
+                    limit=SYNC_CHUNK)) is not None:
+                with self.lock.write():
+                    start = len(self.transactions)
+                    self.transactions.extend_columns(**columns)
+                    self.aggregates.merge_ledger(self.transactions, start)
+                    alerts.extend(self.alerts.merge_ledger(self.transactions, start, notify))
+                    self._compact()
+                    self._touch()
+                rows += len(columns['amounts'])
+            if rows and notify:
+                self.events.publish('sync', {
+                    'reason': 'sync', 'rows': rows, 'revision': self.revision})
+            self._publish_alerts(alerts)
+    
+    def _compact(self):
+        """Évince les transactions anciennes au-delà de la rétention (sous verrou d'écriture)"""
+        self.retention.compact(self.transactions, to_timestamp(datetime.now()))
+    
+    def _resident_rows(self, last_id):
+        """Nombre de transactions résidentes d'identifiant <= ``last_id``"""
+        if last_id is None:
+            return 0
+        return int(np.searchsorted(self.transactions.ids, last_id, 'right'))
+    
+    def _import_legacy_cache(self):
+        """Reprend les données de l'ancien blob JSON stocké dans le cache Django"""
+        data = cache.get('financial_data')
+        if data:
+            ledger = TransactionLedger.from_dicts(json.loads(data))
+            self.store.append_many(
+                (t['id'], t['amount'], t['category'], t['category_encoded'],
+                 t['description'], int(ts))
+                for t, ts in zip(ledger, ledger.timestamps)
+            )
+    
+    def add_transaction(self, amount, category, description=""):
+        """Ajoute une nouvelle transaction"""
+        category_encoded = self.categories.get(category, 7)
+        # Identifiant attribué et ligne ajoutée sous le même verrou de journal : le
+        # registre reste trié par identifiant et ``sync`` ne relit jamais une ligne
+        # connue. Les lecteurs ne sont bloqués que pendant la mise à jour en mémoire.
+        with self._journal_lock:
+            now = datetime.now()
+            self.sync()
+            transaction_id = self.store.append(
+                amount, category, category_encoded, description, to_timestamp(now),
+                tenant=self.tenant
+            )
+            with self.lock.write():
+                position = self.transactions.append(
+                    amount, category, category_encoded, description, now,
+                    transaction_id=transaction_id
+                )
+                transaction = self.transactions.record(position)
+                timestamp = int(self.transactions.timestamps[position])
+                self.aggregates.add(amount, category, now.year, now.month, timestamp)
+                alerts = self.alerts.add(amount, category, timestamp)
+                self._compact()
+                self._touch()
+                size = self.aggregates.count
+                delta = {
+                    'revision': self.revision,
+                    'transaction': transaction,
+                    'balance': self._balance(),
+                    'total_spent': self.aggregates.expense_total,
+                    'categories': {category: abs(self.aggregates.category_expenses[category])}
+                    if amount < 0 else {},
+                }
+            self.events.publish('transaction', delta)
+        
+        TRANSACTIONS_WRITTEN.labels('api').inc()
+        self._publish_alerts(alerts)
+        
+        # Ré-entraînement périodique
+        if size % 10 == 0:
+            self.schedule_training('auto')
+        
+        return transaction
+    
+    def import_transactions(self, records, chunk_size=5000, default_category='autres', train=True):
+        """Importe un flux d'enregistrements ``(ligne, champs)`` (voir ``core.importers``)
+        
+        Chaque lot est validé, écrit dans le journal en une transaction SQLite puis
+        intégré au registre et aux agrégats en une passe vectorisée ; un lot écrit
+        le reste même si la suite du flux échoue. Le ré-entraînement est planifié
+        une seule fois, à la fin.
+        """
+        imported = rejected = batches = 0
+        errors = []
+        for chunk in chunks(records, chunk_size):
+            columns, invalid = normalize(chunk, self.categories, default_category)
+            rejected += len(invalid)
+            errors.extend(str(error) for error in invalid[:IMPORT_MAX_ERRORS - len(errors)])
+            count = len(columns['amounts'])
+            if not count:
+                continue
+            
+            rows = zip(columns['amounts'].tolist(), columns['categories'],
+                       columns['category_codes'].tolist(), columns['descriptions'],
+                       columns['timestamps'].tolist())
+            with self._journal_lock:
+                self.sync()
+                first = self.store.append_batch(rows, tenant=self.tenant)
+                with self.lock.write():
+                    start = len(self.transactions)
+                    self.transactions.extend_columns(
+                        ids=np.arange(first, first + count, dtype=np.int64), **columns)
+                    self.aggregates.merge_ledger(self.transactions, start)
+                    alerts = self.alerts.merge_ledger(self.transactions, start)
+                    self._compact()
+                    self._touch()
+            self._publish_alerts(alerts)
+            imported += count
+            batches += 1
+            TRANSACTIONS_WRITTEN.labels('import').inc(count)
+        
+        if imported:
+            self.events.publish('sync', {
+                'reason': 'import', 'rows': imported, 'revision': self.revision})
+        job = self.schedule_training('import') if train and imported else None
+        return {
+            'imported': imported,
+            'rejected': rejected,
+            'batches': batches,
+            'errors': errors,
+            'training_job': job.as_dict() if job else None,
+        }
+    
+    def _publish_alerts(self, alerts):
+        for alert in alerts:
+            self.events.publish('alert', alert)
+    
+    def schedule_training(self, reason='manual', mode='auto', options=None):
+        """Planifie un entraînement en arrière-plan et retourne le job"""
+        return self.training_queue.submit(self, reason, mode, options)
+    
+    def _reset_training_state(self):
+        # Dernière transaction vue à l'entraînement (les lignes résidentes jusqu'à
+        # elle sont recomptées à chaque entraînement, la rétention les déplaçant)
+        self.fitted_id = None
+        self.incremental_fits = 0
+        self.reference_loss = None
+    
+    def train_model(self, progress=None, mode='auto'):
+        """Entraîne une copie du modèle puis la substitue atomiquement au modèle servi
+        
+        En mode ``auto``, le modèle courant est affiné sur les seules fenêtres
+        créées depuis le dernier entraînement ; un ré-entraînement complet a lieu
+        au premier appel, selon le calendrier ou en cas de dérive.
+        """
+        # Les prédictions continuent d'utiliser l'ancien modèle pendant l'entraînement
+        network = copy.deepcopy(self.network)
+        # Longueur de fenêtre du modèle servi (éventuellement choisie par la recherche)
+        window = network_window(network)
+        
+        # Les données sont préparées sous verrou de lecture, l'entraînement s'en passe
+        config = self.incremental_training
+        with self.lock.read():
+            size = len(self.transactions)
+            if size < 20:
+                return None
+            fitted_id = int(self.transactions.ids[-1])
+            fitted_rows = self._resident_rows(self.fitted_id)
+            full = (mode == 'full' or not fitted_rows or self.reference_loss is None
+                    or self.incremental_fits >= config['full_refit_every'])
+            drift = None
+            if not full:
+                X, y = FinancialDataProcessor.prepare_training_data(
+                    self.transactions, first_target=fitted_rows, window=window)
+                if X is None:
+                    return None
+                drift = float(np.mean((network.predict(X) - y.reshape(-1, 1)) ** 2))
+                full = drift > self.reference_loss * config['drift_factor']
+            
+            if full:
+                X, y = FinancialDataProcessor.prepare_training_data(
+                    self.transactions, window=window)
+            else:
+                # Rejeu d'anciennes fenêtres pour limiter l'oubli
+                replay = min(int(len(X) * config['replay_ratio']), fitted_rows - window)
+                if replay > 0:
+                    targets = np.random.default_rng().choice(
+                        np.arange(window, fitted_rows), size=replay, replace=False)
+                    X_old, y_old = FinancialDataProcessor.sample_training_data(
+                        self.transactions, np.sort(targets), window=window)
+                    X, y = np.vstack([X_old, X]), np.concatenate([y_old, y])
+        
+        if full:
+            run = network.train(X, y, epochs=500, callback=progress)
+        else:
+            run = network.train(X, y, epochs=config['epochs'], validation_split=0,
+                                callback=progress)
+        
+        self.network = network
+        self.fitted_id = fitted_id
+        if full:
+            self.incremental_fits = 0
+            self.reference_loss = run['val_loss']
+        else:
+            self.incremental_fits += 1
+        summary = {
+            'mode': 'full' if full else 'incremental',
+            'rows': size,
+            'windows': len(X),
+            'drift_loss': drift,
+            'epochs': run['epochs'],
+            'loss': run['val_loss'],
+        }
+        summary['version'] = self.save_checkpoint(network, **summary)
+        self._publish_forecast()
+        return summary
+    
+    def search_hyperparameters(self, progress=None, promote=True, **options):
+        """Recherche d'hyperparamètres en parallèle (voir ``core.search``)
+        
+        ``options`` complète la configuration MONEYWISE_HYPERPARAMETER_SEARCH ;
+        le meilleur candidat, ré-entraîné sur tout l'historique, devient le modèle
+        servi si ``promote``. Lève ``ValueError`` si une option est invalide.
+        """
+        options = search_options(self.hyperparameter_search, **options)
+        with SharedArrays() as shared:
+            # Seule la copie des features se fait sous verrou de lecture
+            with self.lock.read():
+                size = share_features(shared, self.transactions, options['windows'])
+                fitted_id = int(self.transactions.ids[size - 1]) if size else None
+            searched = run_search(shared, size, options, progress)
+        if searched is None:
+            return None
+        
+        network, report = searched
+        summary = dict(report, mode='search', epochs=report['refit']['epochs'],
+                       loss=report['refit']['val_loss'], promoted=promote)
+        if promote:
+            summary['version'] = self.promote_model(network, size, fitted_id, **{
+                name: summary[name] for name in ('mode', 'epochs', 'loss', 'best')})
+        return summary
+    
+    def promote_model(self, network, rows, fitted_id=None, **metadata):
+        """Substitue ``network``, entraîné sur les ``rows`` premières transactions
+        résidentes (jusqu'à l'identifiant ``fitted_id``), au modèle servi et
+        l'enregistre comme nouvelle version (``loss`` : perte de validation,
+        référence de la détection de dérive)
+        
+        Les ré-entraînements suivants partent de ce modèle et conservent sa
+        longueur de fenêtre et sa taille de couche cachée.
+        """
+        if fitted_id is None and rows:
+            with self.lock.read():
+                ids = self.transactions.ids
+                fitted_id = int(ids[min(rows, len(ids)) - 1]) if len(ids) else None
+        self.network = network
+        self.fitted_id = fitted_id
+        self.incremental_fits = 0
+        self.reference_loss = metadata.get('loss')
+        version = self.save_checkpoint(network, rows=rows, **metadata)
+        self._publish_forecast()
+        return version
+    
+    def _publish_forecast(self):
+        """Publie la prévision du modèle servi, calculée seulement si un client écoute"""
+        if self.events.subscribers:
+            self.events.publish('forecast', {
+                'model_version': self.model_version,
+                'revision': self.revision,
+                'predictions': self.predict_next_week(),
+            })
+    
+    def predict_next_week(self):
+        """Prédit les dépenses pour la semaine prochaine"""
+        forecast = self.forecast(7)
+        if forecast is None:
+            return None
+        
+        return {
+            'predicted_amount': forecast[0]['predicted_amount'],
+            'confidence': 0.85,
+            'next_7_days': forecast
+        }
+    
+    def forecast(self, horizon=7):
+        """Prévision récursive des ``horizon`` prochains jours (résultat partagé)
+        
+        Déterministe : mémorisée jusqu'à la prochaine révision (registre, budgets,
+        modèle servi) ou au changement de date.
+        """
+        today = datetime.now().date()
+        # Révision lue avant le modèle : un résultat ne peut pas être plus ancien que sa clé
+        key = (self.revision, today)
+        network = self.network
+        if len(self.transactions) < network_window(network):
+            return None
+        
+        if self._forecasts_key != key:
+            self._forecasts = {}
+            self._forecasts_key = key
+        forecasts = self._forecasts
+        if horizon not in forecasts:
+            forecasts[horizon] = self._compute_forecast(network, today, horizon)
+        return forecasts[horizon]
+    
+    def _compute_forecast(self, network, today, horizon):
+        with self.lock.read():
+            window = latest_window(self.transactions, network_window(network))
+        if window is None:
+            return None
+        
+        amounts, day, month, category = window
+        start = today + timedelta(days=1)
+        predicted = recursive_forecast(
+            network_weights(network), amounts[None], [day], [month], [category], start, horizon)[0]
+        
+        forecast = []
+        for offset, amount in enumerate(predicted.tolist()):
+            day = start + timedelta(days=offset)
+            forecast.append({
+                'date': day.strftime("%Y-%m-%d"),
+                'day': day.strftime("%A"),
+                'predicted_amount': amount,
+                'is_weekend': day.weekday() >= 5
+            })
+        return forecast
+    
+    def predict_windows(self, windows, last_date=None, category='autres', horizon=1):
+        """Prévisions par lots pour des fenêtres de montants fournies par l'appelant
+        (7 montants, ou la longueur de fenêtre du modèle servi)
+        
+        ``last_date`` (date) et ``category`` décrivent la dernière transaction de
+        chaque fenêtre (aujourd'hui par défaut) ; retourne une matrice (fenêtres, horizon).
+        """
+        network = self.network
+        width = network_window(network)
+        windows = np.asarray(windows, dtype=float)
+        if windows.ndim != 2 or windows.shape[1] != width:
+            raise ValueError(f'Chaque fenêtre doit contenir {width} montants')
+        last_date = last_date or datetime.now().date()
+        count = len(windows)
+        return recursive_forecast(
+            network_weights(network), windows,
+            np.full(count, last_date.weekday()), np.full(count, last_date.month),
+            np.full(count, self.categories.get(category, 7)),
+            last_date + timedelta(days=1), horizon)
+    
+    def _cached(self, name, compute):
+        """Résultat d'analyse mémorisé jusqu'à la prochaine révision
+        
+        Le cache vit avec l'assistant : il est propre au tenant et libéré à son éviction.
+        """
+        key = self.revision
+        if self._analytics_key != key:
+            self._analytics = {}
+            self._analytics_key = key
+        analytics = self._analytics
+        if name not in analytics:
+            analytics[name] = compute()
+        return analytics[name]
+    
+    @reading
+    def get_spending_analysis(self):
+        """Analyse des dépenses (résultat partagé, à ne pas modifier)"""
+        return self._cached('analysis', self._compute_spending_analysis)
+    
+    @stage('analysis')
+    def _compute_spending_analysis(self):
+        if not self.aggregates.count:
+            return {}
+        
+        aggregates = self.aggregates
+        
+        analysis = {
+            'total_spent': aggregates.expense_total,
+            'total_income': aggregates.income_total,
+            'by_category': {},
+            'monthly_trend': [],
+            'alerts': []
+        }
+        
+        # Analyse par catégorie
+        for category in self.categories:
+            cat_amount = aggregates.category_expenses.get(category, 0)
+            if cat_amount < 0:
+                analysis['by_category'][category] = {
+                    'amount': abs(cat_amount),
+                    'percentage': abs(cat_amount) / abs(analysis['total_spent']) * 100
+                }
+        
+        # Budgets (mensuels) dépassés ce mois-ci
+        month, spent = self.alerts.totals(to_timestamp(datetime.now()))
+        for category, budget in self.budgets.items():
+            if spent.get(category, 0) > budget:
+                analysis['alerts'].append({
+                    'type': 'budget_exceeded',
+                    'category': category,
+                    'period': month,
+                    'spent': spent[category],
+                    'budget': budget
+                })
+        
+        # Tendance mensuelle
+        analysis['monthly_trend'] = [
+            {'month': f"{key // 100}-{key % 100:02d}", 'amount': aggregates.monthly_totals[key]}
+            for key in aggregates.months
+        ]
+        
+        # Alertes intelligentes
+        if sum(spent.values()) > 1000:
+            analysis['alerts'].append({
+                'type': 'high_spending',
+                'message': 'Vos dépenses sont élevées ce mois-ci'
+            })
+        
+        return analysis
+    
+    @reading
+    def get_statistics(self):
+        """Statistiques détaillées, lues directement dans les agrégats"""
+        aggregates = self.aggregates
+        if not aggregates.count:
+            return {}
+        
+        total_income = aggregates.income_total
+        total_expenses = abs(aggregates.expense_total)
+        first_date = from_timestamp(aggregates.first_timestamp)
+        
+        return {
+            'total_transactions': aggregates.count,
+            'average_income': total_income / aggregates.income_count if aggregates.income_count else 0,
+            'average_expense': aggregates.expense_total / aggregates.expense_count if aggregates.expense_count else 0,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'savings_rate': (total_income - total_expenses) / total_income * 100 if total_income > 0 else 0,
+            'largest_income': aggregates.largest_income or 0,
+            'largest_expense': aggregates.largest_expense or 0,
+            'transaction_frequency': aggregates.count / max(1, (datetime.now() - first_date).days)
+        }
+    
+    @reading
+    def get_weekly_report(self, start=None, end=None):
+        """Rapport sur les 7 derniers jours, ou sur la période ``[start, end[`` (timestamps)
+        
+        Les transactions évincées du registre comptent par leurs cumuls journaliers :
+        un jour archivé est inclus si son début est dans la période.
+        """
+        transactions = self.transactions
+        now = datetime.now()
+        
+        if start is None and end is None:
+            # Transactions de la semaine dernière
+            start = to_timestamp(now - timedelta(days=7))
+            last_day = to_timestamp(now) // SECONDS_PER_DAY
+            days = 7
+        else:
+            if end is None:
+                end = to_timestamp(now) + 1
+            if start is None:
+                start = end - 7 * SECONDS_PER_DAY
+            last_day = (end - 1) // SECONDS_PER_DAY
+            days = max(0, last_day - start // SECONDS_PER_DAY + 1)
+        
+        # Bisection sur l'index temporel, puis agrégations en une passe
+        selection = transactions.time_range(start, end)
+        amounts = transactions.amounts[selection]
+        income = float(amounts[amounts > 0].sum())
+        expenses = float(amounts[amounts < 0].sum())
+        count = int(amounts.size)
+        first_day = last_day - days + 1
+        day_counts, day_totals = transactions.daily_rollup(selection, first_day, days)
+        category_totals = transactions.category_totals(selection, expenses_only=True)
+        
+        # Jours archivés de la période
+        for day, categories in self.retention.rollup.between(
+                -(-start // SECONDS_PER_DAY), None if end is None else (end - 1) // SECONDS_PER_DAY):
+            for category, (day_count, day_income, day_expenses) in categories.items():
+                income += day_income
+                expenses += day_expenses
+                count += day_count
+                category_totals[category] = category_totals.get(category, 0.0) + day_expenses
+                if first_day <= day <= last_day:
+                    day_counts[day - first_day] += day_count
+                    day_totals[day - first_day] += day_income + day_expenses
+        
+        weekly_analysis = {
+            'total': income + expenses,
+            'income': income,
+            'expenses': abs(expenses),
+            'count': count,
+            'by_day': {},
+            'top_categories': {}
+        }
+        
+        # Par jour (du plus récent au plus ancien)
+        for offset in range(days - 1, -1, -1):
+            day = from_timestamp((first_day + offset) * SECONDS_PER_DAY).strftime("%Y-%m-%d")
+            weekly_analysis['by_day'][day] = {
+                'count': int(day_counts[offset]),
+                'total': float(day_totals[offset])
+            }
+        
+        # Par catégorie
+        for category in self.categories:
+            cat_amount = category_totals.get(category, 0)
+            if cat_amount < 0:
+                weekly_analysis['top_categories'][category] = abs(cat_amount)
+        
+        return weekly_analysis
+    
+    def set_budget(self, category, budget):
+        """Met à jour le budget d'une catégorie"""
+        self.store.save_budget(category, budget, tenant=self.tenant)
+        with self.lock.write():
+            previous = self.budgets.get(category)
+            self.aggregates.set_budget(category, budget)
+            self._budgets_tag = _budgets_tag(self.budgets)
+            alerts = self.alerts.check_budget(category, to_timestamp(datetime.now()), previous)
+            self._touch()
+        self.events.publish('budget', {
+            'category': category, 'budget': budget, 'revision': self.revision})
+        self._publish_alerts(alerts)
+    
+    def reset(self):
+        """Réinitialise le registre et les agrégats"""
+        with self._journal_lock:
+            self._cleared_id = self.store.clear(self.tenant)
+            self._forget()
+            self.events.publish('sync', {'reason': 'reset', 'rows': 0, 'revision': self.revision})
+    
+    def _forget(self):
+        """Vide l'état en mémoire après un effacement du tenant (sous ``_journal_lock``)"""
+        with self.lock.write():
+            self.transactions.clear()
+            self.aggregates.reset()
+            self.alerts.reset()
+            self.retention.reset()
+            self._reset_training_state()
+            self._touch()
+    
+    @reading
+    def check_consistency(self):
+        """Vérifie les agrégats incrémentaux contre un recalcul complet
+        
+        Si des transactions ont été évincées, le recalcul relit le journal (jusqu'à
+        la dernière transaction intégrée) et contrôle aussi les cumuls journaliers.
+        """
+        if self.retention.archived_id is None:
+            return self.aggregates.verify(self.transactions)
+        expected = AggregateStore(self.budgets)
+        rollup = DailyRollup()
+        for columns in self.store.scan(self.tenant, max_id=self.transactions.last_id):
+            ledger = TransactionLedger(capacity=len(columns['ids']))
+            ledger.extend_columns(**columns)
+            expected.merge_ledger(ledger)
+            rollup.merge(ledger, np.flatnonzero(~np.isin(ledger.ids, self.transactions.ids)))
+        mismatches = self.aggregates.compare(expected)
+        if rollup != self.retention.rollup:
+            mismatches.append('daily_rollup')
+        if self.retention.archived_rows + len(self.transactions) != expected.count:
+            mismatches.append('archived_rows')
+        return mismatches
+    
+    def select_transactions(self, limit, after_id=None, descending=False, columns=False,
+                            **filters):
+        """Page de transactions après ``after_id`` (keyset, filtres de
+        ``TransactionLedger.select``), lue dans le registre ou, si elle peut
+        contenir des transactions évincées, dans le journal
+        
+        Retourne ``(transactions, has_more)`` : enregistrements, ou colonnes
+        (``record_columns``) si ``columns``.
+        """
+        with self.lock.read():
+            ledger = self.transactions
+            boundary = self.retention.archived_id
+            positions = None
+            if boundary is None or (not descending and after_id is not None
+                                    and after_id >= boundary):
+                # Tout identifiant supérieur à la frontière est résident
+                positions, has_more = ledger.select(limit, after_id, descending, **filters)
+            elif descending:
+                # Le registre suffit si la ligne suivant la page est encore résidente
+                found, _ = ledger.select(limit + 1, after_id, True, **filters)
+                if len(found) > limit and ledger.ids[found[-1]] > boundary:
+                    positions, has_more = found[:limit], True
+            if positions is not None:
+                return _page(ledger, positions, columns), has_more
+            last_id = ledger.last_id
+        
+        # Lecture dans le journal, hors verrou, limitée aux transactions déjà intégrées
+        page, has_more = self.store.select(limit, self.tenant, after_id, descending,
+                                           max_id=last_id, **filters)
+        ledger = TransactionLedger(capacity=max(1, limit))
+        if page is not None:
+            ledger.extend_columns(**page)
+        return _page(ledger, np.arange(len(ledger)), columns), has_more
+    
+    @reading
+    def get_savings_recommendations(self, analysis=None):
+        """Génère des recommandations d'épargne"""
+        if analysis is None:
+            return self._cached('recommendations', lambda: self.get_savings_recommendations(
+                self.get_spending_analysis()))
+        recommendations = []
+        
+        if analysis.get('total_income', 0) > 0:
+            savings_rate = abs(analysis.get('total_spent', 0)) / analysis['total_income']
+            
+            if savings_rate > 0.8:
+                recommendations.append({
+                    'type': 'critical',
+                    'title': 'Réduisez vos dépenses',
+                    'message': f'Vous dépensez {savings_rate*100:.1f}% de vos revenus'
+                })
+            
+            # Identifier les catégories avec plus de dépenses
+            if analysis.get('by_category'):
+                top_category = max(analysis['by_category'].items(), 
+                                 key=lambda x: x[1]['amount'], 
+                                 default=(None, {'amount': 0}))
+                
+                if top_category[0]:
+                    recommendations.append({
+                        'type': 'suggestion',
+                        'title': 'Optimisation des dépenses',
+                        'message': f'Pensez à réduire vos dépenses en {top_category[0]}'
+                    })
+        
+        # Recommandation générale d'épargne
+        if analysis.get('total_income', 0) > 2000:
+            recommendations.append({
+                'type': 'savings',
+                'title': 'Épargnez 20%',
+                'message': 'Essayez d\'épargner au moins 20% de vos revenus'
+            })
+        
+        return recommendations
+    
+    def _balance(self):
+        """Solde, revenus, dépenses et taux d'épargne (sous verrou de lecture ou d'écriture)"""
+        income = self.aggregates.income_total
+        expenses = abs(self.aggregates.expense_total)
+        return {
+            'total_balance': income - expenses,
+            'total_income': income,
+            'total_expenses': expenses,
+            'savings_rate': (income - expenses) / income * 100 if income > 0 else 0,
+            'transactions_count': self.aggregates.count
+        }
+    
+    def get_dashboard(self, fields=None, limit=10):
+        """Données du tableau de bord en un seul passage (``fields`` : sections voulues)
+        
+        Toutes les sections sont lues sous un même verrou de lecture, donc à la
+        même révision ; l'analyse est calculée une fois et partagée par le solde
+        et les recommandations.
+        """
+        fields = DASHBOARD_SECTIONS if fields is None else fields
+        unknown = set(fields) - set(DASHBOARD_SECTIONS)
+        if unknown:
+            raise ValueError(f"Sections inconnues : {', '.join(sorted(unknown))}")
+        
+        # Lu avant le registre : un client qui reprend le flux après cet événement
+        # reçoit au pire en double (même identifiant de transaction) une écriture
+        # déjà visible dans le tableau de bord
+        event_id = self.events.last_id
+        with self.lock.read():
+            dashboard = {'revision': self.revision, 'event_id': event_id}
+            analysis = self.get_spending_analysis() if {
+                'analysis', 'recommendations'} & set(fields) else None
+            
+            if 'transactions' in fields:
+                dashboard['transactions'] = self.select_transactions(
+                    limit, descending=True)[0] if limit > 0 else []
+            if 'balance' in fields:
+                dashboard['balance'] = self._balance()
+            if 'analysis' in fields:
+                dashboard['analysis'] = analysis
+            if 'predictions' in fields:
+                dashboard['predictions'] = self.predict_next_week()
+            if 'recommendations' in fields:
+                dashboard['recommendations'] = self._cached(
+                    'recommendations', lambda: self.get_savings_recommendations(analysis))
+            if 'budgets' in fields:
+                dashboard['budgets'] = dict(self.budgets)
+        return dashboard
+
+
+def _budgets_tag(budgets):
+    """Empreinte des budgets (sous verrou d'écriture ou à la construction)"""
+    return hashlib.md5(repr(sorted(budgets.items())).encode()).hexdigest()[:16]
+
+
+def _page(ledger, positions, columns):
+    """Transactions aux positions données : enregistrements ou colonnes"""
+    if columns:
+        return ledger.record_columns(positions)
+    return [ledger.record(position) for position in positions]
@@ -0,0 +1,112 @@
+"""
+Points de sauvegarde versionnés du modèle : poids et métadonnées dans des fichiers .npz
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from core.metrics import stage
+
+FILENAME = 'model-v{version:05d}.npz'
+FILENAME_PATTERN = re.compile(r'^model-v(\d+)\.npz$')
+CURRENT = 'CURRENT'
+
+
+class CheckpointManager:
+    """Sauvegarde, chargement et retour arrière des versions du modèle
+
+    Le fichier ``CURRENT`` désigne la version servie ; sans lui, la plus
+    récente est utilisée.
+    """
+
+    def __init__(self, directory, keep=10):
+        self.directory = str(directory)
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _path(self, version):
+        return os.path.join(self.directory, FILENAME.format(version=version))
+
+    def versions(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(match.group(1))
+            for match in map(FILENAME_PATTERN.match, os.listdir(self.directory))
+            if match
+        )
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.directory, CURRENT)) as handle:
+                version = int(handle.read().strip())
+        except (OSError, ValueError):
+            version = None
+        versions = self.versions()
+        if version in versions:
+            return version
+        return versions[-1] if versions else None
+
+    @stage('checkpoint')
+    def save(self, arrays, metadata):
+        """Écrit une nouvelle version (écriture atomique) et en fait la version courante"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            versions = self.versions()
+            version = versions[-1] + 1 if versions else 1
+            metadata = dict(metadata, version=version, saved_at=time.time())
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.npz')
+            with os.fdopen(handle, 'wb') as output:
+                np.savez(output, metadata=np.array(json.dumps(metadata)), **arrays)
+            os.replace(temporary, self._path(version))
+            self._set_current(version)
+            for old in versions[:max(0, len(versions) + 1 - self.keep)]:
+                os.remove(self._path(old))
+            return version
+
+    def load(self, version=None):
+        """Charge une version (la version courante par défaut) : (tableaux, métadonnées)"""
+        if version is None:
+            version = self.current_version()
+        if version is None:
+            return None, None
+        with np.load(self._path(version)) as data:
+            arrays = {name: data[name] for name in data.files if name != 'metadata'}
+            metadata = json.loads(str(data['metadata']))
+        return arrays, metadata
+
+    def rollback(self, version=None):
+        """Revient à ``version`` (par défaut la version précédant la courante)"""
+        with self._lock:
+            versions = self.versions()
+            current = self.current_version()
+            if version is None:
+                older = [v for v in versions if current is not None and v < current]
+                if not older:
+                    raise ValueError('No previous checkpoint to roll back to')
+                version = older[-1]
+            elif version not in versions:
+                raise ValueError(f'Unknown checkpoint version: {version}')
+            self._set_current(version)
+        return self.load(version)
+
+    def describe(self):
+        """Métadonnées de toutes les versions disponibles"""
+        current = self.current_version()
+        described = []
+        for version in self.versions():
+            with np.load(self._path(version)) as data:
+                metadata = json.loads(str(data['metadata']))
+            metadata['current'] = version == current
+            described.append(metadata)
+        return described
+
+    def _set_current(self, version):
+        with open(os.path.join(self.directory, CURRENT), 'w') as handle:
+            handle.write(str(version))
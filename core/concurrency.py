@@ -0,0 +1,81 @@
+"""
+Verrou lecteurs-rédacteur pour l'état partagé d'un assistant
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Lectures concurrentes, écritures exclusives, priorité aux rédacteurs
+
+    Les lectures sont réentrantes (une analyse peut en appeler une autre) et
+    le rédacteur peut lire ou réécrire sous son propre verrou. Passer d'une
+    lecture à une écriture dans le même thread n'est pas permis : le verrou
+    d'écriture doit être pris d'emblée.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth or self._writer == threading.get_ident():
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+
+        with self._condition:
+            while self._writer is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            yield
+            return
+        if getattr(self._local, 'depth', 0):
+            raise RuntimeError('Cannot upgrade a read lock to a write lock')
+
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = None
+                self._condition.notify_all()
+
+
+def reading(method):
+    """Exécute la méthode sous le verrou de lecture de ``self.lock``"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
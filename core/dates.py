@@ -0,0 +1,24 @@
+"""
+Dates des transactions : timestamps « heure locale » sans fuseau et périodes
+calendaires, sans dépendance lourde (importé par les vues au démarrage)
+"""
+
+import calendar
+from datetime import datetime, timedelta
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+# Périodes de cumul des dépenses (alertes budgétaires)
+PERIODS = ('week', 'month')
+
+
+def to_timestamp(moment):
+    """Convertit une date locale (naïve) en secondes depuis l'epoch, sans fuseau"""
+    return calendar.timegm(moment.timetuple())
+
+
+def from_timestamp(timestamp):
+    """Convertit un timestamp « heure locale » en datetime naïf"""
+    return EPOCH + timedelta(seconds=int(timestamp))
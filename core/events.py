@@ -0,0 +1,173 @@
+"""
+Flux d'événements d'un tenant : publication depuis n'importe quel thread,
+abonnements synchrones ou asyncio
+
+Les événements récents sont conservés pour la reprise d'un client reconnecté
+(``Last-Event-ID`` des server-sent events). Un abonné lent ne bloque jamais
+l'écriture : sa file est bornée et les événements les plus anciens sont écartés.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+import weakref
+from collections import deque
+
+# Événements publiés dans ``FinancialAssistant.events`` :
+#   transaction : transaction ajoutée, solde et dépenses de sa catégorie (delta)
+#   sync        : changement en bloc (import, synchronisation, réinitialisation) ou
+#                 reprise impossible (``resync``) : le client recharge tout
+#   budget      : budget d'une catégorie modifié
+#   forecast    : prévision de la semaine après un changement de modèle servi
+#   alert       : seuil de budget franchi (voir ``core.alerts``)
+EVENT_TYPES = ('transaction', 'sync', 'budget', 'forecast', 'alert')
+
+
+class Subscription:
+    """File d'événements d'un abonné, lue par ``wait`` (thread) ou ``next`` (asyncio)
+
+    Créée dans une boucle asyncio, elle est réveillée par ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, feed, types=None, capacity=1000, loop=None):
+        self.feed = feed
+        self.types = frozenset(types) if types else None
+        self._events = deque(maxlen=capacity)
+        self._loop = loop
+        self._ready = asyncio.Event() if loop is not None else threading.Event()
+
+    def push(self, event, always=False):
+        if not always and self.types is not None and event['type'] not in self.types:
+            return
+        self._events.append(event)
+        if self._loop is None:
+            self._ready.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Boucle fermée : l'abonné a disparu sans se désabonner
+            self.close()
+
+    def _drain(self):
+        self._ready.clear()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def wait(self, timeout=None):
+        """Événements reçus, en attendant au plus ``timeout`` secondes (liste vide sinon)"""
+        self._ready.wait(timeout)
+        return self._drain()
+
+    async def next(self, timeout=None):
+        """Variante asyncio de ``wait``"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._drain()
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventFeed:
+    """Événements ``{'id', 'type', 'time', 'data'}`` numérotés dans l'ordre de publication
+
+    ``last_id`` est l'identifiant du dernier événement publié (0 avant le premier).
+    """
+
+    def __init__(self, history=100):
+        self._ids = itertools.count(1)
+        self.last_id = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.RLock()
+
+    def publish(self, type, data):
+        """Diffuse un événement aux abonnés et le garde dans l'historique"""
+        with self._lock:
+            event = {'id': next(self._ids), 'type': type, 'time': time.time(), 'data': data}
+            self.last_id = event['id']
+            self._history.append(event)
+            # Files des abonnés alimentées dans l'ordre des identifiants
+            for subscriber in list(self._subscribers):
+                subscriber.push(event)
+        return event
+
+    def subscribe(self, types=None, after=None):
+        """Nouvel abonnement (types d'événements ``types``, tous par défaut)
+
+        Les événements d'identifiant supérieur à ``after`` encore en historique
+        sont remis en tête de file. S'ils n'y sont plus tous (historique dépassé,
+        ou identifiant d'un autre processus), un seul événement ``sync`` de motif
+        ``resync`` les remplace, quel que soit ``types`` : le client doit recharger
+        l'état complet. Dans une coroutine, l'abonnement est lié à la boucle courante.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        subscription = Subscription(self, types, loop=loop)
+        with self._lock:
+            # Sous le verrou : aucun nouvel événement ne peut doubler les événements repris
+            if after is not None and self._missing(after):
+                subscription.push({
+                    'id': self.last_id, 'type': 'sync', 'time': time.time(),
+                    'data': {'reason': 'resync', 'after': after}}, always=True)
+            else:
+                for event in self._recent(after) if after is not None else ():
+                    subscription.push(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def recent(self, after=None, types=None):
+        """Événements en historique (postérieurs à l'identifiant ``after``)"""
+        with self._lock:
+            events = self._recent(after)
+        return [event for event in events if types is None or event['type'] in types]
+
+    def _missing(self, after):
+        """Des événements postérieurs à ``after`` ont-ils quitté l'historique ?"""
+        first = self._history[0]['id'] if self._history else self.last_id + 1
+        return after > self.last_id or after + 1 < first
+
+    def _recent(self, after):
+        return [event for event in self._history if after is None or event['id'] > after]
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+
+class EventHub:
+    """Flux par tenant, indépendants de la résidence des assistants
+
+    Un assistant évincé puis reconstruit retrouve le flux de ses abonnés ; un
+    flux sans assistant ni abonné est libéré (références faibles).
+    """
+
+    def __init__(self, history=100):
+        self.history = history
+        self._feeds = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def feed(self, tenant):
+        with self._lock:
+            feed = self._feeds.get(tenant)
+            if feed is None:
+                feed = self._feeds[tenant] = EventFeed(self.history)
+            return feed
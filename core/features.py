@@ -0,0 +1,99 @@
+"""
+Construction des features d'entraînement et d'inférence
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.metrics import stage
+
+
+class FinancialDataProcessor:
+    """Processeur de données financières"""
+    
+    WINDOW = 7
+    # Colonnes ajoutées aux montants de la fenêtre : jour, mois, week-end, catégorie
+    EXTRA_FEATURES = 4
+    
+    @classmethod
+    def window_size(cls, input_size):
+        """Longueur de fenêtre d'un modèle à ``input_size`` entrées"""
+        return input_size - cls.EXTRA_FEATURES
+    
+    @staticmethod
+    def assemble_features(windows, last_days, last_months, last_categories):
+        """Assemble la matrice de features à partir des fenêtres de montants
+        
+        Retourne la matrice (une ligne par fenêtre) et l'échelle de normalisation
+        de chaque fenêtre (max des montants absolus). Les colonnes calendaires
+        décrivent la dernière transaction de chaque fenêtre.
+        """
+        window = windows.shape[1]
+        scales = np.abs(windows).max(axis=1)
+        scales[scales <= 0] = 1
+        
+        features = np.empty((len(windows), window + FinancialDataProcessor.EXTRA_FEATURES))
+        np.divide(windows, scales[:, None], out=features[:, :window])
+        features[:, window] = last_days / 7
+        features[:, window + 1] = last_months / 12
+        features[:, window + 2] = last_days >= 5
+        features[:, window + 3] = last_categories / 10
+        return features, scales
+    
+    @classmethod
+    def window_features(cls, amounts, days_of_week, months, category_codes, window=WINDOW):
+        """Construit les features de toutes les fenêtres glissantes en une passe vectorisée"""
+        return cls.assemble_features(
+            sliding_window_view(amounts, window), days_of_week[window - 1:],
+            months[window - 1:], category_codes[window - 1:])
+    
+    @classmethod
+    def _columns(cls, ledger, start=0):
+        # Instantané cohérent des colonnes (le registre peut grandir en parallèle)
+        size = len(ledger)
+        return (ledger.amounts[start:size], ledger.days_of_week[start:size],
+                ledger.months[start:size], ledger.category_codes[start:size])
+    
+    @classmethod
+    @stage('features')
+    def prepare_training_data(cls, ledger, first_target=WINDOW, window=WINDOW):
+        """Prépare les données pour l'entraînement (cibles normalisées par fenêtre)
+        
+        Seules les fenêtres dont la cible est à une position >= ``first_target``
+        sont construites, ce qui permet de ne traiter que les nouvelles fenêtres.
+        """
+        if len(ledger) < 10:
+            return None, None
+        
+        first_target = max(first_target, window)
+        columns = cls._columns(ledger, first_target - window)
+        if len(columns[0]) <= window:
+            return None, None
+        amounts, days_of_week, months, category_codes = columns
+        # Chaque fenêtre de ``window`` transactions prédit la transaction suivante
+        features, scales = cls.window_features(
+            amounts[:-1], days_of_week[:-1], months[:-1], category_codes[:-1], window)
+        targets = amounts[window:] / scales
+        return features, targets
+    
+    @classmethod
+    @stage('features')
+    def sample_training_data(cls, ledger, targets, window=WINDOW):
+        """Construit les fenêtres dont les cibles sont aux positions ``targets``"""
+        targets = np.asarray(targets)
+        amounts, days_of_week, months, category_codes = cls._columns(ledger)
+        windows = amounts[targets[:, None] - window + np.arange(window)]
+        last = targets - 1
+        features, scales = cls.assemble_features(
+            windows, days_of_week[last], months[last], category_codes[last])
+        return features, amounts[targets] / scales
+    
+    @classmethod
+    def latest_features(cls, ledger, window=WINDOW):
+        """Features de la dernière fenêtre, pour l'inférence"""
+        if len(ledger) < window:
+            return None, None
+        
+        start = len(ledger) - window
+        features, scales = cls.window_features(*cls._columns(ledger, start), window=window)
+        return features, scales[0]
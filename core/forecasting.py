@@ -0,0 +1,112 @@
+"""
+Prévisions multi-horizons : inférence par lots, récursive et déterministe
+
+Le modèle prédit la transaction suivant une fenêtre de montants (7 par
+défaut, la longueur se déduit du nombre d'entrées du réseau). Pour un
+horizon de H jours, chaque pas ajoute la prévision du jour à la fenêtre (qui
+glisse d'un cran) et décrit ce jour dans les features calendaires : H
+produits matriciels pour toutes les fenêtres à la fois, sans aléa.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from core.features import FinancialDataProcessor
+from core.metrics import stage
+
+WEIGHTS = ('W1', 'b1', 'W2', 'b2')
+
+
+def network_window(network):
+    """Longueur de fenêtre attendue par ``network``"""
+    return FinancialDataProcessor.window_size(network.W1.shape[0])
+
+
+def network_weights(network):
+    """Poids d'un réseau, partagés par toutes les fenêtres du lot"""
+    return tuple(getattr(network, name) for name in WEIGHTS)
+
+
+def stack_weights(networks):
+    """Poids de plusieurs réseaux de même forme, un par ligne du lot (multi-tenant)"""
+    return tuple(np.stack([getattr(network, name) for network in networks]) for name in WEIGHTS)
+
+
+def predict_batch(features, weights):
+    """Sorties du réseau pour chaque ligne de ``features`` : un seul produit matriciel
+    (poids partagés) ou un produit matriciel par lots (poids empilés par ligne)"""
+    W1, b1, W2, b2 = weights
+    if W1.ndim == 2:
+        hidden = features @ W1
+        hidden += b1
+        np.maximum(hidden, 0, out=hidden)
+        return (hidden @ W2 + b2)[:, 0]
+    hidden = np.matmul(features[:, None, :], W1)[:, 0]
+    hidden += b1[:, 0]
+    np.maximum(hidden, 0, out=hidden)
+    return (np.matmul(hidden[:, None, :], W2)[:, 0] + b2[:, 0])[:, 0]
+
+
+@stage('forward')
+def recursive_forecast(weights, windows, last_days, last_months, last_categories, start, horizon):
+    """Prévoit les montants des ``horizon`` jours à partir de ``start`` (date)
+
+    ``windows`` contient les derniers montants de chaque ligne et les
+    ``last_*`` le calendrier et la catégorie de leur dernière transaction.
+    Retourne une matrice (lignes, horizon).
+    """
+    windows = np.asarray(windows, dtype=float)
+    count, width = windows.shape
+    # Fenêtres et prévisions dans un même tampon : la fenêtre du pas h en est une vue
+    series = np.empty((count, width + horizon))
+    series[:, :width] = windows
+    days = np.asarray(last_days)
+    months = np.asarray(last_months)
+    categories = np.asarray(last_categories)
+
+    for step in range(horizon):
+        if step:
+            # La dernière ligne de la fenêtre est désormais le jour prévu au pas précédent
+            day = start + timedelta(days=step - 1)
+            days = np.full(count, day.weekday())
+            months = np.full(count, day.month)
+        features, scales = FinancialDataProcessor.assemble_features(
+            series[:, step:step + width], days, months, categories)
+        series[:, width + step] = predict_batch(features, weights) * scales
+    return series[:, width:]
+
+
+def latest_window(ledger, window=FinancialDataProcessor.WINDOW):
+    """Fenêtre la plus récente du registre : (montants, jour, mois, catégorie)"""
+    if len(ledger) < window:
+        return None
+    size = len(ledger)
+    return (ledger.amounts[size - window:size].copy(), int(ledger.days_of_week[size - 1]),
+            int(ledger.months[size - 1]), int(ledger.category_codes[size - 1]))
+
+
+def forecast_assistants(assistants, start, horizon):
+    """Prévisions de plusieurs tenants en un seul lot (poids empilés)
+
+    Les modèles de formes différentes (taille de couche cachée, longueur de
+    fenêtre choisies par la recherche d'hyperparamètres) forment des lots
+    distincts. Retourne ``{tenant: montants}`` pour les assistants ayant assez
+    de données.
+    """
+    groups = {}
+    for assistant in assistants:
+        network = assistant.network
+        with assistant.lock.read():
+            window = latest_window(assistant.transactions, network_window(network))
+        if window is not None:
+            shape = tuple(weight.shape for weight in network_weights(network))
+            groups.setdefault(shape, []).append((assistant.tenant, window, network))
+    forecasts = {}
+    for rows in groups.values():
+        tenants, windows, networks = zip(*rows)
+        amounts, days, months, categories = zip(*windows)
+        forecasts.update(zip(tenants, recursive_forecast(
+            stack_weights(networks), np.vstack(amounts), days, months, categories, start,
+            horizon)))
+    return forecasts
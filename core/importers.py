@@ -0,0 +1,187 @@
+"""
+Import de relevés : lecture en flux de fichiers CSV, NDJSON et OFX, validation
+et normalisation par lots
+"""
+
+import csv
+import json
+import re
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+from core.ledger import DATE_FORMAT, to_timestamp
+
+FORMATS = ('csv', 'ndjson', 'ofx')
+
+# En-têtes CSV reconnus (relevés français et anglais)
+CSV_FIELDS = {
+    'amount': 'amount', 'montant': 'amount',
+    'category': 'category', 'categorie': 'category', 'catégorie': 'category',
+    'description': 'description', 'libelle': 'description', 'libellé': 'description',
+    'label': 'description',
+    'date': 'date', 'date_operation': 'date', "date d'opération": 'date',
+}
+
+DATE_FORMATS = (DATE_FORMAT, '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%d/%m/%Y', '%d/%m/%Y %H:%M:%S')
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<]*)')
+OFX_DATE = re.compile(r'(\d{8})(\d{6})?(?:\.\d+)?(?:\[.*\])?')
+
+
+class InvalidRecord(ValueError):
+    """Ligne invalide : numéro de ligne (ou d'enregistrement) et motif"""
+
+    def __init__(self, line, message):
+        super().__init__(f'ligne {line} : {message}')
+        self.line = line
+
+
+def detect_format(name, content_type=''):
+    """Format d'après l'extension du fichier ou le type de contenu"""
+    name, content_type = (name or '').lower(), (content_type or '').lower()
+    if name.endswith(('.ofx', '.qfx')) or 'ofx' in content_type:
+        return 'ofx'
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return None
+
+
+def decode_lines(lines, encoding='utf-8'):
+    """Décode à la volée des lignes d'octets (requête HTTP, fichier binaire)"""
+    for line in lines:
+        yield line.decode(encoding) if isinstance(line, bytes) else line
+
+
+def parse_csv(lines):
+    """Enregistrements ``(ligne, champs)`` d'un CSV avec en-tête, séparé par ``,`` ou ``;``"""
+    lines = iter(lines)
+    header = next(lines, '').lstrip('\ufeff')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    names = next(csv.reader([header], delimiter=delimiter))
+    columns = [CSV_FIELDS.get(name.strip().lower()) for name in names]
+    if 'amount' not in columns:
+        raise InvalidRecord(1, "colonne 'amount' (ou 'montant') absente")
+    for line, row in enumerate(csv.reader(lines, delimiter=delimiter), start=2):
+        if row:
+            yield line, {column: value for column, value in zip(columns, row) if column}
+
+
+def parse_ndjson(lines):
+    """Enregistrements ``(ligne, objet)`` d'un fichier JSON par ligne"""
+    for line, text in enumerate(lines, start=1):
+        if text.strip():
+            try:
+                yield line, json.loads(text)
+            except json.JSONDecodeError as e:
+                yield line, InvalidRecord(line, f'JSON invalide ({e.msg})')
+
+
+def parse_ofx(lines):
+    """Enregistrements ``(ligne, champs)`` des blocs <STMTTRN> d'un relevé OFX
+
+    Les balises peuvent être réparties sur plusieurs lignes ou toutes sur une
+    seule (OFX 1.x SGML comme OFX 2 XML).
+    """
+    current = None
+    for line, text in enumerate(lines, start=1):
+        for closing, tag, value in OFX_TAG.findall(text):
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield start, {
+                        'amount': current.get('TRNAMT'),
+                        'date': current.get('DTPOSTED'),
+                        'description': current.get('NAME') or current.get('MEMO', ''),
+                    }
+                    current = None
+                elif not closing:
+                    current, start = {}, line
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+PARSERS = {'csv': parse_csv, 'ndjson': parse_ndjson, 'ofx': parse_ofx}
+
+
+def parse_amount(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value or '').strip().replace(' ', '').replace('\u00a0', '').replace('\u202f', '')
+    if ',' in text:
+        # Virgule décimale (1 234,56), éventuellement avec des points de milliers
+        text = text.replace('.', '').replace(',', '.')
+    return float(text)
+
+
+def parse_date(value):
+    text = str(value).strip()
+    match = OFX_DATE.fullmatch(text)
+    if match:
+        # Date OFX : AAAAMMJJ[HHMMSS[.xxx]][[fuseau]]
+        return datetime.strptime(match.group(1) + (match.group(2) or '000000'), '%Y%m%d%H%M%S')
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f'date non reconnue : {text}')
+
+
+def normalize(records, categories, default_category='autres', now=None):
+    """Valide un lot ``(ligne, champs)`` et le convertit en colonnes
+
+    Retourne ``(colonnes, erreurs)`` : les colonnes suivent la signature de
+    ``TransactionLedger.extend_columns`` (sans les identifiants) ; les lignes
+    invalides sont écartées et décrites dans ``erreurs``.
+    """
+    default_timestamp = to_timestamp(now or datetime.now())
+    amounts, names, codes, descriptions, timestamps = [], [], [], [], []
+    errors = []
+    for line, fields in records:
+        try:
+            if isinstance(fields, InvalidRecord):
+                raise fields
+            if not isinstance(fields, dict):
+                raise InvalidRecord(line, 'enregistrement non valide')
+            try:
+                amount = parse_amount(fields.get('amount'))
+            except (TypeError, ValueError):
+                raise InvalidRecord(line, f"montant non valide : {fields.get('amount')!r}")
+            if not np.isfinite(amount):
+                raise InvalidRecord(line, f'montant non valide : {amount}')
+            try:
+                date = fields.get('date')
+                timestamp = to_timestamp(parse_date(date)) if date else default_timestamp
+            except ValueError as e:
+                raise InvalidRecord(line, str(e))
+        except InvalidRecord as e:
+            errors.append(e)
+            continue
+        category = str(fields.get('category') or default_category).strip().lower()
+        amounts.append(amount)
+        names.append(category)
+        codes.append(categories.get(category, 7))
+        descriptions.append(str(fields.get('description') or '')[:500])
+        timestamps.append(timestamp)
+
+    columns = {
+        'amounts': np.array(amounts, dtype=np.float64),
+        'categories': names,
+        'category_codes': np.array(codes, dtype=np.int8),
+        'descriptions': descriptions,
+        'timestamps': np.array(timestamps, dtype=np.int64),
+    }
+    return columns, errors
+
+
+def chunks(records, size):
+    """Découpe un flux d'enregistrements en lots de ``size``"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
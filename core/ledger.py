@@ -0,0 +1,416 @@
+"""
+Registre colonnaire des transactions, stocké dans des tableaux NumPy
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+# Réexportés : les modules du registre importent les dates depuis ``core.ledger``
+from core.dates import DATE_FORMAT, EPOCH, SECONDS_PER_DAY, from_timestamp, to_timestamp  # noqa: F401
+
+
+class StringPool:
+    """Stockage interné de chaînes : chaque valeur distincte n'est gardée qu'une fois"""
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def intern(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.index[value] = code
+        return code
+
+    def code(self, value):
+        return self.index.get(value)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class TransactionLedger:
+    """Registre des transactions en colonnes typées, avec une vue compatible dict"""
+
+    COLUMNS = (
+        ('id', np.int64),
+        ('amount', np.float64),
+        ('category_encoded', np.int8),
+        ('category_ref', np.int32),
+        ('description_ref', np.int32),
+        ('timestamp', np.int64),
+        ('day_of_week', np.int8),
+        ('month', np.int8),
+        ('year', np.int16),
+    )
+
+    def __init__(self, capacity=1024):
+        # Incrémentée à chaque modification, sert de validateur (ETag)
+        self.version = 0
+        self._size = 0
+        # Plus grand identifiant reçu, conservé même si sa ligne est évincée (``retain``)
+        self._last_id = -1
+        # Index temporel : tant que les timestamps arrivent dans l'ordre, les
+        # positions sont déjà triées ; sinon une permutation chronologique est
+        # tenue à jour en y fusionnant les lignes ajoutées depuis la requête
+        # précédente. Cache ``(lignes indexées, permutation, timestamps triés)``,
+        # remplacé d'un bloc : des lecteurs concurrents ne voient jamais un état partiel.
+        self._time_sorted = True
+        self._time_cache = None
+        self._columns = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS
+        }
+        self.category_pool = StringPool()
+        self.description_pool = StringPool()
+
+    @classmethod
+    def from_dicts(cls, records):
+        """Construit un registre à partir de l'ancien format liste de dicts"""
+        ledger = cls(capacity=max(1024, len(records)))
+        for record in records:
+            ledger.append(
+                record['amount'],
+                record.get('category', 'autres'),
+                record.get('category_encoded', 7),
+                record.get('description', ''),
+                datetime.strptime(record['date'], DATE_FORMAT),
+                transaction_id=record.get('id'),
+            )
+        return ledger
+
+    # ---------- Stockage ----------
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns['id'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype in self.COLUMNS:
+            grown = np.empty(capacity, dtype=dtype)
+            grown[:self._size] = self._columns[name][:self._size]
+            self._columns[name] = grown
+
+    def append(self, amount, category, category_encoded, description, moment,
+               transaction_id=None):
+        """Ajoute une transaction et retourne sa position dans le registre"""
+        self._reserve(1)
+        position = self._size
+        if transaction_id is None:
+            transaction_id = position
+        columns = self._columns
+        timestamp = to_timestamp(moment)
+        if position and timestamp < columns['timestamp'][position - 1]:
+            self._time_sorted = False
+        columns['id'][position] = transaction_id
+        columns['amount'][position] = float(amount)
+        columns['category_encoded'][position] = category_encoded
+        columns['category_ref'][position] = self.category_pool.intern(category)
+        columns['description_ref'][position] = self.description_pool.intern(description)
+        columns['timestamp'][position] = timestamp
+        columns['day_of_week'][position] = moment.weekday()
+        columns['month'][position] = moment.month
+        columns['year'][position] = moment.year
+        self._size += 1
+        self._last_id = max(self._last_id, int(transaction_id))
+        self.version += 1
+        return position
+
+    def extend_columns(self, ids, amounts, categories, category_codes, descriptions, timestamps):
+        """Ajoute un bloc de transactions déjà en colonnes (chargement en masse)"""
+        count = len(ids)
+        if not count:
+            return
+        self._reserve(count)
+        start, stop = self._size, self._size + count
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        dates = timestamps.astype('datetime64[s]')
+        if np.any(timestamps[1:] < timestamps[:-1]) or (
+                start and timestamps[0] < self._columns['timestamp'][start - 1]):
+            self._time_sorted = False
+        columns = self._columns
+        columns['id'][start:stop] = ids
+        columns['amount'][start:stop] = amounts
+        columns['category_encoded'][start:stop] = category_codes
+        columns['category_ref'][start:stop] = [
+            self.category_pool.intern(category) for category in categories]
+        columns['description_ref'][start:stop] = [
+            self.description_pool.intern(description) for description in descriptions]
+        columns['timestamp'][start:stop] = timestamps
+        # Le 1er janvier 1970 était un jeudi (weekday() == 3)
+        columns['day_of_week'][start:stop] = (timestamps // SECONDS_PER_DAY + 3) % 7
+        columns['month'][start:stop] = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        columns['year'][start:stop] = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        self._size = stop
+        self._last_id = max(self._last_id, int(columns['id'][stop - 1]))
+        self.version += 1
+
+    def clear(self):
+        """Vide le registre"""
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+
+    def retain(self, keep):
+        """Ne garde que les lignes du masque ``keep`` (ordre conservé)
+
+        Les colonnes sont recopiées dans des tableaux à la taille du reste et les
+        pools de chaînes reconstruits : la mémoire des lignes écartées est rendue.
+        """
+        size = int(np.count_nonzero(keep))
+        columns = {}
+        for name, dtype in self.COLUMNS:
+            column = np.empty(max(1024, size), dtype=dtype)
+            column[:size] = self._columns[name][:self._size][keep]
+            columns[name] = column
+        for name, pool in (('category_ref', 'category_pool'), ('description_ref', 'description_pool')):
+            codes, refs = np.unique(columns[name][:size], return_inverse=True)
+            old = getattr(self, pool)
+            new = StringPool()
+            for code in codes.tolist():
+                new.intern(old[code])
+            columns[name][:size] = refs
+            setattr(self, pool, new)
+        self._columns = columns
+        self._size = size
+        timestamps = columns['timestamp'][:size]
+        self._time_sorted = bool(np.all(timestamps[1:] >= timestamps[:-1]))
+        self._time_cache = None
+        self.version += 1
+
+    def column(self, name):
+        """Vue (sans copie) sur une colonne, limitée aux lignes remplies"""
+        return self._columns[name][:self._size]
+
+    @property
+    def ids(self):
+        return self.column('id')
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    @property
+    def amounts(self):
+        return self.column('amount')
+
+    @property
+    def category_codes(self):
+        return self.column('category_encoded')
+
+    @property
+    def category_refs(self):
+        return self.column('category_ref')
+
+    @property
+    def timestamps(self):
+        return self.column('timestamp')
+
+    @property
+    def days_of_week(self):
+        return self.column('day_of_week')
+
+    @property
+    def months(self):
+        return self.column('month')
+
+    @property
+    def years(self):
+        return self.column('year')
+
+    @property
+    def is_weekend(self):
+        return self.days_of_week >= 5
+
+    def category_totals(self, selection=None, expenses_only=False):
+        """Somme des montants par nom de catégorie, en une réduction vectorisée"""
+        refs = self.category_refs
+        amounts = self.amounts
+        if selection is not None:
+            refs = refs[selection]
+            amounts = amounts[selection]
+        if expenses_only:
+            amounts = np.minimum(amounts, 0)
+        sums = np.bincount(refs, weights=amounts, minlength=len(self.category_pool))
+        return {
+            name: float(sums[code]) for code, name in enumerate(self.category_pool.values)
+        }
+
+    # ---------- Index temporel ----------
+
+    def _time_index(self):
+        """Retourne (permutation chronologique ou None si déjà triée, timestamps triés)
+
+        Les lignes ajoutées depuis la requête précédente sont triées entre elles
+        puis fusionnées dans l'index (O(N + k log k)) ; le tri complet n'a lieu
+        qu'à la première requête désordonnée ou après ``retain``.
+        """
+        if self._time_sorted:
+            return None, self.timestamps
+        size = self._size
+        cache = self._time_cache
+        if cache is None:
+            order = np.argsort(self.timestamps, kind='stable')
+            cache = (size, order, self.timestamps[order])
+        elif cache[0] < size:
+            indexed, order, timestamps = cache
+            added = self._columns['timestamp'][indexed:size]
+            ranks = np.argsort(added, kind='stable')
+            added = added[ranks]
+            # 'right' : à timestamp égal, les nouvelles lignes (positions plus
+            # grandes) suivent les anciennes, comme avec un tri stable complet
+            slots = np.searchsorted(timestamps, added, 'right')
+            cache = (size, np.insert(order, slots, ranks + indexed),
+                     np.insert(timestamps, slots, added))
+        else:
+            return cache[1], cache[2]
+        self._time_cache = cache
+        return cache[1], cache[2]
+
+    def time_range(self, start=None, end=None):
+        """Sélection des transactions telles que ``start <= timestamp < end``
+
+        Les bornes sont trouvées par bisection sur l'index trié (O(log N)) ; le
+        résultat (tranche ou tableau de positions) indexe directement les colonnes.
+        """
+        order, timestamps = self._time_index()
+        low = 0 if start is None else int(np.searchsorted(timestamps, start, 'left'))
+        high = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, 'left'))
+        if order is None:
+            return slice(low, max(low, high))
+        return order[low:max(low, high)]
+
+    def daily_rollup(self, selection, first_day, days):
+        """Nombre et total par jour (``first_day`` en jours depuis l'epoch), en une passe"""
+        offsets = self.timestamps[selection] // SECONDS_PER_DAY - first_day
+        inside = (offsets >= 0) & (offsets < days)
+        counts = np.bincount(offsets[inside], minlength=days)
+        totals = np.bincount(offsets[inside], weights=self.amounts[selection][inside],
+                             minlength=days)
+        # Sans ligne, bincount retourne des entiers même avec des poids
+        return counts, totals.astype(np.float64, copy=False)
+
+    # ---------- Pagination ----------
+
+    def select(self, limit, after_id=None, descending=False, category=None, start=None,
+               end=None, sign=None, chunk_size=4096):
+        """Positions des ``limit`` premières transactions après ``after_id`` (keyset)
+
+        Les filtres (catégorie, bornes de timestamp ``[start, end)``, signe
+        ``income``/``expense``) sont évalués par blocs vectorisés, sans parcourir
+        le registre au-delà de la page demandée. Retourne ``(positions, has_more)``.
+        """
+        size = self._size
+        ids = self.ids
+        category_code = None
+        if category is not None:
+            category_code = self.category_pool.code(category)
+            if category_code is None:
+                return np.empty(0, dtype=np.int64), False
+
+        if descending:
+            bound = size if after_id is None else int(np.searchsorted(ids, after_id, 'left'))
+            blocks = ((max(0, stop - chunk_size), stop) for stop in range(bound, 0, -chunk_size))
+        else:
+            bound = 0 if after_id is None else int(np.searchsorted(ids, after_id, 'right'))
+            blocks = ((begin, min(size, begin + chunk_size)) for begin in range(bound, size, chunk_size))
+
+        found = []
+        wanted = limit + 1
+        for begin, stop in blocks:
+            mask = np.ones(stop - begin, dtype=bool)
+            if category_code is not None:
+                mask &= self._columns['category_ref'][begin:stop] == category_code
+            if start is not None:
+                mask &= self._columns['timestamp'][begin:stop] >= start
+            if end is not None:
+                mask &= self._columns['timestamp'][begin:stop] < end
+            if sign == 'income':
+                mask &= self._columns['amount'][begin:stop] > 0
+            elif sign == 'expense':
+                mask &= self._columns['amount'][begin:stop] < 0
+            positions = np.flatnonzero(mask) + begin
+            if descending:
+                positions = positions[::-1]
+            found.append(positions[:wanted])
+            wanted -= len(found[-1])
+            if wanted <= 0:
+                break
+
+        positions = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return positions[:limit], len(positions) > limit
+
+    # ---------- Vue compatible dict ----------
+
+    def record(self, position):
+        """Retourne la transaction à la position donnée au format dict historique"""
+        columns = self._columns
+        day_of_week = int(columns['day_of_week'][position])
+        return {
+            'id': int(columns['id'][position]),
+            'amount': float(columns['amount'][position]),
+            'category': self.category_pool[columns['category_ref'][position]],
+            'category_encoded': int(columns['category_encoded'][position]),
+            'description': self.description_pool[columns['description_ref'][position]],
+            'date': from_timestamp(columns['timestamp'][position]).strftime(DATE_FORMAT),
+            'day_of_week': day_of_week,
+            'month': int(columns['month'][position]),
+            'is_weekend': day_of_week >= 5,
+            'year': int(columns['year'][position]),
+        }
+
+    def record_columns(self, positions):
+        """Transactions aux positions données, en colonnes (mêmes champs que ``record``)
+
+        Chaque champ est un tableau NumPy construit en une opération vectorisée ;
+        les chaînes (catégorie, libellé, date) sont des tableaux d'objets ou d'unicode.
+        """
+        columns = self._columns
+        positions = np.asarray(positions, dtype=np.int64)
+        day_of_week = columns['day_of_week'][positions]
+        # « AAAA-MM-JJTHH:MM:SS » ramené au format historique (espace au 11e caractère)
+        dates = np.datetime_as_string(columns['timestamp'][positions].astype('datetime64[s]'))
+        dates.view('U1').reshape(len(positions), dates.itemsize // 4)[:, 10] = ' '
+        return {
+            'id': columns['id'][positions],
+            'amount': columns['amount'][positions],
+            'category': np.array(self.category_pool.values, dtype=object)[
+                columns['category_ref'][positions]],
+            'category_encoded': columns['category_encoded'][positions],
+            'description': np.array(self.description_pool.values, dtype=object)[
+                columns['description_ref'][positions]],
+            'date': dates,
+            'day_of_week': day_of_week,
+            'month': columns['month'][positions],
+            'is_weekend': day_of_week >= 5,
+            'year': columns['year'][positions],
+        }
+
+    def to_dicts(self):
+        return [self.record(position) for position in range(self._size)]
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __iter__(self):
+        for position in range(self._size):
+            yield self.record(position)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.record(position) for position in range(*key.indices(self._size))]
+        if key < 0:
+            key += self._size
+        if not 0 <= key < self._size:
+            raise IndexError('transaction index out of range')
+        return self.record(key)
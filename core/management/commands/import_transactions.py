@@ -0,0 +1,66 @@
+"""
+Import de relevés en ligne de commande
+
+    python manage.py import_transactions releve.csv export.ofx --tenant alice
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import PARSERS, decode_lines, detect_format
+from core.services import get_assistant
+
+
+class Command(BaseCommand):
+    help = "Importe des transactions depuis des fichiers CSV, NDJSON ou OFX (lecture en flux, par lots)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Fichiers à importer')
+        parser.add_argument('--format', choices=sorted(PARSERS),
+                            help="Format des fichiers (déduit de l'extension par défaut)")
+        parser.add_argument('--tenant', default=None, help='Tenant destinataire')
+        parser.add_argument('--category', default='autres',
+                            help='Catégorie des lignes qui n\'en précisent pas')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--encoding', default='utf-8')
+        parser.add_argument('--no-train', action='store_true',
+                            help='Ne pas ré-entraîner le modèle après l\'import')
+
+    def handle(self, *args, **options):
+        try:
+            assistant = get_assistant(options['tenant']) if options['tenant'] else get_assistant()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        imported = 0
+        for path in options['paths']:
+            file_format = options['format'] or detect_format(path)
+            if file_format is None:
+                raise CommandError(f'{path} : format non reconnu, précisez --format')
+
+            started = time.perf_counter()
+            try:
+                with open(path, 'rb') as handle:
+                    report = assistant.import_transactions(
+                        PARSERS[file_format](decode_lines(handle, options['encoding'])),
+                        chunk_size=options['chunk_size'],
+                        default_category=options['category'],
+                        train=False,
+                    )
+            except (OSError, ValueError) as e:
+                raise CommandError(f'{path} : {e}')
+            imported += report['imported']
+
+            self.stdout.write(
+                f"{path} : {report['imported']} importées, {report['rejected']} rejetées, "
+                f"{report['batches']} lots en {time.perf_counter() - started:.2f} s")
+            for error in report['errors']:
+                self.stderr.write(f'  {error}')
+
+        # Un seul ré-entraînement pour l'ensemble des fichiers
+        if imported and not options['no_train']:
+            job = assistant.schedule_training('import')
+            assistant.training_queue.join()
+            self.stdout.write(f'Ré-entraînement : {job.status}')
+        self.stdout.write(self.style.SUCCESS(f'{imported} transactions importées'))
@@ -0,0 +1,67 @@
+"""
+Recherche d'hyperparamètres en ligne de commande
+
+    python manage.py search_hyperparameters --tenant alice --windows 7 14 --workers 8
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import get_assistant
+
+
+class Command(BaseCommand):
+    help = ("Entraîne en parallèle une grille de modèles (couche cachée, taux d'apprentissage, "
+            "fenêtre) et promeut le meilleur")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', default=None, help='Tenant dont le modèle est recherché')
+        parser.add_argument('--hidden-sizes', type=int, nargs='+')
+        parser.add_argument('--learning-rates', type=float, nargs='+')
+        parser.add_argument('--windows', type=int, nargs='+', help='Longueurs de fenêtre')
+        parser.add_argument('--epochs', type=int, help='Époques maximales par candidat')
+        parser.add_argument('--holdout', type=float,
+                            help='Part finale du registre réservée au classement (0.2 : 20 %%)')
+        parser.add_argument('--workers', type=int, help='Processus du pool (un par cœur par défaut)')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--no-promote', action='store_true',
+                            help='Classer les candidats sans changer le modèle servi')
+
+    def handle(self, *args, **options):
+        try:
+            assistant = get_assistant(options['tenant']) if options['tenant'] else get_assistant()
+            summary = assistant.search_hyperparameters(
+                progress=self._progress,
+                promote=not options['no_promote'],
+                **{name: options[name] for name in (
+                    'hidden_sizes', 'learning_rates', 'windows', 'epochs', 'holdout', 'workers',
+                    'seed')},
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        if summary is None:
+            raise CommandError('Pas assez de transactions pour classer les candidats')
+
+        self.stdout.write(f"\n{'fenêtre':>8} {'cachée':>7} {'taux':>8} {'époques':>8} "
+                          f"{'RMSE':>10} {'MAE':>10} {'durée':>8}")
+        for candidate in summary['candidates']:
+            self.stdout.write(
+                f"{candidate['window']:>8} {candidate['hidden_size']:>7} "
+                f"{candidate['learning_rate']:>8g} {candidate['epochs']:>8} "
+                f"{candidate['holdout_rmse']:>10.2f} {candidate['holdout_mae']:>10.2f} "
+                f"{candidate['duration']:>7.1f}s")
+        self.stdout.write(
+            f"\n{len(summary['candidates'])} candidats en {summary['search_seconds']:.1f} s sur "
+            f"{summary['workers']} processus ({summary['candidate_seconds']:.1f} s de calcul), "
+            f"validation sur les {summary['holdout_rows']} dernières transactions")
+
+        best = summary['best']
+        described = (f"fenêtre {best['window']}, couche cachée {best['hidden_size']}, "
+                     f"taux {best['learning_rate']:g}")
+        if summary['promoted']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Modèle promu (version {summary['version']}) : {described}"))
+        else:
+            self.stdout.write(f'Meilleur candidat (non promu) : {described}')
+
+    def _progress(self, done, total, best):
+        self.stdout.write(f'  {done + 1}/{total} candidats, meilleure RMSE {best:.2f}')
@@ -0,0 +1,246 @@
+"""
+Métriques du processus : compteurs, histogrammes et export au format texte
+Prometheus
+
+Le coût d'une mesure sur le chemin critique se limite à deux lectures
+d'horloge, une bisection sur les bornes et un verrou non contendu : les
+métriques restent actives en production. Les valeurs dérivées de l'état
+(taille des registres, statistiques des caches) ne sont lues qu'à l'export,
+par des collecteurs.
+"""
+
+import abc
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Family(abc.ABC):
+    """Métrique et ses séries, une par combinaison de valeurs d'étiquettes"""
+
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        # Séries indexées par les valeurs telles que passées (sans conversion en texte)
+        self._lookup = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Série des étiquettes ``values``"""
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f'{self.name} : étiquettes attendues {self.label_names}')
+            with self._lock:
+                child = self._children.setdefault(
+                    tuple(str(value) for value in values), self._child())
+                self._lookup[values] = child
+        return child
+
+    @abc.abstractmethod
+    def _child(self):
+        """Nouvelle série, propre au type de métrique"""
+
+    def samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            yield from child.samples(self.name, self.label_names, values)
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, label_names, values):
+        yield name, _format_labels(label_names, values), self.value
+
+
+class Counter(_Family):
+    type = 'counter'
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return Timer(self)
+
+    def samples(self, name, label_names, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + (float('inf'),), counts):
+            cumulative += bucket
+            yield (f'{name}_bucket',
+                   _format_labels(label_names, values, [('le', _format_value(bound))]),
+                   cumulative)
+        yield f'{name}_sum', _format_labels(label_names, values), total
+        yield f'{name}_count', _format_labels(label_names, values), count
+
+
+class Histogram(_Family):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+
+class Timer:
+    """Durée d'un bloc (``with``) ou d'une fonction (décorateur) dans un histogramme"""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+    def __call__(self, function):
+        histogram = self.histogram
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+
+
+class MetricsRegistry:
+    """Métriques déclarées par les modules et collecteurs lus à l'export
+
+    Un collecteur retourne des tuples ``(nom, type, aide, [(étiquettes, valeur)])``.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric):
+            raise ValueError(f'Métrique déjà déclarée avec un autre type : {metric.name}')
+        return existing
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def collector(self, function):
+        """Enregistre ``function`` (utilisable en décorateur)"""
+        with self._lock:
+            self._collectors.append(function)
+        return function
+
+    def render(self):
+        """Export au format texte Prometheus (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(f'{name}{labels} {_format_value(value)}'
+                         for name, labels, value in metric.samples())
+        for collect in collectors:
+            for name, metric_type, help, samples in collect():
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.extend(f'{name}{_format_labels(tuple(labels), tuple(labels.values()))} '
+                             f'{_format_value(value)}' for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Métriques du chemin critique, partagées par les modules
+STAGE_SECONDS = REGISTRY.histogram(
+    'moneywise_stage_seconds',
+    "Durée des étapes internes (features, passe avant, époques, agrégation, persistance)",
+    labels=('stage',))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'moneywise_http_request_duration_seconds', 'Durée des requêtes HTTP par vue',
+    labels=('view', 'method', 'status'))
+TRAINING_JOBS = REGISTRY.counter(
+    'moneywise_training_jobs_total', 'Entraînements exécutés, par mode et statut',
+    labels=('mode', 'status'))
+TRANSACTIONS_WRITTEN = REGISTRY.counter(
+    'moneywise_transactions_written_total', 'Transactions écrites dans le journal',
+    labels=('source',))
+
+
+def stage(name):
+    """Minuteur d'une étape interne : ``with stage('features'):`` ou ``@stage('features')``"""
+    return Timer(STAGE_SECONDS.labels(name))
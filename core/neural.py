@@ -0,0 +1,175 @@
+"""
+Réseau de neurones (NumPy) pour la prédiction des montants
+"""
+
+import logging
+import time
+from collections import deque
+
+import numpy as np
+
+from core.metrics import STAGE_SECONDS
+from core.optim import get_optimizer
+
+logger = logging.getLogger('moneywise.training')
+
+
+class NeuralNetwork:
+    """Réseau de neurones simple pour prédiction financière"""
+    
+    def __init__(self, input_size=7, hidden_size=10, output_size=1, learning_rate=0.01,
+                 history_size=1000):
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.output_size = output_size
+        self.learning_rate = learning_rate
+        
+        # Initialisation des poids avec He initialization
+        self.W1 = np.random.randn(input_size, hidden_size) * np.sqrt(2. / input_size)
+        self.b1 = np.zeros((1, hidden_size))
+        self.W2 = np.random.randn(hidden_size, output_size) * np.sqrt(2. / hidden_size)
+        self.b2 = np.zeros((1, output_size))
+        
+        # Historique borné des pertes d'entraînement (une valeur par époque)
+        self.loss_history = deque(maxlen=history_size)
+        self.last_run = None
+    
+    def get_state(self):
+        """Poids et historique de pertes, pour les points de sauvegarde"""
+        return {
+            'W1': self.W1, 'b1': self.b1, 'W2': self.W2, 'b2': self.b2,
+            'loss_history': np.array(self.loss_history),
+        }
+    
+    @classmethod
+    def from_state(cls, arrays, learning_rate=0.01):
+        """Reconstruit un réseau à partir d'un point de sauvegarde"""
+        input_size, hidden_size = arrays['W1'].shape
+        network = cls(input_size, hidden_size, arrays['W2'].shape[1], learning_rate)
+        for name in ('W1', 'b1', 'W2', 'b2'):
+            setattr(network, name, np.array(arrays[name], dtype=float))
+        network.loss_history.extend(arrays['loss_history'].tolist())
+        return network
+    
+    def relu(self, x):
+        return np.maximum(0, x)
+    
+    def relu_derivative(self, x):
+        return (x > 0).astype(float)
+    
+    def forward(self, X):
+        # Propagation avant
+        self.z1 = np.dot(X, self.W1) + self.b1
+        self.a1 = self.relu(self.z1)
+        self.z2 = np.dot(self.a1, self.W2) + self.b2
+        return self.z2
+    
+    def train(self, X, y, epochs=1000, batch_size=256, optimizer='adam',
+              validation_split=0.1, patience=10, min_delta=1e-4, callback=None, seed=None):
+        """Entraîne le réseau par mini-lots mélangés, avec arrêt anticipé
+        
+        La validation porte sur les dernières lignes (ordre chronologique) ; l'arrêt
+        intervient après ``patience`` époques sans gain relatif d'au moins
+        ``min_delta``, et les meilleurs poids observés sont restaurés à la fin.
+        """
+        rng = np.random.default_rng(seed)
+        y = y.reshape(-1, self.output_size)
+        n_val = int(len(X) * validation_split) if len(X) >= 20 else 0
+        X_train, y_train = X[:len(X) - n_val], y[:len(X) - n_val]
+        X_val, y_val = X[len(X) - n_val:], y[len(X) - n_val:]
+        n_train = len(X_train)
+        batch_size = max(1, min(batch_size, n_train))
+        
+        # Buffers alloués une seule fois pour toute la durée de l'entraînement
+        params = [self.W1, self.b1, self.W2, self.b2]
+        grads = [np.empty_like(param) for param in params]
+        dW1, db1, dW2, db2 = grads
+        best_params = [param.copy() for param in params]
+        z1 = np.empty((batch_size, self.hidden_size))
+        a1 = np.empty_like(z1)
+        dA1 = np.empty_like(z1)
+        z2 = np.empty((batch_size, self.output_size))
+        update = get_optimizer(optimizer, params, self.learning_rate)
+        
+        best_loss = np.inf
+        stale_epochs = 0
+        epoch_seconds = STAGE_SECONDS.labels('training_epoch')
+        started = epoch_started = time.perf_counter()
+        for epoch in range(epochs):
+            order = rng.permutation(n_train)
+            epoch_loss = 0.0
+            for start in range(0, n_train, batch_size):
+                batch = order[start:start + batch_size]
+                m = len(batch)
+                Xb, yb = X_train[batch], y_train[batch]
+                
+                # Propagation avant
+                np.dot(Xb, self.W1, out=z1[:m])
+                z1[:m] += self.b1
+                np.maximum(z1[:m], 0, out=a1[:m])
+                np.dot(a1[:m], self.W2, out=z2[:m])
+                z2[:m] += self.b2
+                
+                # Rétropropagation (dZ2 = erreur de sortie)
+                dZ2 = z2[:m]
+                dZ2 -= yb
+                epoch_loss += float(np.vdot(dZ2, dZ2))
+                np.dot(a1[:m].T, dZ2, out=dW2)
+                dW2 /= m
+                np.mean(dZ2, axis=0, keepdims=True, out=db2)
+                np.dot(dZ2, self.W2.T, out=dA1[:m])
+                dA1[:m] *= z1[:m] > 0
+                np.dot(Xb.T, dA1[:m], out=dW1)
+                dW1 /= m
+                np.mean(dA1[:m], axis=0, keepdims=True, out=db1)
+                
+                update.step(grads)
+            
+            loss = epoch_loss / (n_train * self.output_size)
+            now = time.perf_counter()
+            epoch_seconds.observe(now - epoch_started)
+            epoch_started = now
+            self.loss_history.append(loss)
+            if callback is not None:
+                callback(epoch, epochs, loss)
+            
+            monitored = float(np.mean((self.predict(X_val) - y_val) ** 2)) if n_val else loss
+            if monitored < best_loss * (1 - min_delta):
+                best_loss = monitored
+                stale_epochs = 0
+                for best, param in zip(best_params, params):
+                    np.copyto(best, param)
+            else:
+                stale_epochs += 1
+            
+            if epoch % 100 == 0:
+                logger.debug('epoch=%d loss=%.6f val_loss=%.6f', epoch, loss, monitored)
+            if stale_epochs >= patience:
+                break
+        
+        for best, param in zip(best_params, params):
+            np.copyto(param, best)
+        
+        self.last_run = {
+            'epochs': epoch + 1,
+            'stopped_early': stale_epochs >= patience,
+            'train_loss': loss,
+            'val_loss': best_loss,
+            'optimizer': optimizer,
+            'batch_size': batch_size,
+            'samples': len(X),
+            'duration': time.perf_counter() - started,
+        }
+        logger.info(
+            'training finished epochs=%(epochs)d stopped_early=%(stopped_early)s '
+            'train_loss=%(train_loss).6f val_loss=%(val_loss).6f duration=%(duration).3fs',
+            self.last_run, extra={'training': self.last_run})
+        return self.last_run
+    
+    def predict(self, X):
+        """Inférence sans état partagé : sûre entre threads, contrairement à ``forward``
+        qui conserve ses activations pour la rétropropagation"""
+        hidden = np.dot(X, self.W1)
+        hidden += self.b1
+        np.maximum(hidden, 0, out=hidden)
+        return np.dot(hidden, self.W2) + self.b2
@@ -0,0 +1,77 @@
+"""
+Optimiseurs pour l'entraînement du réseau : mises à jour en place, état alloué une fois
+"""
+
+import numpy as np
+
+
+class SGD:
+    """Descente de gradient simple"""
+
+    def __init__(self, params, learning_rate):
+        self.params = params
+        self.learning_rate = learning_rate
+
+    def step(self, grads):
+        for param, grad in zip(self.params, grads):
+            param -= self.learning_rate * grad
+
+
+class Momentum(SGD):
+    """Descente de gradient avec momentum"""
+
+    def __init__(self, params, learning_rate, beta=0.9):
+        super().__init__(params, learning_rate)
+        self.beta = beta
+        self.velocities = [np.zeros_like(param) for param in params]
+
+    def step(self, grads):
+        for param, grad, velocity in zip(self.params, grads, self.velocities):
+            velocity *= self.beta
+            velocity -= self.learning_rate * grad
+            param += velocity
+
+
+class Adam(SGD):
+    """Adam (Kingma & Ba, 2015)"""
+
+    def __init__(self, params, learning_rate, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        super().__init__(params, learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.t = 0
+        self.moments = [np.zeros_like(param) for param in params]
+        self.velocities = [np.zeros_like(param) for param in params]
+        self.buffers = [np.empty_like(param) for param in params]
+
+    def step(self, grads):
+        self.t += 1
+        step_size = (self.learning_rate * np.sqrt(1 - self.beta2 ** self.t)
+                     / (1 - self.beta1 ** self.t))
+        for param, grad, moment, velocity, buffer in zip(
+                self.params, grads, self.moments, self.velocities, self.buffers):
+            moment *= self.beta1
+            moment += (1 - self.beta1) * grad
+            velocity *= self.beta2
+            np.square(grad, out=buffer)
+            velocity += (1 - self.beta2) * buffer
+            np.sqrt(velocity, out=buffer)
+            buffer += self.epsilon
+            np.divide(moment, buffer, out=buffer)
+            buffer *= step_size
+            param -= buffer
+
+
+OPTIMIZERS = {
+    'sgd': SGD,
+    'momentum': Momentum,
+    'adam': Adam,
+}
+
+
+def get_optimizer(name, params, learning_rate):
+    try:
+        return OPTIMIZERS[name](params, learning_rate)
+    except KeyError:
+        raise ValueError(f'Unknown optimizer: {name}') from None
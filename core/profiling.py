@@ -0,0 +1,100 @@
+"""
+Profilage par échantillonnage d'une requête, à la demande
+
+Un thread relève la pile de chaque thread actif à intervalle fixe pendant la
+requête ; le résultat est agrégé au format « piles repliées » (une ligne
+``thread;fichier:fonction;... échantillons``), lisible par flamegraph.pl ou
+speedscope. Tous les threads du processus sont échantillonnés, car les vues
+asynchrones calculent dans le pool de calcul et non dans le thread de la
+requête ; les threads bloqués en attente (verrous, files, sockets) sont ignorés.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+# Fonctions d'attente : une pile qui s'y termine ne consomme pas de CPU
+IDLE_FRAMES = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'), ('selectors.py', 'select'), ('socket.py', 'accept'),
+    ('socketserver.py', 'serve_forever'),
+}
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles, actif entre ``start()`` et ``stop()``"""
+
+    def __init__(self, label='', interval=0.005, max_depth=64):
+        self.label = label
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._sample, name='moneywise-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        return self
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._stack(frame)
+                if stack is not None:
+                    self.stacks[(names.get(ident, str(ident)),) + stack] += 1
+            self.samples += 1
+
+    def _stack(self, frame):
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def collapsed(self):
+        """Piles repliées, de la plus fréquente à la moins fréquente"""
+        return ''.join(f"{';'.join(stack)} {count}\n"
+                       for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Derniers profils de requêtes, consultables par identifiant"""
+
+    def __init__(self, capacity=20):
+        self.capacity = capacity
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        profile_id = uuid.uuid4().hex
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
@@ -0,0 +1,91 @@
+"""
+Cache des réponses d'analyse : LRU borné, durée de vie, validé par l'état
+durable de l'assistant qui les a produites
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedResponse:
+    """Corps et en-têtes d'une réponse, avec le validateur de l'assistant à l'origine"""
+
+    __slots__ = ('validator', 'content', 'content_type', 'status', 'etag', 'last_modified',
+                 'stored_at')
+
+    def __init__(self, validator, content, content_type, status, etag, last_modified):
+        self.validator = validator
+        self.content = content
+        self.content_type = content_type
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """Au plus ``max_entries`` réponses, chacune valable ``ttl`` secondes
+
+    Une entrée n'est servie que si le validateur de l'assistant
+    (``FinancialAssistant.validator``) n'a pas changé depuis son calcul : une
+    transaction, un budget, une réinitialisation ou un nouveau modèle l'invalident
+    sans parcours du cache. Adossé au journal, il reste valable quand un tenant
+    évincé est reconstruit, contrairement à ``revision`` qui repart de zéro.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key, validator):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.validator != validator:
+                self.stale += 1
+            elif time.monotonic() - entry.stored_at > self.ttl:
+                self.expired += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'stale': self.stale,
+                'expired': self.expired,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,134 @@
+"""
+Historique à mémoire bornée : rétention des transactions par niveaux
+
+- détail : le registre en mémoire garde au plus ``resident_rows`` transactions ;
+- cumuls : les lignes évincées sont résumées par jour et par catégorie
+  (nombre, revenus, dépenses) ; les cumuls mensuels, par catégorie et les
+  statistiques de ``AggregateStore`` couvrent déjà tout l'historique ;
+- archive : le journal SQLite garde toutes les lignes, relues à la demande
+  (pagination au-delà des lignes résidentes, vérification de cohérence).
+
+Seules les lignes datées de plus de ``min_resident_days`` jours sont évincées,
+les plus petits identifiants d'abord : toute transaction d'identifiant supérieur
+à ``archived_id`` reste résidente, et les périodes récentes (rapport
+hebdomadaire, fenêtres de prévision) restent calculées au détail.
+"""
+
+import numpy as np
+
+from core.ledger import SECONDS_PER_DAY
+from core.metrics import stage
+
+# Valeurs par défaut, surchargées par settings.MONEYWISE_RETENTION
+RETENTION = {
+    # Transactions gardées en mémoire au détail (None : sans limite)
+    'resident_rows': 200_000,
+    # Ancienneté minimale (en jours) d'une transaction évincée
+    'min_resident_days': 31,
+    # Part de ``resident_rows`` libérée en plus à chaque compactage : il n'a
+    # lieu qu'une fois toutes les ``slack * resident_rows`` transactions
+    'slack': 0.1,
+}
+
+
+class DailyRollup:
+    """Nombre, revenus et dépenses par jour et par catégorie des lignes évincées"""
+
+    def __init__(self):
+        # jour (depuis l'epoch) -> {catégorie: [nombre, revenus, dépenses]}
+        self.days = {}
+
+    def merge(self, ledger, selection):
+        """Intègre les lignes ``selection`` du registre en un passage vectorisé"""
+        amounts = ledger.amounts[selection]
+        if not amounts.size:
+            return
+        pool = ledger.category_pool.values
+        width = len(pool)
+        days = ledger.timestamps[selection] // SECONDS_PER_DAY
+        groups, inverse = np.unique(days * width + ledger.category_refs[selection],
+                                    return_inverse=True)
+        counts = np.bincount(inverse)
+        incomes = np.bincount(inverse, weights=np.maximum(amounts, 0))
+        expenses = np.bincount(inverse, weights=np.minimum(amounts, 0))
+        for group, count, income, expense in zip(
+                groups.tolist(), counts.tolist(), incomes.tolist(), expenses.tolist()):
+            day, code = divmod(group, width)
+            totals = self.days.setdefault(day, {}).setdefault(pool[code], [0, 0.0, 0.0])
+            totals[0] += count
+            totals[1] += income
+            totals[2] += expense
+
+    def between(self, first_day, last_day=None):
+        """Jours ``first_day <= jour <= last_day`` présents : ``(jour, {catégorie: cumuls})``"""
+        for day in sorted(self.days):
+            if day >= first_day and (last_day is None or day <= last_day):
+                yield day, self.days[day]
+
+    def __len__(self):
+        return len(self.days)
+
+    def __eq__(self, other):
+        if self.days.keys() != other.days.keys():
+            return False
+        return all(
+            ours.keys() == other.days[day].keys() and all(
+                ours[category][0] == other.days[day][category][0]
+                and np.allclose(ours[category][1:], other.days[day][category][1:])
+                for category in ours)
+            for day, ours in self.days.items())
+
+
+class Retention:
+    """Compactage du registre résident vers les cumuls journaliers et l'archive"""
+
+    def __init__(self, resident_rows=RETENTION['resident_rows'],
+                 min_resident_days=RETENTION['min_resident_days'], slack=RETENTION['slack']):
+        if resident_rows is not None and resident_rows < 1:
+            raise ValueError('Au moins une transaction résidente est nécessaire')
+        if not 0 <= slack < 1:
+            raise ValueError('La marge de compactage doit être comprise entre 0 et 1')
+        self.resident_rows = resident_rows
+        self.min_resident_days = min_resident_days
+        self.slack = slack
+        self.reset()
+
+    def reset(self):
+        self.rollup = DailyRollup()
+        # Plus grand identifiant évincé (None : aucune ligne archivée)
+        self.archived_id = None
+        self.archived_rows = 0
+        self._next_check = 0
+
+    def resident(self, transaction_id):
+        """La transaction ``transaction_id`` est-elle forcément résidente ?"""
+        return self.archived_id is None or transaction_id > self.archived_id
+
+    @stage('retention')
+    def compact(self, ledger, now):
+        """Évince du registre les lignes anciennes au-delà de ``resident_rows``
+
+        Les lignes évincées sont ajoutées aux cumuls journaliers ; retourne leur
+        masque (positions d'avant le compactage), ou ``None`` si rien n'est évincé.
+        Si trop peu de lignes sont assez anciennes, la tentative suivante attend
+        que le registre ait grandi de la marge.
+        """
+        size = len(ledger)
+        if self.resident_rows is None or size <= self.resident_rows or size < self._next_check:
+            return None
+        horizon = (now // SECONDS_PER_DAY - self.min_resident_days) * SECONDS_PER_DAY
+        excess = size - int(self.resident_rows * (1 - self.slack))
+        evicted = np.flatnonzero(ledger.timestamps < horizon)[:excess]
+        self._next_check = (size + max(1, int(self.resident_rows * self.slack))
+                            if evicted.size < excess else 0)
+        if not evicted.size:
+            return None
+
+        self.rollup.merge(ledger, evicted)
+        last = int(ledger.ids[evicted[-1]])
+        self.archived_id = last if self.archived_id is None else max(self.archived_id, last)
+        self.archived_rows += int(evicted.size)
+        mask = np.zeros(size, dtype=bool)
+        mask[evicted] = True
+        ledger.retain(~mask)
+        return mask
@@ -0,0 +1,258 @@
+"""
+Recherche d'hyperparamètres en parallèle : taille de la couche cachée, taux
+d'apprentissage et longueur de fenêtre
+
+Les candidats sont entraînés dans un pool de processus (un par cœur par
+défaut). Les matrices de features, une par longueur de fenêtre, sont
+construites une seule fois dans des blocs de mémoire partagée : chaque worker
+s'y attache par leur nom au lieu d'en recevoir une copie sérialisée. Les
+candidats sont classés sur une période de validation temporelle commune (les
+dernières transactions du registre, jamais vues à l'entraînement), en erreur
+exprimée dans la devise pour que des fenêtres de longueurs différentes restent
+comparables.
+"""
+
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.features import FinancialDataProcessor
+from core.neural import NeuralNetwork
+
+# Valeurs par défaut, surchargées par settings.MONEYWISE_HYPERPARAMETER_SEARCH
+HYPERPARAMETER_SEARCH = {
+    'hidden_sizes': (8, 15, 32),
+    'learning_rates': (0.003, 0.01, 0.03),
+    'windows': (5, 7, 14),
+    'epochs': 200,
+    'holdout': 0.2,
+    'workers': None,
+    'seed': 0,
+}
+
+# Bornes des espaces de recherche acceptés (API et commande)
+MAX_CANDIDATES = 100
+MAX_HIDDEN_SIZE = 256
+MAX_WINDOW = 60
+MAX_EPOCHS = 2000
+
+# Fenêtres de validation minimales pour classer les candidats
+MIN_HOLDOUT_WINDOWS = 10
+
+
+def search_options(config, **overrides):
+    """Options de recherche validées : ``config`` complété par les valeurs non nulles
+    de ``overrides``
+
+    Lève ``ValueError`` si une option est invalide.
+    """
+    options = dict(config, **{name: value for name, value in overrides.items()
+                              if value is not None})
+    unknown = set(options) - set(HYPERPARAMETER_SEARCH)
+    if unknown:
+        raise ValueError(f"Options inconnues : {', '.join(sorted(unknown))}")
+    try:
+        options['hidden_sizes'] = sorted({int(size) for size in options['hidden_sizes']})
+        options['learning_rates'] = sorted({float(rate) for rate in options['learning_rates']})
+        options['windows'] = sorted({int(window) for window in options['windows']})
+        options['epochs'] = int(options['epochs'])
+        options['holdout'] = float(options['holdout'])
+        options['seed'] = int(options['seed'])
+        if options['workers'] is not None:
+            options['workers'] = int(options['workers'])
+    except (TypeError, ValueError):
+        raise ValueError('Options de recherche invalides')
+
+    if not all(0 < size <= MAX_HIDDEN_SIZE for size in options['hidden_sizes']):
+        raise ValueError(f'Tailles de couche cachée attendues entre 1 et {MAX_HIDDEN_SIZE}')
+    if not all(0 < rate < 1 for rate in options['learning_rates']):
+        raise ValueError("Taux d'apprentissage attendus entre 0 et 1")
+    if not all(2 <= window <= MAX_WINDOW for window in options['windows']):
+        raise ValueError(f'Longueurs de fenêtre attendues entre 2 et {MAX_WINDOW}')
+    if not 0 < options['holdout'] < 1:
+        raise ValueError('La part de validation doit être comprise entre 0 et 1')
+    if not 0 < options['epochs'] <= MAX_EPOCHS:
+        raise ValueError(f"Nombre d'époques attendu entre 1 et {MAX_EPOCHS}")
+    if options['workers'] is not None and options['workers'] < 1:
+        raise ValueError('Au moins un worker est nécessaire')
+    count = len(candidates(options))
+    if not count:
+        raise ValueError('Espace de recherche vide')
+    if count > MAX_CANDIDATES:
+        raise ValueError(f'{count} candidats : au plus {MAX_CANDIDATES}')
+    return options
+
+
+def candidates(options):
+    """Combinaisons à évaluer, les plus coûteuses en premier (équilibrage du pool)"""
+    grid = itertools.product(options['windows'], options['hidden_sizes'],
+                             options['learning_rates'])
+    combinations = [{'window': window, 'hidden_size': hidden_size, 'learning_rate': rate}
+                    for window, hidden_size, rate in grid]
+    return sorted(combinations, key=lambda candidate: -(
+        candidate['window'] + FinancialDataProcessor.EXTRA_FEATURES) * candidate['hidden_size'])
+
+
+class SharedArrays:
+    """Tableaux NumPy copiés dans des blocs de mémoire partagée, libérés à la sortie du ``with``
+
+    ``descriptors[nom]`` (nom du bloc, forme, type) suffit à un autre processus
+    pour s'y attacher (``attach``).
+    """
+
+    def __init__(self):
+        self.descriptors = {}
+        self._blocks = []
+
+    def add(self, name, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self._blocks.append(block)
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        self.descriptors[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def attach(descriptor):
+    """Bloc partagé et vue NumPy en lecture seule (fermer le bloc après usage de la vue)"""
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype, buffer=block.buf)
+    array.flags.writeable = False
+    return block, array
+
+
+def fit_candidate(candidate, descriptors, train_rows, epochs, seed):
+    """Entraîne un candidat dans un worker : ``train_rows`` premières fenêtres pour
+    l'entraînement, les suivantes pour la validation (aucune si ``None``)
+
+    Retourne le candidat, ses scores et les poids du réseau.
+    """
+    window = candidate['window']
+    blocks = []
+    try:
+        arrays = {}
+        for part in ('X', 'y', 'scales'):
+            block, arrays[part] = attach(descriptors[f'{part}{window}'])
+            blocks.append(block)
+        result = _fit(candidate, arrays, train_rows, epochs, seed)
+        # Les vues doivent disparaître avant la fermeture des blocs
+        arrays.clear()
+        return result
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _fit(candidate, arrays, train_rows, epochs, seed):
+    started = time.perf_counter()
+    X, y, scales = arrays['X'], arrays['y'], arrays['scales']
+    train_rows = len(X) if train_rows is None else train_rows
+    np.random.seed(seed)
+    network = NeuralNetwork(input_size=X.shape[1], hidden_size=candidate['hidden_size'],
+                            learning_rate=candidate['learning_rate'])
+    run = network.train(X[:train_rows], y[:train_rows], epochs=epochs, seed=seed)
+
+    result = dict(candidate, epochs=run['epochs'], val_loss=run['val_loss'])
+    if train_rows < len(X):
+        # Erreurs ramenées dans la devise : comparables entre longueurs de fenêtre
+        errors = (network.predict(X[train_rows:])[:, 0] - y[train_rows:]) * scales[train_rows:]
+        result['holdout_rmse'] = float(np.sqrt(np.mean(errors ** 2)))
+        result['holdout_mae'] = float(np.mean(np.abs(errors)))
+    result['duration'] = time.perf_counter() - started
+    result['pid'] = os.getpid()
+    result['state'] = network.get_state()
+    return result
+
+
+def share_features(shared, ledger, windows):
+    """Copie dans ``shared`` les features, cibles normalisées et échelles de chaque
+    longueur de fenêtre, et retourne le nombre de transactions lues
+
+    La ligne ``i`` de la fenêtre ``w`` prédit la transaction à la position ``i + w``.
+    """
+    size = len(ledger)
+    amounts = ledger.amounts[:size]
+    columns = (ledger.days_of_week[:size - 1], ledger.months[:size - 1],
+               ledger.category_codes[:size - 1])
+    for window in windows:
+        features, scales = FinancialDataProcessor.window_features(
+            amounts[:-1], *columns, window=window)
+        shared.add(f'X{window}', features)
+        shared.add(f'y{window}', amounts[window:] / scales)
+        shared.add(f'scales{window}', scales)
+    return size
+
+
+def run_search(shared, size, options, progress=None):
+    """Évalue tous les candidats en parallèle puis ré-entraîne le meilleur sur
+    toutes les fenêtres
+
+    ``shared`` contient les features d'un registre de ``size`` transactions
+    (``share_features``). La validation porte sur les mêmes transactions (les
+    ``holdout`` dernières) quelle que soit la longueur de fenêtre.
+    ``progress(done, total, best)`` est appelé à chaque candidat terminé.
+    Retourne ``(réseau, rapport)``, ou ``None`` si le registre est trop court.
+    """
+    longest = max(options['windows'])
+    holdout = int((size - longest) * options['holdout'])
+    if holdout < MIN_HOLDOUT_WINDOWS or size - holdout - longest < 20:
+        return None
+    cutoff = size - holdout
+    grid = candidates(options)
+    workers = min(options['workers'] or os.cpu_count() or 1, len(grid))
+    started = time.perf_counter()
+
+    # spawn : les workers n'héritent ni des threads ni des verrous du serveur
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(fit_candidate, candidate, shared.descriptors,
+                        cutoff - candidate['window'], options['epochs'], options['seed'])
+            for candidate in grid
+        ]
+        results = []
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress is not None:
+                best = min(result['holdout_rmse'] for result in results)
+                progress(len(results) - 1, len(grid), best)
+        results.sort(key=lambda result: result['holdout_rmse'])
+        best = results[0]
+        search_seconds = time.perf_counter() - started
+
+        # Le meilleur candidat est ré-entraîné sur tout l'historique, validation comprise
+        final = pool.submit(
+            fit_candidate, {name: best[name] for name in ('window', 'hidden_size', 'learning_rate')},
+            shared.descriptors, None, options['epochs'], options['seed']).result()
+
+    network = NeuralNetwork.from_state(final.pop('state'), best['learning_rate'])
+    for result in results:
+        del result['state']
+    report = {
+        'rows': size,
+        'holdout_rows': holdout,
+        'candidates': results,
+        'best': {name: best[name] for name in (
+            'window', 'hidden_size', 'learning_rate', 'holdout_rmse', 'holdout_mae')},
+        'workers': workers,
+        'processes': len({result['pid'] for result in results}),
+        'search_seconds': search_seconds,
+        'candidate_seconds': sum(result['duration'] for result in results),
+        'refit': {name: final[name] for name in ('epochs', 'val_loss', 'duration')},
+        'duration': time.perf_counter() - started,
+    }
+    return network, report
@@ -0,0 +1,192 @@
+"""
+Formats de réponse des API lourdes : JSON par enregistrements (historique), JSON
+en colonnes, MessagePack et Arrow IPC, choisis par négociation de contenu
+
+Les formats en colonnes transmettent un tableau par champ au lieu de répéter
+les noms de champs à chaque ligne. Le JSON passe par un encodeur
+interchangeable (MONEYWISE_JSON_BACKEND) : ``orjson`` s'il est installé, la
+bibliothèque standard sinon, ou toute fonction ``données -> octets`` désignée
+par son chemin. MessagePack (``msgpack``) et Arrow (``pyarrow``) sont
+optionnels : un format dont la bibliothèque manque est seulement indisponible.
+"""
+
+import json
+
+import numpy as np
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+# Nom du format -> type de média
+FORMATS = {
+    'json': 'application/json',
+    'columns': 'application/vnd.moneywise.columns+json',
+    'msgpack': 'application/msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Types de média reconnus dans l'en-tête Accept
+MEDIA_TYPES = dict({media_type: name for name, media_type in FORMATS.items()}, **{
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.msgpack': 'msgpack',
+})
+
+# Bibliothèque optionnelle requise par format
+REQUIREMENTS = {'msgpack': msgpack, 'arrow': pyarrow}
+
+
+def available(name):
+    """Le format ``name`` est-il utilisable (bibliothèque installée) ?"""
+    return REQUIREMENTS.get(name, True) is not None
+
+
+def negotiate(requested, accept, formats, default='json'):
+    """Format de la réponse parmi ``formats``
+
+    ``requested`` (paramètre ``format``) l'emporte sur l'en-tête ``accept``, lu
+    par ordre de préférence (``q``) en ignorant les formats indisponibles ; sans
+    type reconnu, ``default``. Lève ``ValueError`` si ``requested`` n'est pas
+    l'un des ``formats``.
+    """
+    if requested:
+        if requested not in formats:
+            raise ValueError(f"Format inconnu : {requested} (attendu : {', '.join(formats)})")
+        return requested
+    preferences = []
+    for order, part in enumerate(accept.split(',')):
+        media_type, *params = (item.strip() for item in part.split(';'))
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        name = MEDIA_TYPES.get(media_type.lower())
+        if name in formats and available(name) and quality > 0:
+            preferences.append((-quality, order, name))
+    return min(preferences)[2] if preferences else default
+
+
+def _default(value):
+    """Types NumPy pour l'encodeur de la bibliothèque standard"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Type non sérialisable : {type(value).__name__}')
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, default=_default, ensure_ascii=False,
+                      separators=(',', ':')).encode()
+
+
+def orjson_dumps(data):
+    return orjson.dumps(data, default=_default,
+                        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+JSON_BACKENDS = {'json': stdlib_dumps, 'orjson': orjson_dumps}
+
+
+def json_backend(name='auto'):
+    """Fonction ``données -> octets`` du backend ``name`` : ``json``, ``orjson``,
+    ``auto`` (orjson s'il est installé) ou chemin d'une fonction
+
+    Lève ``ValueError`` si le backend est inconnu ou indisponible.
+    """
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    if name == 'orjson' and orjson is None:
+        raise ValueError("Backend JSON orjson indisponible : pip install orjson")
+    if name in JSON_BACKENDS:
+        return JSON_BACKENDS[name]
+    try:
+        return import_string(name)
+    except ImportError:
+        raise ValueError(f'Backend JSON inconnu : {name}')
+
+
+def _plain(columns):
+    """Colonnes de chaînes converties en listes (orjson ne sérialise que les
+    tableaux NumPy numériques et booléens)"""
+    return {name: values.tolist() if values.dtype.kind in 'OU' else values
+            for name, values in columns.items()}
+
+
+def encode_columns(name, columns, meta, dumps):
+    """Corps d'une page ``meta`` + ``columns`` (tableaux NumPy de même longueur)
+    au format ``name`` (``columns``, ``msgpack`` ou ``arrow``)"""
+    if name == 'columns':
+        return dumps(dict(meta, columns=_plain(columns)))
+    if name == 'msgpack':
+        return msgpack.packb(dict(meta, columns={
+            field: values.tolist() for field, values in columns.items()}))
+    if name == 'arrow':
+        return b''.join(arrow_stream([columns], meta))
+    raise ValueError(f'Format non colonnaire : {name}')
+
+
+def _arrow_batch(columns, schema=None):
+    arrays = [pyarrow.array(values, type=pyarrow.string() if values.dtype.kind in 'OU' else None)
+              for values in columns.values()]
+    if schema is not None:
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+    return pyarrow.RecordBatch.from_arrays(arrays, names=list(columns))
+
+
+class _Chunks:
+    """Sortie fichier de pyarrow dont les octets écrits sont relus au fil de l'eau"""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def arrow_stream(batches, meta=None):
+    """Flux Arrow IPC (octets, lot par lot) des colonnes de ``batches``
+
+    Le premier lot, éventuellement vide, fixe le schéma ; ``meta`` est joint au
+    schéma (valeurs JSON).
+    """
+    batches = iter(batches)
+    first = _arrow_batch(next(batches))
+    schema = first.schema.with_metadata({
+        key: json.dumps(value) for key, value in (meta or {}).items()})
+    sink = _Chunks()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(first.replace_schema_metadata(schema.metadata))
+        yield sink.take()
+        for columns in batches:
+            writer.write_batch(_arrow_batch(columns, schema))
+            yield sink.take()
+    yield sink.take()
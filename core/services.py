@@ -0,0 +1,182 @@
+"""
+Accès paresseux aux assistants financiers, un par tenant
+
+Le registre des tenants (NumPy, journal, modèles) n'est construit qu'au
+premier appel de ``get_assistant()`` : le chargement des settings, les
+commandes ``manage.py`` et le démarrage des workers n'en paient pas le coût.
+"""
+
+import threading
+
+from django.conf import settings
+
+from core.metrics import REGISTRY
+from core.tenants import DEFAULT_TENANT
+
+_registry = None
+_executor = None
+_response_cache = None
+_profile_store = None
+_event_hub = None
+_json_dumps = None
+_lock = threading.Lock()
+
+
+def build_registry():
+    """Construit le registre des tenants à partir de la configuration MONEYWISE_*
+
+    Le journal SQLite et la file d'entraînement sont partagés par tous les tenants.
+    """
+    from core.assistant import FinancialAssistant
+    from core.storage import TransactionStore
+    from core.tenants import TenantRegistry
+    from core.training import TrainingQueue
+
+    store = TransactionStore(settings.MONEYWISE_STORE_PATH)
+    training_queue = TrainingQueue(settings.MONEYWISE_TRAINING_ASYNC)
+
+    def build_assistant(tenant):
+        return FinancialAssistant(
+            store=store,
+            checkpoint_dir=settings.MONEYWISE_CHECKPOINT_DIR,
+            tenant=tenant,
+            training_queue=training_queue,
+            checkpoint_keep=settings.MONEYWISE_CHECKPOINT_KEEP,
+            incremental_training=settings.MONEYWISE_INCREMENTAL_TRAINING,
+            hyperparameter_search=settings.MONEYWISE_HYPERPARAMETER_SEARCH,
+            events=get_event_hub().feed(tenant),
+            budget_alerts=settings.MONEYWISE_BUDGET_ALERTS,
+            retention=settings.MONEYWISE_RETENTION,
+        )
+
+    return TenantRegistry(build_assistant, capacity=settings.MONEYWISE_TENANT_CAPACITY)
+
+
+def get_registry():
+    """Retourne le registre du processus, construit au premier appel"""
+    global _registry
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                _registry = build_registry()
+    return _registry
+
+
+def get_assistant(tenant=DEFAULT_TENANT):
+    """Retourne l'assistant du tenant, rechargé depuis le stockage s'il a été évincé
+    et à jour des écritures des autres processus"""
+    assistant = get_registry().get(tenant)
+    assistant.refresh()
+    return assistant
+
+
+def get_executor():
+    """Pool de threads borné des vues asynchrones : le calcul (NumPy, modèle,
+    agrégats) s'y exécute pour ne pas bloquer la boucle d'événements"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.MONEYWISE_ASYNC_WORKERS,
+                    thread_name_prefix='moneywise-compute')
+    return _executor
+
+
+def get_response_cache():
+    """Cache des réponses d'analyse du processus (MONEYWISE_RESPONSE_CACHE)"""
+    global _response_cache
+    if _response_cache is None:
+        with _lock:
+            if _response_cache is None:
+                from core.responses import ResponseCache
+
+                _response_cache = ResponseCache(**settings.MONEYWISE_RESPONSE_CACHE)
+    return _response_cache
+
+
+def get_profile_store():
+    """Derniers profils de requêtes (MONEYWISE_PROFILING)"""
+    global _profile_store
+    if _profile_store is None:
+        with _lock:
+            if _profile_store is None:
+                from core.profiling import ProfileStore
+
+                _profile_store = ProfileStore()
+    return _profile_store
+
+
+def get_event_hub():
+    """Flux d'événements par tenant (MONEYWISE_EVENT_STREAM), conservés à travers
+    les évictions des assistants"""
+    global _event_hub
+    if _event_hub is None:
+        with _lock:
+            if _event_hub is None:
+                from core.events import EventHub
+
+                _event_hub = EventHub(settings.MONEYWISE_EVENT_STREAM['history'])
+    return _event_hub
+
+
+def get_json_dumps():
+    """Encodeur JSON ``données -> octets`` des API lourdes (MONEYWISE_JSON_BACKEND)"""
+    global _json_dumps
+    if _json_dumps is None:
+        from core.serialization import json_backend
+
+        _json_dumps = json_backend(settings.MONEYWISE_JSON_BACKEND)
+    return _json_dumps
+
+
+def tenant_from_request(request):
+    """Tenant de la requête : en-tête ``X-Tenant-ID``, paramètre ``tenant``
+    ou tenant par défaut
+
+    Lève ``ValueError`` si l'identifiant est invalide.
+    """
+    from core.tenants import validate_tenant
+
+    return validate_tenant(
+        request.headers.get(settings.MONEYWISE_TENANT_HEADER) or request.GET.get('tenant'))
+
+
+@REGISTRY.collector
+def collect_metrics():
+    """Métriques lues à l'export : tenants résidents, registres, caches, entraînements
+
+    Les singletons qui n'ont pas encore été construits ne le sont pas pour l'occasion.
+    """
+    if _response_cache is not None:
+        stats = _response_cache.stats()
+        yield ('moneywise_response_cache_lookups_total', 'counter',
+               "Consultations du cache des réponses d'analyse",
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+        yield ('moneywise_response_cache_invalidations_total', 'counter',
+               "Entrées écartées du cache des réponses (validateur, durée de vie, capacité)",
+               [({'reason': 'stale'}, stats['stale']), ({'reason': 'expired'}, stats['expired']),
+                ({'reason': 'evicted'}, stats['evictions'])])
+        yield ('moneywise_response_cache_entries', 'gauge',
+               'Réponses en cache', [({}, stats['entries'])])
+    if _registry is not None:
+        stats = _registry.stats()
+        yield ('moneywise_tenant_lookups_total', 'counter',
+               'Accès au registre des tenants (miss : reconstruction depuis le disque)',
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+        yield ('moneywise_tenant_evictions_total', 'counter',
+               'Tenants évincés de la mémoire', [({}, stats['evictions'])])
+        yield ('moneywise_tenants_resident', 'gauge',
+               'Tenants résidents en mémoire', [({}, stats['resident'])])
+        assistants = _registry.assistants()
+        yield ('moneywise_ledger_rows', 'gauge',
+               'Transactions en mémoire, tous tenants résidents confondus',
+               [({}, sum(len(assistant.transactions) for assistant in assistants))])
+        yield ('moneywise_ledger_archived_rows', 'gauge',
+               'Transactions évincées de la mémoire, tous tenants résidents confondus',
+               [({}, sum(assistant.retention.archived_rows for assistant in assistants))])
+        if assistants:
+            yield ('moneywise_training_queue_depth', 'gauge',
+                   "Entraînements en attente", [({}, assistants[0].training_queue.pending())])
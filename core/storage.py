@@ -0,0 +1,249 @@
+"""
+Stockage durable des transactions : journal append-only dans SQLite (mode WAL)
+"""
+
+import sqlite3
+import threading
+
+import numpy as np
+
+from core.metrics import stage
+from core.tenants import DEFAULT_TENANT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS moneywise_transaction (
+    id INTEGER PRIMARY KEY,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    category_encoded INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    tenant TEXT NOT NULL DEFAULT 'default'
+);
+-- Dernier identifiant attribué (tous tenants confondus) au dernier effacement
+-- de chaque tenant : les identifiants effacés ne sont jamais réattribués
+CREATE TABLE IF NOT EXISTS moneywise_reset (
+    tenant TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moneywise_budget (
+    tenant TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (tenant, category)
+);
+"""
+
+# Créé après la migration éventuelle de la colonne ``tenant``
+INDEXES = """
+CREATE INDEX IF NOT EXISTS moneywise_transaction_tenant ON moneywise_transaction (tenant, id);
+"""
+
+COLUMNS = 'id, amount, category, category_encoded, description, timestamp'
+
+# Identifiant suivant : au-delà de toute ligne présente ou effacée
+NEXT_ID = ('MAX(COALESCE((SELECT MAX(id) FROM moneywise_transaction), -1), '
+           'COALESCE((SELECT MAX(last_id) FROM moneywise_reset), -1)) + 1')
+
+
+class TransactionStore:
+    """Journal des transactions de tous les tenants : une insertion écrit une seule ligne
+
+    Les identifiants sont uniques et croissants sur l'ensemble du journal, et
+    jamais réattribués après un effacement ; chaque lecture est restreinte à un tenant.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._migrate()
+        self._connection.executescript(INDEXES)
+        self._connection.commit()
+
+    def _migrate(self):
+        """Ajoute la colonne ``tenant`` aux journaux créés avant le multi-tenant"""
+        columns = {row[1] for row in self._connection.execute(
+            'PRAGMA table_info(moneywise_transaction)')}
+        if 'tenant' not in columns:
+            self._connection.execute(
+                'ALTER TABLE moneywise_transaction '
+                f"ADD COLUMN tenant TEXT NOT NULL DEFAULT '{DEFAULT_TENANT}'")
+
+    @stage('persistence')
+    def append(self, amount, category, category_encoded, description, timestamp,
+               tenant=DEFAULT_TENANT):
+        """Ajoute une transaction et retourne l'identifiant attribué"""
+        with self._lock:
+            cursor = self._connection.execute(
+                f'INSERT INTO moneywise_transaction ({COLUMNS}, tenant) '
+                f'SELECT {NEXT_ID}, ?, ?, ?, ?, ?, ?',
+                (float(amount), category, int(category_encoded), description, int(timestamp),
+                 tenant),
+            )
+            self._connection.commit()
+            return cursor.lastrowid
+
+    @stage('persistence')
+    def append_many(self, rows, tenant=DEFAULT_TENANT):
+        """Ajoute des lignes ``(id, amount, category, category_encoded, description, timestamp)``
+        dans une seule transaction SQLite"""
+        with self._lock:
+            self._connection.executemany(
+                f'INSERT INTO moneywise_transaction ({COLUMNS}, tenant) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((*row, tenant) for row in rows),
+            )
+            self._connection.commit()
+
+    @stage('persistence')
+    def append_batch(self, rows, tenant=DEFAULT_TENANT):
+        """Ajoute des lignes ``(amount, category, category_encoded, description, timestamp)``
+        en une transaction et retourne le premier identifiant attribué (les suivants
+        sont consécutifs)"""
+        with self._lock:
+            # Verrou d'écriture SQLite pris avant de lire MAX(id) : aucun autre
+            # processus ne peut s'intercaler entre l'attribution et l'insertion
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                first = self._connection.execute(
+                    f'SELECT {NEXT_ID}').fetchone()[0]
+                self._connection.executemany(
+                    f'INSERT INTO moneywise_transaction ({COLUMNS}, tenant) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    ((first + offset, *row, tenant) for offset, row in enumerate(rows)),
+                )
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+            return first
+
+    def load_columns(self, after_id=-1, tenant=DEFAULT_TENANT, limit=None, max_id=None):
+        """Relit les transactions d'identifiant > ``after_id`` (et <= ``max_id``, au
+        plus ``limit``), colonne par colonne"""
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT {COLUMNS} FROM moneywise_transaction '
+                'WHERE tenant = ? AND id > ? AND id <= ? ORDER BY id LIMIT ?',
+                (tenant, after_id, (1 << 63) - 1 if max_id is None else max_id,
+                 -1 if limit is None else limit),
+            ).fetchall()
+        return _columns(rows)
+
+    @stage('archive')
+    def select(self, limit, tenant=DEFAULT_TENANT, after_id=None, descending=False,
+               category=None, start=None, end=None, sign=None, max_id=None):
+        """Page de transactions lue dans le journal, mêmes critères que
+        ``TransactionLedger.select`` (``max_id`` : identifiant maximal considéré)
+
+        Retourne ``(colonnes ou None, has_more)``.
+        """
+        clauses, parameters = ['tenant = ?'], [tenant]
+        if after_id is not None:
+            clauses.append('id < ?' if descending else 'id > ?')
+            parameters.append(after_id)
+        if max_id is not None:
+            clauses.append('id <= ?')
+            parameters.append(max_id)
+        if category is not None:
+            clauses.append('category = ?')
+            parameters.append(category)
+        if start is not None:
+            clauses.append('timestamp >= ?')
+            parameters.append(start)
+        if end is not None:
+            clauses.append('timestamp < ?')
+            parameters.append(end)
+        if sign == 'income':
+            clauses.append('amount > 0')
+        elif sign == 'expense':
+            clauses.append('amount < 0')
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {COLUMNS} FROM moneywise_transaction WHERE {' AND '.join(clauses)} "
+                f"ORDER BY id {'DESC' if descending else 'ASC'} LIMIT ?",
+                (*parameters, limit + 1),
+            ).fetchall()
+        return _columns(rows[:limit]), len(rows) > limit
+
+    def scan(self, tenant=DEFAULT_TENANT, max_id=None, chunk_size=50000):
+        """Parcourt le journal d'un tenant par blocs de colonnes, dans l'ordre des identifiants"""
+        after_id = -1
+        while (columns := self.load_columns(after_id, tenant, chunk_size, max_id)) is not None:
+            yield columns
+            after_id = int(columns['ids'][-1])
+
+    def count(self, tenant=DEFAULT_TENANT):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM moneywise_transaction WHERE tenant = ?',
+                (tenant,)).fetchone()[0]
+
+    def journal_state(self, tenant=DEFAULT_TENANT):
+        """``(dernier identifiant, marqueur du dernier effacement)`` du tenant, ``None``
+        pour chaque valeur absente : deux recherches d'index, assez peu coûteuses
+        pour détecter avant chaque lecture les écritures des autres processus"""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT (SELECT MAX(id) FROM moneywise_transaction WHERE tenant = ?), '
+                '(SELECT last_id FROM moneywise_reset WHERE tenant = ?)',
+                (tenant, tenant)).fetchone()
+
+    def clear(self, tenant=DEFAULT_TENANT):
+        """Efface les transactions du tenant et retourne le marqueur d'effacement"""
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                marker = self._connection.execute(f'SELECT {NEXT_ID} - 1').fetchone()[0]
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO moneywise_reset (tenant, last_id) VALUES (?, ?)',
+                    (tenant, marker))
+                self._connection.execute(
+                    'DELETE FROM moneywise_transaction WHERE tenant = ?', (tenant,))
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+            return marker
+
+    def tenants(self):
+        """Tenants ayant au moins une transaction ou un budget enregistré"""
+        with self._lock:
+            return [row[0] for row in self._connection.execute(
+                'SELECT tenant FROM moneywise_transaction UNION '
+                'SELECT tenant FROM moneywise_budget ORDER BY tenant')]
+
+    def load_budgets(self, tenant=DEFAULT_TENANT):
+        with self._lock:
+            return dict(self._connection.execute(
+                'SELECT category, amount FROM moneywise_budget WHERE tenant = ?', (tenant,)))
+
+    @stage('persistence')
+    def save_budget(self, category, amount, tenant=DEFAULT_TENANT):
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO moneywise_budget (tenant, category, amount) '
+                'VALUES (?, ?, ?)', (tenant, category, float(amount)))
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _columns(rows):
+    """Lignes ``COLUMNS`` converties en colonnes (``None`` si aucune ligne)"""
+    if not rows:
+        return None
+    ids, amounts, categories, codes, descriptions, timestamps = zip(*rows)
+    return {
+        'ids': np.array(ids, dtype=np.int64),
+        'amounts': np.array(amounts, dtype=np.float64),
+        'categories': categories,
+        'category_codes': np.array(codes, dtype=np.int8),
+        'descriptions': descriptions,
+        'timestamps': np.array(timestamps, dtype=np.int64),
+    }
@@ -0,0 +1,114 @@
+"""
+Registre des assistants par tenant : état en mémoire limité aux tenants actifs
+
+Chaque tenant a son registre, ses budgets et son modèle. Les transactions et
+les budgets sont persistés dans le journal SQLite partagé, le modèle dans ses
+points de sauvegarde : évincer un tenant froid ne fait que libérer sa mémoire,
+il est reconstruit depuis le disque au prochain accès.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+# Tenant des requêtes sans identifiant (et des journaux antérieurs au multi-tenant)
+DEFAULT_TENANT = 'default'
+
+TENANT_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def validate_tenant(tenant):
+    """Retourne l'identifiant de tenant, ou lève ``ValueError`` s'il est invalide"""
+    if not tenant:
+        return DEFAULT_TENANT
+    if not TENANT_PATTERN.match(tenant):
+        raise ValueError(f'Tenant non valide : {tenant}')
+    return tenant
+
+
+class TenantRegistry:
+    """Cache LRU des assistants : au plus ``capacity`` tenants résidents
+
+    ``factory(tenant)`` construit l'assistant d'un tenant (rechargement
+    paresseux depuis le stockage). Un tenant dont un entraînement est en cours
+    n'est pas évincé : son nouveau modèle serait sauvegardé après la
+    reconstruction et ignoré par celle-ci.
+    """
+
+    def __init__(self, factory, capacity=100):
+        self.factory = factory
+        self.capacity = max(1, capacity)
+        self._assistants = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant=DEFAULT_TENANT):
+        """Assistant du tenant, reconstruit depuis le stockage s'il a été évincé"""
+        tenant = validate_tenant(tenant)
+        with self._lock:
+            assistant = self._assistants.get(tenant)
+            if assistant is not None:
+                self._assistants.move_to_end(tenant)
+                self.hits += 1
+                return assistant
+            # Un verrou par tenant : deux requêtes concurrentes ne le chargent qu'une fois
+            building = self._building.setdefault(tenant, threading.Lock())
+
+        with building:
+            with self._lock:
+                assistant = self._assistants.get(tenant)
+                if assistant is not None:
+                    self.hits += 1
+                    return assistant
+            assistant = self.factory(tenant)
+            with self._lock:
+                self.misses += 1
+                self._assistants[tenant] = assistant
+                self._building.pop(tenant, None)
+                self._evict()
+        return assistant
+
+    def peek(self, tenant):
+        """Assistant du tenant s'il est résident, sans le reconstruire"""
+        with self._lock:
+            assistant = self._assistants.get(tenant)
+            if assistant is not None:
+                self._assistants.move_to_end(tenant)
+            return assistant
+
+    def _evict(self):
+        for tenant in list(self._assistants):
+            if len(self._assistants) <= self.capacity:
+                return
+            assistant = self._assistants[tenant]
+            if assistant.training_queue.busy(assistant):
+                continue
+            del self._assistants[tenant]
+            self.evictions += 1
+
+    def evict(self, tenant):
+        """Libère l'état en mémoire d'un tenant (rechargé au prochain accès)"""
+        with self._lock:
+            return self._assistants.pop(tenant, None) is not None
+
+    def resident(self):
+        with self._lock:
+            return list(self._assistants)
+
+    def assistants(self):
+        """Assistants résidents, sans modifier l'ordre d'éviction"""
+        with self._lock:
+            return list(self._assistants.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'resident': len(self._assistants),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
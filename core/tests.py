@@ -1,3 +1,894 @@
-from django.test import TestCase
+"""
+Tests de l'assistant financier, adossé à un journal et des points de sauvegarde temporaires
+"""
 
-# Create your tests here.
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+import numpy as np
+from django.test import Client, TestCase, override_settings
+
+from core import serialization, services
+from core.aggregates import AggregateStore
+from core.alerts import BudgetAlerts
+from core.assistant import FinancialAssistant
+from core.dates import DATE_FORMAT, SECONDS_PER_DAY, from_timestamp, to_timestamp
+from core.forecasting import network_weights, recursive_forecast, stack_weights
+from core.ledger import TransactionLedger
+from core.neural import NeuralNetwork
+from core.storage import TransactionStore
+from core.tenants import TenantRegistry
+from core.training import TrainingQueue
+
+# Tenant distinct du tenant par défaut : pas de reprise du cache Django
+TENANT = 'tests'
+CATEGORIES = ('loyer', 'nourriture', 'transport', 'loisirs', 'sante', 'education', 'shopping', 'autres')
+
+
+def history(count, days=120, seed=0):
+    """Lignes ``(amount, category, category_encoded, description, timestamp)`` réparties
+    sur les ``days`` derniers jours, dans l'ordre chronologique"""
+    rng = np.random.default_rng(seed)
+    end = to_timestamp(datetime.now())
+    timestamps = np.sort(rng.integers(end - days * SECONDS_PER_DAY, end, count))
+    codes = rng.integers(0, len(CATEGORIES), count)
+    amounts = np.round(np.where(rng.random(count) < 0.2, rng.uniform(100, 3000, count),
+                                -rng.uniform(1, 300, count)), 2)
+    return [(float(amount), CATEGORIES[code], int(code), f'ligne {index}', int(timestamp))
+            for index, (amount, code, timestamp) in enumerate(zip(amounts, codes, timestamps))]
+
+
+def wait_until(condition, timeout=5):
+    """Attend que ``condition()`` soit vraie ; faux si ``timeout`` secondes s'écoulent"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def run_threads(targets, timeout=60):
+    """Lance un thread par cible, attend leur fin et remonte la première erreur"""
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except Exception as exc:  # remonté après le join
+            errors.append(exc)
+
+    threads = [threading.Thread(target=guarded, args=(target,), daemon=True) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout)
+    if errors:
+        raise errors[0]
+    return [thread.is_alive() for thread in threads]
+
+
+class AssistantTestCase(TestCase):
+    """Journal SQLite et points de sauvegarde dans un répertoire temporaire"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.store = self.open_store()
+        # Bilans d'entraînement (INFO) hors de la sortie des tests ; les erreurs restent
+        training_log = logging.getLogger('moneywise.training')
+        self.addCleanup(training_log.setLevel, training_log.level)
+        training_log.setLevel(logging.WARNING)
+
+    def open_store(self):
+        """Connexion au journal de test (une par « processus »)"""
+        store = TransactionStore(os.path.join(self.directory, 'journal.sqlite3'))
+        self.addCleanup(store.close)
+        return store
+
+    def build(self, store=None, asynchronous=False, tenant=TENANT, **options):
+        return FinancialAssistant(
+            store or self.store, os.path.join(self.directory, 'checkpoints'), tenant=tenant,
+            training_queue=TrainingQueue(asynchronous=asynchronous), **options)
+
+
+class ApiTestCase(AssistantTestCase):
+    """Vues servies par des singletons (``core.services``) propres au test, adossés
+    au même journal que ``self.store``"""
+
+    def setUp(self):
+        super().setUp()
+        overrides = override_settings(
+            MONEYWISE_STORE_PATH=os.path.join(self.directory, 'journal.sqlite3'),
+            MONEYWISE_CHECKPOINT_DIR=os.path.join(self.directory, 'checkpoints'),
+            MONEYWISE_TRAINING_ASYNC=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        singletons = mock.patch.multiple(
+            services, _registry=None, _response_cache=None, _event_hub=None)
+        singletons.start()
+        self.addCleanup(singletons.stop)
+        self.addCleanup(self.close_registry)
+        self.client = Client(headers={'X-Tenant-ID': TENANT})
+
+    def close_registry(self):
+        if services._registry is not None:
+            for assistant in services._registry.assistants():
+                assistant.store.close()
+
+    def add(self, amount, category='nourriture', tenant=TENANT, **fields):
+        response = self.client.post(
+            '/api/transaction/add', dict(fields, amount=amount, category=category),
+            content_type='application/json', headers={'X-Tenant-ID': tenant})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['transaction']
+
+
+class ConcurrencyTests(AssistantTestCase):
+    """Écritures, lectures et entraînements concurrents sur un même assistant"""
+
+    WRITERS = 6
+    INSERTS = 40
+    READERS = 4
+
+    def test_concurrent_writes_and_reads(self):
+        self.store.append_batch(history(500), tenant=TENANT)
+        assistant = self.build(asynchronous=True)
+        stop = threading.Event()
+        reads = []
+        seen = [0] * self.READERS
+
+        def write(index):
+            for i in range(self.INSERTS):
+                assistant.add_transaction(-float(i % 50 + 1), CATEGORIES[i % 8], f'w{index}-{i}')
+
+        def read(index):
+            while not stop.is_set():
+                kind = len(reads) % 4
+                if kind == 0:
+                    # Cumuls par catégorie et total lus à la même révision
+                    analysis = assistant.get_spending_analysis()
+                    self.assertAlmostEqual(
+                        sum(entry['amount'] for entry in analysis['by_category'].values()),
+                        -analysis['total_spent'], places=6)
+                elif kind == 1:
+                    assistant.get_weekly_report()
+                elif kind == 2:
+                    page, _ = assistant.select_transactions(50, descending=True)
+                    ids = [transaction['id'] for transaction in page]
+                    self.assertEqual(ids, sorted(ids, reverse=True))
+                else:
+                    # Sections lues à la même révision : le solde compte au moins
+                    # les transactions déjà vues par ce lecteur
+                    count = assistant.get_dashboard()['balance']['transactions_count']
+                    self.assertGreaterEqual(count, seen[index])
+                    seen[index] = count
+                reads.append(index)
+
+        failures = []
+
+        def read_all():
+            try:
+                run_threads([lambda index=index: read(index) for index in range(self.READERS)])
+            except Exception as exc:  # remonté par le thread principal
+                failures.append(exc)
+
+        readers = threading.Thread(target=read_all, daemon=True)
+        readers.start()
+        # Les écritures commencent une fois tous les lecteurs actifs
+        self.assertTrue(wait_until(lambda: len(reads) >= self.READERS), failures)
+        try:
+            alive = run_threads([lambda index=index: write(index) for index in range(self.WRITERS)])
+        finally:
+            stop.set()
+            readers.join(60)
+        self.assertFalse(any(alive) or readers.is_alive(), 'threads bloqués')
+        if failures:
+            raise failures[0]
+        assistant.training_queue.join()
+
+        expected = 500 + self.WRITERS * self.INSERTS
+        ids = assistant.transactions.ids
+        stored = self.store.load_columns(tenant=TENANT)
+        self.assertEqual(len(ids), expected)
+        self.assertEqual(self.store.count(TENANT), expected)
+        self.assertTrue(np.all(np.diff(ids) > 0), 'identifiants dupliqués ou désordonnés')
+        np.testing.assert_array_equal(ids, stored['ids'])
+        written = [record['description'] for record in assistant.transactions[500:]]
+        self.assertEqual(sorted(written), sorted(
+            f'w{index}-{i}' for index in range(self.WRITERS) for i in range(self.INSERTS)))
+        self.assertEqual(assistant.check_consistency(), [])
+        self.assertEqual(assistant.aggregates.count, expected)
+        self.assertNotEqual(assistant.training_queue.latest(TENANT).status, 'failed')
+
+    def test_restore_model_while_writer_waits(self):
+        """Restauration du modèle (``_network_lock``) pendant qu'un lecteur l'attend
+        sous le verrou de lecture et qu'un rédacteur attend ce lecteur"""
+        trained = self.build()
+        for i in range(30):
+            trained.add_transaction(-1.0 - i, 'nourriture')
+        trained.train_model()
+
+        assistant = self.build()
+        lock = assistant.lock
+        load = assistant.checkpoints.load
+
+        def slow_load(*args):
+            # Priorité aux rédacteurs : plus aucune lecture n'entre une fois le
+            # rédacteur en attente ; la restauration ne doit pas en demander
+            wait_until(lambda: lock._readers and lock._writers_waiting)
+            return load(*args)
+
+        assistant.checkpoints.load = slow_load
+        restorer = threading.Thread(target=lambda: assistant.network, daemon=True)
+        reader = threading.Thread(target=assistant.get_dashboard, daemon=True)
+        writer = threading.Thread(
+            target=lambda: assistant.add_transaction(-3.0, 'transport'), daemon=True)
+        restorer.start()
+        self.assertTrue(wait_until(lambda: assistant._network_lock.locked()))
+        reader.start()
+        self.assertTrue(wait_until(lambda: lock._readers))
+        writer.start()
+        for thread in (restorer, reader, writer):
+            thread.join(10)
+        self.assertFalse(any(thread.is_alive() for thread in (restorer, reader, writer)),
+                         'interblocage entre _network_lock et le verrou du registre')
+        self.assertEqual(assistant.model_version, trained.model_version)
+        self.assertEqual(len(assistant.transactions), 31)
+        self.assertEqual(assistant.check_consistency(), [])
+
+
+class TenantRegistryTests(AssistantTestCase):
+    """Isolation des tenants et éviction LRU des assistants résidents"""
+
+    def registry(self, capacity):
+        return TenantRegistry(lambda tenant: self.build(tenant=tenant), capacity=capacity)
+
+    def test_isolation(self):
+        registry = self.registry(10)
+        alice, bob = registry.get('alice'), registry.get('bob')
+        for amount, category, *_ in history(30):
+            alice.add_transaction(amount, category)
+        alice.set_budget('loisirs', 42)
+        self.assertEqual(len(bob.transactions), 0)
+        self.assertEqual(bob.aggregates.count, 0)
+        self.assertEqual(bob.budgets['loisirs'], 500)
+        self.assertFalse(bob.journal_changed())
+        self.assertEqual((self.store.count('alice'), self.store.count('bob')), (30, 0))
+        bob.add_transaction(-1.0, 'transport')
+        self.assertEqual(alice.aggregates.count, 30)
+        self.assertNotIn(bob.transactions.ids[0], alice.transactions.ids)
+        self.assertEqual(registry.get('bob').select_transactions(10)[0][0]['amount'], -1.0)
+
+    def test_eviction_and_rebuild(self):
+        registry = self.registry(2)
+        assistants = {}
+        for seed, tenant in enumerate(('a', 'b', 'c')):
+            assistant = assistants[tenant] = registry.get(tenant)
+            for amount, category, *_ in history(20 + seed, seed=seed):
+                assistant.add_transaction(amount, category)
+            assistant.set_budget('loyer', 100 + seed)
+        # Le moins récemment utilisé est évincé
+        self.assertEqual(registry.resident(), ['b', 'c'])
+        self.assertIsNone(registry.peek('a'))
+        self.assertEqual(registry.stats()['evictions'], 1)
+
+        rebuilt = registry.get('a')
+        self.assertIsNot(rebuilt, assistants['a'])
+        self.assertEqual(rebuilt.aggregates.compare(assistants['a'].aggregates), [])
+        self.assertEqual(rebuilt.aggregates.count, 20)
+        self.assertEqual(rebuilt.budgets, assistants['a'].budgets)
+        np.testing.assert_array_equal(rebuilt.transactions.ids, assistants['a'].transactions.ids)
+        self.assertEqual(registry.resident(), ['c', 'a'])
+        # Un accès rafraîchit la position : ``c`` reste, ``a`` est évincé
+        self.assertIs(registry.get('c'), assistants['c'])
+        registry.get('b')
+        self.assertEqual(registry.resident(), ['c', 'b'])
+        self.assertEqual(registry.stats()['misses'], 5)
+
+
+class ResponseCacheTests(ApiTestCase):
+    """Réponses d'analyse mises en cache et revalidées (``cached_response``)"""
+
+    def test_rebuilt_tenant(self):
+        """Un tenant évincé puis reconstruit (``revision`` repartie de zéro) ne
+        reçoit pas les réponses en cache de l'assistant précédent"""
+        self.add(-1.0)
+        self.add(-2.0)
+        self.assertEqual(self.client.get('/api/analysis')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/analysis')['X-Cache'], 'HIT')
+        self.assertTrue(services.get_registry().evict(TENANT))
+        self.add(-200.0)
+        response = self.client.get('/api/analysis')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertAlmostEqual(response.json()['analysis']['total_spent'], -203.0)
+
+    def test_repeated_get_hits(self):
+        self.add(-5.0)
+        first = self.client.get('/api/analysis')
+        second = self.client.get('/api/analysis')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('X-Tenant-ID', second['Vary'])
+        # Autre URL (paramètres compris) : autre entrée
+        self.assertEqual(self.client.get('/api/analysis?detail=1')['X-Cache'], 'MISS')
+
+    def test_write_invalidates(self):
+        self.add(-5.0)
+        first = self.client.get('/api/analysis')
+        self.client.get('/api/analysis')
+        self.add(-7.0)
+        response = self.client.get('/api/analysis')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertAlmostEqual(response.json()['analysis']['total_spent'], -12.0)
+        # Un budget modifié invalide aussi
+        response = self.client.post('/api/budget/set', {'category': 'nourriture', 'budget': 1},
+                                    content_type='application/json')
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.client.get('/api/analysis')['X-Cache'], 'MISS')
+
+    def test_if_none_match(self):
+        self.add(-5.0)
+        etag = self.client.get('/api/analysis')['ETag']
+        response = self.client.get('/api/analysis', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'REVALIDATED')
+        self.assertEqual(response['ETag'], etag)
+        self.add(-7.0)
+        response = self.client.get('/api/analysis', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_tenants_separated(self):
+        self.add(-5.0)
+        self.add(-40.0, tenant='autre')
+        ours = self.client.get('/api/analysis')
+        self.client.get('/api/analysis')
+        theirs = self.client.get('/api/analysis', headers={'X-Tenant-ID': 'autre'})
+        self.assertEqual(theirs['X-Cache'], 'MISS')
+        self.assertAlmostEqual(theirs.json()['analysis']['total_spent'], -40.0)
+        self.assertNotEqual(theirs['ETag'], ours['ETag'])
+        # L'ETag d'un tenant ne revalide pas la réponse d'un autre
+        response = self.client.get(
+            '/api/analysis', headers={'X-Tenant-ID': 'autre', 'If-None-Match': ours['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(
+            self.client.get('/api/analysis').json()['analysis']['total_spent'], -5.0)
+
+
+class WeeklyReportTests(ApiTestCase):
+    """Rapport sur une période (``from``/``to``) : bornes validées et étendue plafonnée"""
+
+    def setUp(self):
+        super().setUp()
+        self.rows = history(300, days=90)
+        self.store.append_batch(self.rows, tenant=TENANT)
+
+    def report(self, **bounds):
+        return self.client.get('/api/weekly-report', bounds)
+
+    def test_range(self):
+        today = datetime.now().date()
+        first = today - timedelta(days=29)
+        response = self.report(**{'from': first.isoformat(), 'to': today.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        report = response.json()['weekly_report']
+        self.assertEqual(len(report['by_day']), 30)
+        self.assertEqual(max(report['by_day']), today.isoformat())
+        self.assertEqual(min(report['by_day']), first.isoformat())
+        start = to_timestamp(datetime.combine(first, datetime.min.time()))
+        end = to_timestamp(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+        inside = [row[0] for row in self.rows if start <= row[4] < end]
+        self.assertEqual(report['count'], len(inside))
+        self.assertAlmostEqual(report['total'], sum(inside), places=6)
+        self.assertEqual(sum(day['count'] for day in report['by_day'].values()), len(inside))
+        # Sans borne : les 7 derniers jours ; une année pleine reste acceptée
+        self.assertEqual(self.report().status_code, 200)
+        response = self.report(**{'from': '2024-01-01', 'to': '2024-12-31'})
+        self.assertEqual(len(response.json()['weekly_report']['by_day']), 366)
+
+    def test_reversed_range(self):
+        for bounds in ({'from': '2024-03-10', 'to': '2024-03-01'},
+                       {'from': '2024-03-10 12:00:00', 'to': '2024-03-10 12:00:00'},
+                       {'from': (datetime.now().date() + timedelta(days=3)).isoformat()}):
+            response = self.report(**bounds)
+            self.assertEqual(response.status_code, 400, bounds)
+            self.assertFalse(response.json()['success'])
+
+    def test_malformed_bounds(self):
+        for bounds in ({'from': 'demain'}, {'to': '2024-13-01'}, {'from': '01/03/2024'},
+                       {'from': '2024-03-01', 'to': '2024-03-32'}):
+            self.assertEqual(self.report(**bounds).status_code, 400, bounds)
+
+    def test_span_capped(self):
+        response = self.report(**{'from': '1900-01-01', 'to': '2100-12-31'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('366', response.json()['error'])
+        self.assertEqual(self.report(**{'from': '2000-01-01'}).status_code, 400)
+        self.assertEqual(self.report(**{'from': '2023-01-01', 'to': '2024-01-02'}).status_code, 400)
+
+
+class TransactionPaginationTests(ApiTestCase):
+    """Pages de ``/api/transactions`` par curseur sur l'identifiant"""
+
+    def setUp(self):
+        super().setUp()
+        self.store.append_batch(history(250, days=90), tenant=TENANT)
+        self.ids = self.store.load_columns(tenant=TENANT)['ids'].tolist()
+
+    def page(self, **params):
+        response = self.client.get('/api/transactions', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def walk(self, limit=40, during=None, **params):
+        """Identifiants de toutes les pages ; ``during(numéro)`` est appelé entre deux pages"""
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = self.page(limit=limit, **params, **({'cursor': cursor} if cursor else {}))
+            ids.extend(transaction['id'] for transaction in page['transactions'])
+            pages += 1
+            self.assertEqual(page['count'], len(page['transactions']))
+            if not page['has_more']:
+                self.assertIsNone(page['next_cursor'])
+                return ids
+            self.assertEqual(page['count'], limit)
+            cursor = page['next_cursor']
+            if during is not None:
+                during(pages)
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(self.walk(order='asc'), self.ids)
+        self.assertEqual(self.walk(order='desc'), self.ids[::-1])
+        self.assertEqual(self.walk(limit=250, order='asc'), self.ids)
+        self.assertEqual(self.walk(limit=1000), self.ids[::-1])
+
+    def test_filtered_pages(self):
+        columns = self.store.load_columns(tenant=TENANT)
+        expected = [int(id_) for id_, category, amount in zip(
+            columns['ids'], columns['categories'], columns['amounts'])
+            if category == 'loisirs' and amount < 0]
+        self.assertEqual(self.walk(limit=7, order='asc', category='loisirs', sign='expense'),
+                         expected)
+        self.assertEqual(self.walk(limit=7, category='loisirs', sign='expense'), expected[::-1])
+
+    def test_rows_added_while_paging(self):
+        added = []
+
+        def write(page):
+            added.append(self.add(-float(page))['id'])
+
+        # Du plus récent au plus ancien : le curseur ignore les ajouts postérieurs
+        self.assertEqual(self.walk(during=write), self.ids[::-1])
+        self.assertEqual(len(added), 6)
+        known = self.ids + added
+        # Du plus ancien au plus récent : les ajouts apparaissent à la fin, une fois
+        more = []
+        ids = self.walk(order='asc', during=lambda page: more.append(self.add(-1.0)['id']))
+        self.assertEqual(ids, known + more)
+
+    def test_pages_through_archived_rows(self):
+        with override_settings(MONEYWISE_RETENTION={'resident_rows': 50}):
+            self.assertEqual(self.walk(order='asc'), self.ids)
+            self.assertEqual(self.walk(order='desc'), self.ids[::-1])
+            self.assertGreater(
+                services.get_registry().get(TENANT).retention.archived_rows, 0)
+
+    def test_not_modified(self):
+        response = self.client.get('/api/transactions', {'limit': 10})
+        etag = response['ETag']
+        self.assertIn('X-Tenant-ID', response['Vary'])
+        response = self.client.get('/api/transactions', {'limit': 10},
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        other = self.client.get('/api/transactions', {'limit': 20},
+                                headers={'If-None-Match': etag})
+        self.assertEqual(other.status_code, 200)
+        self.add(-1.0)
+        response = self.client.get('/api/transactions', {'limit': 10},
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+def rows(columns):
+    """Enregistrements d'un dictionnaire de colonnes"""
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+class TransactionFormatTests(ApiTestCase):
+    """Formats négociés de ``/api/transactions`` : mêmes lignes que le JSON par
+    enregistrements, quel que soit l'encodage"""
+
+    def setUp(self):
+        super().setUp()
+        self.store.append_batch(history(60), tenant=TENANT)
+        self.expected = self.fetch()
+
+    def fetch(self, content_type='application/json', accept=None, **params):
+        response = self.client.get('/api/transactions', dict(params, order='asc', limit=100),
+                                   headers={'Accept': accept} if accept else {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], content_type)
+        self.assertIn('Accept', response['Vary'])
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        if content_type == 'application/json':
+            return response.json()['transactions']
+        return response.content
+
+    def test_columns(self):
+        content_type = serialization.FORMATS['columns']
+        for options in ({'format': 'columns'}, {'accept': content_type}):
+            page = json.loads(self.fetch(content_type, **options))
+            self.assertEqual((page['count'], page['has_more']), (60, False))
+            self.assertEqual(rows(page['columns']), self.expected)
+
+    @unittest.skipUnless(serialization.available('msgpack'), 'msgpack non installé')
+    def test_msgpack(self):
+        for options in ({'format': 'msgpack'}, {'accept': 'application/x-msgpack'}):
+            page = serialization.msgpack.unpackb(self.fetch('application/msgpack', **options))
+            self.assertEqual(page['count'], 60)
+            self.assertEqual(rows(page['columns']), self.expected)
+
+    @unittest.skipUnless(serialization.available('arrow'), 'pyarrow non installé')
+    def test_arrow(self):
+        content_type = serialization.FORMATS['arrow']
+        for options in ({'format': 'arrow'}, {'accept': content_type}):
+            table = serialization.pyarrow.ipc.open_stream(
+                self.fetch(content_type, **options)).read_all()
+            self.assertEqual(table.to_pylist(), self.expected)
+
+    def test_ndjson(self):
+        content = self.fetch('application/x-ndjson', format='ndjson')
+        self.assertEqual([json.loads(line) for line in content.splitlines()], self.expected)
+
+    def test_negotiation(self):
+        columns = serialization.FORMATS['columns']
+        # Préférence ``q``, types inconnus ignorés, ``format`` prioritaire sur Accept
+        self.fetch(columns, accept=f'text/html, application/msgpack;q=0.5, {columns};q=0.9')
+        self.assertEqual(self.fetch(accept='text/html, */*'), self.expected)
+        self.assertEqual(self.fetch(accept=columns, format='json'), self.expected)
+        etags = {self.client.get('/api/transactions', {'format': name})['ETag']
+                 for name in ('json', 'columns', 'ndjson')}
+        self.assertEqual(len(etags), 3)
+
+    def test_unknown_format(self):
+        response = self.client.get('/api/transactions', {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('xml', response.json()['error'])
+
+    def test_unavailable_format(self):
+        with mock.patch.dict(serialization.REQUIREMENTS, {'msgpack': None}):
+            response = self.client.get('/api/transactions', {'format': 'msgpack'})
+            self.assertEqual(response.status_code, 406)
+            self.assertNotIn('msgpack', response.json()['formats'])
+            # Par l'en-tête Accept, un format indisponible est seulement ignoré
+            self.assertEqual(self.fetch(accept='application/msgpack'), self.expected)
+
+
+@override_settings(MONEYWISE_EVENT_STREAM={
+    'history': 5, 'heartbeat': 0.05, 'retry': 1000, 'max_duration': 5})
+class EventStreamTests(ApiTestCase):
+    """Flux server-sent events : direct, reprise après ``Last-Event-ID`` et
+    resynchronisation quand l'historique ne couvre plus la reprise"""
+
+    def open(self, path='/api/stream', data=None, **headers):
+        response = self.client.get(path, data, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.addCleanup(response.close)
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b'retry: 1000\n\n')
+        return chunks
+
+    def read(self, chunks, count):
+        """Lit ``count`` événements (les ``: ping`` sont ignorés)"""
+        events = []
+        while len(events) < count:
+            for block in next(chunks).decode().split('\n\n'):
+                fields = dict(line.split(': ', 1) for line in block.splitlines()
+                              if not line.startswith(':'))
+                if fields:
+                    events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+        return events
+
+    def publish(self, count):
+        feed = services.get_event_hub().feed(TENANT)
+        return [feed.publish('budget', {'category': 'loisirs', 'budget': float(index)})['id']
+                for index in range(count)]
+
+    def test_live_events(self):
+        chunks = self.open(data={'types': 'transaction'})
+        transaction = self.add(-12.5, 'transport')
+        [(_, kind, data)] = self.read(chunks, 1)
+        self.assertEqual(kind, 'transaction')
+        self.assertEqual(data['transaction']['id'], transaction['id'])
+        # Sans événement : battement de cœur
+        self.assertEqual(next(chunks), b': ping\n\n')
+
+    def test_resume_replays_missed_events(self):
+        self.client.get('/api/dashboard')
+        ids = self.publish(4)
+        chunks = self.open(**{'Last-Event-ID': str(ids[1])})
+        events = self.read(chunks, 2)
+        self.assertEqual([event[0] for event in events], ids[2:])
+        self.assertEqual([event[2]['budget'] for event in events], [2.0, 3.0])
+        # Puis le direct, sans doublon
+        [event] = self.publish(1)
+        self.assertEqual([event[0] for event in self.read(chunks, 1)], [event])
+        # Client à jour : rien à rejouer
+        self.assertEqual(next(self.open(**{'Last-Event-ID': str(event)})), b': ping\n\n')
+
+    def test_resync_when_history_exceeded(self):
+        self.client.get('/api/dashboard')
+        ids = self.publish(8)
+        # Historique de 5 : les événements 2 et 3 ne peuvent plus être rejoués
+        for after in (ids[0], ids[-1] + 10):
+            chunks = self.open(data={'types': 'transaction', 'after': after})
+            [(event_id, kind, data)] = self.read(chunks, 1)
+            self.assertEqual((event_id, kind), (ids[-1], 'sync'))
+            self.assertEqual(data, {'reason': 'resync', 'after': after})
+            self.assertEqual(next(chunks), b': ping\n\n')
+        # Dernier événement encore en historique : reprise normale
+        chunks = self.open(**{'Last-Event-ID': str(ids[2])})
+        self.assertEqual([event[0] for event in self.read(chunks, 5)], ids[3:])
+
+    def test_invalid_requests(self):
+        response = self.client.get('/api/stream', headers={'Last-Event-ID': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/stream', {'types': 'transaction,bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+def moment(*args):
+    return to_timestamp(datetime(*args))
+
+
+class BudgetAlertTests(TestCase):
+    """Alertes émises au seul franchissement d'un seuil, par période"""
+
+    def setUp(self):
+        self.budgets = {'loisirs': 100.0}
+        self.alerts = BudgetAlerts(self.budgets, periods=('month',), thresholds=(0.8, 1.0))
+
+    def crossed(self, alerts):
+        return [(alert['period_key'], alert['threshold']) for alert in alerts]
+
+    def test_fires_once_per_threshold(self):
+        when = moment(2024, 3, 10, 12)
+        self.assertEqual(self.alerts.add(-50, 'loisirs', when), [])
+        self.assertEqual(self.crossed(self.alerts.add(-35, 'loisirs', when)), [('2024-03', 0.8)])
+        self.assertEqual(self.alerts.add(-5, 'loisirs', when), [])
+        alerts = self.alerts.add(-20, 'loisirs', when + 60)
+        self.assertEqual(self.crossed(alerts), [('2024-03', 1.0)])
+        self.assertAlmostEqual(alerts[0]['spent'], 110.0)
+        self.assertEqual(alerts[0]['category'], 'loisirs')
+        self.assertEqual(self.alerts.add(-500, 'loisirs', when + 120), [])
+        # Revenus et catégories sans budget ne déclenchent rien
+        self.assertEqual(self.alerts.add(1000, 'loisirs', when), [])
+        self.assertEqual(self.alerts.add(-1000, 'voyages', when), [])
+
+    def test_several_thresholds_at_once(self):
+        self.assertEqual(self.crossed(self.alerts.add(-150, 'loisirs', moment(2024, 3, 10))),
+                         [('2024-03', 0.8), ('2024-03', 1.0)])
+
+    def test_resets_next_month(self):
+        self.alerts.add(-120, 'loisirs', moment(2024, 1, 31, 23, 59))
+        self.assertEqual(self.alerts.add(-10, 'loisirs', moment(2024, 1, 31, 23, 59, 59)), [])
+        self.assertEqual(self.alerts.add(-79, 'loisirs', moment(2024, 2, 1)), [])
+        self.assertEqual(self.crossed(self.alerts.add(-2, 'loisirs', moment(2024, 2, 29))),
+                         [('2024-02', 0.8)])
+
+    def test_resets_next_week(self):
+        alerts = BudgetAlerts(self.budgets, periods=('week',), thresholds=(1.0,))
+        # Budget hebdomadaire : 100 × 12/52 ≈ 23,08 ; le 2024-03-04 est un lundi
+        sunday, monday = moment(2024, 3, 10, 23), moment(2024, 3, 11, 1)
+        self.assertEqual(self.crossed(alerts.add(-24, 'loisirs', moment(2024, 3, 4))),
+                         [('2024-W10', 1.0)])
+        self.assertEqual(alerts.add(-24, 'loisirs', sunday), [])
+        self.assertEqual(self.crossed(alerts.add(-24, 'loisirs', monday)), [('2024-W11', 1.0)])
+        # Les périodes non configurées sont comptées sans alerte
+        self.assertAlmostEqual(alerts.totals(monday, 'month')[1]['loisirs'], 72.0)
+
+    def test_batch_merge(self):
+        ledger = TransactionLedger()
+        ledger.extend_columns(
+            ids=np.arange(4), amounts=[-30.0, -30.0, -30.0, -30.0], categories=['loisirs'] * 4,
+            category_codes=[3] * 4, descriptions=[''] * 4,
+            timestamps=[moment(2024, 3, day) for day in (1, 2, 3, 4)])
+        # Quatre lignes, deux seuils franchis : une alerte par seuil
+        self.assertEqual(self.crossed(self.alerts.merge_ledger(ledger)),
+                         [('2024-03', 0.8), ('2024-03', 1.0)])
+        self.assertEqual(self.alerts.add(-1, 'loisirs', moment(2024, 3, 5)), [])
+        # Historique rechargé sans alerte, puis plus de franchissement à signaler
+        reloaded = BudgetAlerts(self.budgets)
+        self.assertEqual(reloaded.merge_ledger(ledger, notify=False), [])
+        self.assertEqual(reloaded.add(-1, 'loisirs', moment(2024, 3, 5)), [])
+
+    def test_budget_change_rearms(self):
+        when = moment(2024, 3, 10)
+        self.alerts.add(-90, 'loisirs', when)
+        # Budget abaissé : le seuil de 100 % est franchi sans nouvelle dépense
+        self.budgets['loisirs'] = 80.0
+        self.assertEqual(self.crossed(self.alerts.check_budget('loisirs', when, 100.0)),
+                         [('2024-03', 1.0)])
+        # Budget relevé puis nouvelle dépense : les seuils sont réarmés
+        self.budgets['loisirs'] = 200.0
+        self.assertEqual(self.alerts.check_budget('loisirs', when, 80.0), [])
+        self.assertEqual(self.crossed(self.alerts.add(-80, 'loisirs', when)), [('2024-03', 0.8)])
+
+
+class AggregateConsistencyTests(AssistantTestCase):
+    """Agrégats incrémentaux comparés à un recalcul complet (``check_consistency``)"""
+
+    def assertConsistent(self, assistant):
+        self.assertEqual(assistant.check_consistency(), [])
+        # Un assistant rechargé depuis le journal reconstruit les mêmes agrégats
+        reloaded = self.build()
+        self.assertEqual(assistant.aggregates.compare(reloaded.aggregates), [])
+        self.assertEqual(assistant.budgets, reloaded.budgets)
+
+    def test_adds(self):
+        assistant = self.build()
+        for amount, category, *_ in history(60):
+            assistant.add_transaction(amount, category)
+        # Revenu, montant nul et catégorie inconnue
+        assistant.add_transaction(0, 'nourriture')
+        assistant.add_transaction(-12.5, 'voyages')
+        self.assertEqual(assistant.aggregates.count, 62)
+        self.assertAlmostEqual(assistant.aggregates.expense_total,
+                               float(np.minimum(assistant.transactions.amounts, 0).sum()))
+        self.assertConsistent(assistant)
+
+    def test_budget_changes(self):
+        assistant = self.build()
+        for amount, category, *_ in history(40):
+            assistant.add_transaction(amount, category)
+        assistant.set_budget('nourriture', 50)
+        assistant.set_budget('voyages', 200)
+        assistant.set_budget('nourriture', 75)
+        self.assertEqual(assistant.budgets['nourriture'], 75)
+        self.assertEqual(assistant.budgets['voyages'], 200)
+        self.assertConsistent(assistant)
+
+    def test_bulk_imports(self):
+        assistant = self.build()
+        rows = history(300, seed=1)
+        records = [(line, {'amount': str(amount), 'category': category, 'description': description,
+                           'date': from_timestamp(timestamp).strftime(DATE_FORMAT)})
+                   for line, (amount, category, _, description, timestamp) in enumerate(rows, 1)]
+        # Lignes invalides écartées, dates désordonnées d'un lot à l'autre
+        records[10] = (11, {'amount': 'abc'})
+        records[20] = (21, {'amount': '1', 'date': 'demain'})
+        records = records[150:] + records[:150]
+        assistant.add_transaction(-5, 'transport')
+        report = assistant.import_transactions(records, chunk_size=64, train=False)
+        assistant.add_transaction(-7, 'transport')
+        self.assertEqual((report['imported'], report['rejected']), (298, 2))
+        self.assertEqual(assistant.aggregates.count, 300)
+        self.assertConsistent(assistant)
+
+    def test_compaction_into_rollups(self):
+        # Une année d'historique, au plus 100 transactions résidentes
+        self.store.append_batch(history(1000, days=365, seed=2), tenant=TENANT)
+        retention = {'resident_rows': 100, 'min_resident_days': 31, 'slack': 0.1}
+        assistant = self.build(retention=retention)
+        for amount, category, *_ in history(30, days=1, seed=3):
+            assistant.add_transaction(amount, category)
+        self.assertGreater(assistant.retention.archived_rows, 0)
+        self.assertLess(len(assistant.transactions), 1030)
+        self.assertEqual(assistant.retention.archived_rows + len(assistant.transactions), 1030)
+        self.assertEqual(assistant.aggregates.count, 1030)
+        self.assertEqual(assistant.check_consistency(), [])
+        reloaded = self.build(retention=retention)
+        self.assertEqual(assistant.aggregates.compare(reloaded.aggregates), [])
+        self.assertEqual(assistant.retention.rollup, reloaded.retention.rollup)
+
+    def test_detects_divergence(self):
+        self.store.append_batch(history(500, days=365, seed=4), tenant=TENANT)
+        assistant = self.build(retention={'resident_rows': 100})
+        self.assertEqual(assistant.check_consistency(), [])
+        assistant.aggregates.expense_total -= 1
+        assistant.aggregates.category_counts['loyer'] += 1
+        day = next(iter(assistant.retention.rollup.days.values()))
+        next(iter(day.values()))[0] += 1
+        self.assertEqual(assistant.check_consistency(),
+                         ['expense_total', 'category_counts', 'daily_rollup'])
+        # Sans éviction, ``verify`` compare au registre résident
+        ledger = assistant.transactions
+        self.assertEqual(AggregateStore.from_ledger(ledger).verify(ledger), [])
+
+
+def stepwise_forecast(network, window, day, month, category, start, horizon):
+    """Référence : une passe 1×N par jour et par fenêtre, features construites en Python"""
+    amounts = [float(amount) for amount in window]
+    width = len(amounts)
+    for step in range(horizon):
+        if step:
+            moment = start + timedelta(days=step - 1)
+            day, month = moment.weekday(), moment.month
+        recent = amounts[-width:]
+        scale = max(abs(amount) for amount in recent) or 1
+        features = [amount / scale for amount in recent] + [
+            day / 7, month / 12, 1 if day >= 5 else 0, category / 10]
+        amounts.append(float(network.predict(np.array([features]))[0][0]) * scale)
+    return amounts[width:]
+
+
+class ForecastTests(AssistantTestCase):
+    """Prévision récursive par lots comparée à la boucle pas à pas"""
+
+    HORIZON = 10
+
+    def setUp(self):
+        super().setUp()
+        np.random.seed(0)
+        self.rng = np.random.default_rng(0)
+        self.start = date(2024, 2, 26)
+
+    def calendar(self, count):
+        days = self.rng.integers(0, 7, count)
+        months = self.rng.integers(1, 13, count)
+        categories = self.rng.integers(0, 8, count)
+        return days, months, categories
+
+    def test_shared_weights(self):
+        for window in (7, 10):
+            network = NeuralNetwork(input_size=window + 4, hidden_size=15)
+            windows = self.rng.normal(-50, 80, (40, window))
+            windows[0] = 0  # échelle nulle ramenée à 1
+            days, months, categories = self.calendar(len(windows))
+            batched = recursive_forecast(network_weights(network), windows, days, months,
+                                         categories, self.start, self.HORIZON)
+            expected = [stepwise_forecast(network, *row, self.start, self.HORIZON)
+                        for row in zip(windows, days, months, categories)]
+            np.testing.assert_allclose(batched, expected, rtol=1e-10, atol=1e-10)
+
+    def test_stacked_weights(self):
+        networks = [NeuralNetwork(input_size=11, hidden_size=15) for _ in range(12)]
+        windows = self.rng.normal(-50, 80, (len(networks), 7))
+        days, months, categories = self.calendar(len(networks))
+        batched = recursive_forecast(stack_weights(networks), windows, days, months,
+                                     categories, self.start, self.HORIZON)
+        expected = [stepwise_forecast(*row, self.start, self.HORIZON)
+                    for row in zip(networks, windows, days, months, categories)]
+        np.testing.assert_allclose(batched, expected, rtol=1e-10, atol=1e-10)
+
+    def test_assistant_forecast(self):
+        self.store.append_batch(history(50), tenant=TENANT)
+        assistant = self.build()
+        ledger = assistant.transactions
+        # Bilan d'entraînement journalisé
+        with self.assertLogs('moneywise.training', 'INFO') as logs:
+            assistant.train_model()
+        [record] = logs.records
+        self.assertTrue(record.getMessage().startswith('training finished'))
+        self.assertEqual(record.training, assistant.network.last_run)
+        forecast = assistant.forecast(self.HORIZON)
+        start = datetime.now().date() + timedelta(days=1)
+        expected = stepwise_forecast(
+            assistant.network, ledger.amounts[-7:], int(ledger.days_of_week[-1]),
+            int(ledger.months[-1]), int(ledger.category_codes[-1]), start, self.HORIZON)
+        np.testing.assert_allclose(
+            [day['predicted_amount'] for day in forecast], expected, rtol=1e-10, atol=1e-10)
+        self.assertEqual(forecast[0]['date'], start.strftime('%Y-%m-%d'))
+        # Prévisions à un pas des fenêtres fournies par l'appelant
+        windows = self.rng.normal(-50, 80, (5, 7))
+        last = date(2024, 3, 2)
+        np.testing.assert_allclose(
+            assistant.predict_windows(windows, last_date=last, category='transport')[:, 0],
+            [stepwise_forecast(assistant.network, window, last.weekday(), last.month, 2,
+                               last + timedelta(days=1), 1)[0] for window in windows],
+            rtol=1e-10, atol=1e-10)
@@ -0,0 +1,169 @@
+"""
+Entraînement du modèle en arrière-plan : file de jobs, regroupement des demandes
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from core.metrics import TRAINING_JOBS, stage
+
+logger = logging.getLogger('moneywise.training')
+
+# Modes d'entraînement, du moins au plus complet : une demande regroupée avec
+# un job en attente ne peut que l'étendre
+MODES = ('auto', 'full', 'search')
+
+
+class TrainingJob:
+    """Demande d'entraînement suivie par identifiant
+
+    En mode ``search`` (recherche d'hyperparamètres), ``options`` précise
+    l'espace de recherche et la progression compte les candidats évalués.
+    """
+
+    def __init__(self, reason, mode='auto', tenant=None, options=None):
+        self.id = uuid.uuid4().hex
+        self.tenant = tenant
+        self.reason = reason
+        self.mode = mode
+        self.options = options or {}
+        self.result = None
+        self.status = 'queued'
+        self.triggers = 1
+        self.epoch = 0
+        self.epochs = 0
+        self.loss = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def update(self, epoch, epochs, loss):
+        """Callback de progression appelé par le réseau à chaque époque"""
+        self.epoch = epoch + 1
+        self.epochs = epochs
+        self.loss = float(loss)
+
+    @property
+    def progress(self):
+        if self.status == 'done':
+            return 1.0
+        return self.epoch / self.epochs if self.epochs else 0.0
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'tenant': self.tenant,
+            'reason': self.reason,
+            'mode': self.mode,
+            'options': self.options,
+            'status': self.status,
+            'progress': round(self.progress, 4),
+            'epoch': self.epoch,
+            'epochs': self.epochs,
+            'loss': self.loss,
+            'triggers': self.triggers,
+            'error': self.error,
+            'result': self.result,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class TrainingQueue:
+    """File d'entraînements traitée par un unique thread worker
+
+    Tant qu'un job est en attente pour un assistant, les nouvelles demandes
+    le rejoignent au lieu d'en créer un autre : une rafale d'insertions ne
+    produit qu'un seul ré-entraînement.
+    """
+
+    def __init__(self, asynchronous=True, history=50):
+        self.asynchronous = asynchronous
+        self.history = history
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._pending = {}
+        self._running = None
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, assistant, reason='manual', mode='auto', options=None):
+        """Planifie un entraînement et retourne le job (éventuellement regroupé)"""
+        with self._lock:
+            job = self._pending.get(id(assistant))
+            if job is not None:
+                job.triggers += 1
+                if MODES.index(mode) > MODES.index(job.mode):
+                    job.mode = mode
+                    job.options = options or {}
+                return job
+            job = TrainingJob(reason, mode, getattr(assistant, 'tenant', None), options)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            if self.asynchronous:
+                self._pending[id(assistant)] = job
+                self._queue.put((job, assistant))
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._work, name='moneywise-training', daemon=True)
+                    self._worker.start()
+                return job
+        self._run(job, assistant)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def latest(self, tenant=None):
+        """Dernier job planifié (pour ``tenant`` si précisé)"""
+        with self._lock:
+            return next((job for job in reversed(self._jobs.values())
+                         if tenant is None or job.tenant == tenant), None)
+
+    def pending(self):
+        """Nombre de jobs en file, hors job en cours"""
+        return self._queue.qsize()
+
+    def busy(self, assistant):
+        """Vrai si un entraînement de cet assistant est en attente ou en cours"""
+        key = id(assistant)
+        return key in self._pending or self._running == key
+
+    def _work(self):
+        while True:
+            job, assistant = self._queue.get()
+            with self._lock:
+                self._pending.pop(id(assistant), None)
+                self._running = id(assistant)
+            self._run(job, assistant)
+            self._running = None
+            self._queue.task_done()
+
+    def _run(self, job, assistant):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            with stage('training'):
+                if job.mode == 'search':
+                    job.result = assistant.search_hyperparameters(
+                        progress=job.update, **job.options)
+                else:
+                    job.result = assistant.train_model(progress=job.update, mode=job.mode)
+            job.status = 'done' if job.result else 'skipped'
+        except Exception as exc:
+            logger.exception('Training job %s failed', job.id)
+            job.status = 'failed'
+            job.error = str(exc)
+        job.finished_at = time.time()
+        TRAINING_JOBS.labels(job.result['mode'] if job.result else job.mode, job.status).inc()
+
+    def join(self):
+        """Attend la fin de tous les jobs en file (tests, commandes)"""
+        self._queue.join()
@@ -0,0 +1,63 @@
+"""
+Middleware d'instrumentation : durée des requêtes par vue et profilage à la demande
+"""
+
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from core import services
+from core.metrics import HTTP_REQUEST_SECONDS
+from core.profiling import SamplingProfiler
+
+
+def _profiling_requested(request):
+    return settings.MONEYWISE_PROFILING and (
+        request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1')
+
+
+def _observe(request, response, started):
+    # Nom de la route plutôt que le chemin : le nombre de séries reste borné
+    match = getattr(request, 'resolver_match', None)
+    view = (match.url_name or match.view_name) if match else 'unmatched'
+    HTTP_REQUEST_SECONDS.labels(view, request.method, response.status_code).observe(
+        time.perf_counter() - started)
+
+
+def _attach_profile(response, profiler):
+    profiler.stop()
+    response['X-Profile-Id'] = services.get_profile_store().add(profiler)
+    response['X-Profile-Samples'] = str(profiler.samples)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Mesure chaque requête ; ``X-Profile: 1`` (ou ``?profile=1``) l'échantillonne
+    si MONEYWISE_PROFILING est actif, le profil étant servi par /api/metrics/profile/<id>"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            profiler = None
+            if _profiling_requested(request):
+                profiler = SamplingProfiler(
+                    request.get_full_path(), settings.MONEYWISE_PROFILE_INTERVAL).start()
+            response = await get_response(request)
+            _observe(request, response, started)
+            if profiler is not None:
+                await sync_to_async(_attach_profile)(response, profiler)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            profiler = None
+            if _profiling_requested(request):
+                profiler = SamplingProfiler(
+                    request.get_full_path(), settings.MONEYWISE_PROFILE_INTERVAL).start()
+            response = get_response(request)
+            _observe(request, response, started)
+            if profiler is not None:
+                _attach_profile(response, profiler)
+            return response
+    return middleware
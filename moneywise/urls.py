@@ -15,14 +15,28 @@ urlpatterns = [
     # API endpoints
     path('api/transaction/add', views.api_add_transaction, name='add_transaction'),
     path('api/predict', views.api_predict, name='predict'),
+    path('api/predict/batch', views.api_predict_batch, name='predict_batch'),
+    path('api/forecast', views.api_forecast, name='forecast'),
+    path('api/dashboard', views.api_dashboard, name='dashboard'),
     path('api/analysis', views.api_analysis, name='analysis'),
     path('api/train', views.api_train_model, name='train_model'),
+    path('api/train/status', views.api_training_status, name='training_status'),
+    path('api/train/status/<str:job_id>', views.api_training_status, name='training_job_status'),
+    path('api/model/checkpoints', views.api_model_checkpoints, name='model_checkpoints'),
+    path('api/model/rollback', views.api_model_rollback, name='model_rollback'),
+    path('api/model/search', views.api_model_search, name='model_search'),
     path('api/recommendations', views.api_recommendations, name='recommendations'),
     path('api/budget/set', views.api_set_budget, name='set_budget'),
+    path('api/alerts', views.api_alerts, name='alerts'),
+    path('api/alerts/stream', views.api_alerts_stream, name='alerts_stream'),
+    path('api/stream', views.api_stream, name='stream'),
     path('api/transactions', views.api_transactions, name='transactions'),
+    path('api/transactions/import', views.api_import_transactions, name='import_transactions'),
     path('api/statistics', views.api_statistics, name='statistics'),
     path('api/weekly-report', views.api_weekly_report, name='weekly_report'),
     path('api/health', views.api_health, name='health'),
+    path('api/metrics', views.api_metrics, name='metrics'),
+    path('api/metrics/profile/<str:profile_id>', views.api_metrics_profile, name='metrics_profile'),
     
     # Démonstration
     path('demo/add-sample-data', views.demo_add_sample_data, name='add_sample_data'),
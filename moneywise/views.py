@@ -2,33 +2,181 @@
 Vues pour l'application MoneyWise - Assistant Financier Intelligent
 """
 
+import asyncio
+import functools
+import hashlib
 import json
-from django.http import JsonResponse, HttpResponse
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (Http404, JsonResponse, HttpResponse, HttpResponseNotModified,
+                         StreamingHttpResponse)
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
-import numpy as np
-from datetime import datetime, timedelta
+# Modules sans NumPy seulement : le registre, les formats et la recherche
+# d'hyperparamètres sont importés par les vues qui s'en servent
+from core import services
+from core.dates import DATE_FORMAT, PERIODS, SECONDS_PER_DAY, to_timestamp
+from core.events import EVENT_TYPES
+from core.metrics import REGISTRY
+from core.responses import CachedResponse
+from core.training import MODES
+
+def _get_assistant(request):
+    """Assistant du tenant de la requête (400 si l'identifiant est invalide)"""
+    try:
+        tenant = services.tenant_from_request(request)
+    except ValueError as e:
+        raise BadRequest(str(e))
+    return services.get_assistant(tenant)
+
+async def _compute(function, request):
+    """Exécute ``function(assistant)`` dans le pool de calcul borné
+    
+    La résolution du tenant (éventuellement rechargé depuis le disque) et le
+    calcul quittent la boucle d'événements en un seul passage.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        services.get_executor(), lambda: function(_get_assistant(request)))
+
+def _cache_lookup(request, time_sensitive):
+    """Réponse servie sans calcul (304 ou entrée du cache), sinon validateurs de la
+    réponse à calculer ; aucun des deux si l'assistant n'est pas résident"""
+    if request.method != 'GET':
+        return None, None
+    try:
+        tenant = services.tenant_from_request(request)
+    except ValueError as e:
+        raise BadRequest(str(e))
+    # Sans reconstruction ni relecture : une seule requête d'index, même dans la
+    # boucle d'événements ; si un autre processus a écrit, le calcul rattrape le journal
+    assistant = services.get_registry().peek(tenant)
+    if assistant is None or assistant.journal_changed():
+        return None, None
+    
+    cache = services.get_response_cache()
+    # État durable (voir ``FinancialAssistant.validator``) : valide l'ETag et les
+    # entrées du cache, y compris après la reconstruction d'un tenant évincé
+    validator = assistant.validator
+    modified_at = assistant.modified_at
+    key = (tenant, request.path, tuple(sorted((name, tuple(values))
+                                              for name, values in request.GET.lists())))
+    if time_sensitive:
+        # Résultats dépendant de l'heure courante : revalidés à chaque période de ttl
+        period = int(time.time() // cache.ttl)
+        key += (period,)
+        modified_at = max(modified_at, period * cache.ttl)
+    etag = '"%s"' % hashlib.md5(f'{key}|{validator}'.encode()).hexdigest()
+    last_modified = int(modified_at)
+    
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _set_validators(response, etag, last_modified, 'REVALIDATED'), None
+    entry = cache.get(key, validator)
+    if entry is not None:
+        response = HttpResponse(entry.content, content_type=entry.content_type, status=entry.status)
+        return _set_validators(response, etag, last_modified, 'HIT'), None
+    return None, (key, validator, etag, last_modified)
+
+def _cache_store(response, validators):
+    if validators is None or response.status_code != 200 or response.streaming:
+        return response
+    key, validator, etag, last_modified = validators
+    services.get_response_cache().set(key, CachedResponse(
+        validator, response.content, response['Content-Type'], response.status_code,
+        etag, last_modified))
+    return _set_validators(response, etag, last_modified, 'MISS')
+
+def _set_validators(response, etag, last_modified, status):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['X-Cache'] = status
+    # Le client garde la réponse mais la revalide (304) à chaque usage
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['X-Tenant-ID'])
+    return response
+
+def cached_response(time_sensitive=False):
+    """Met en cache les réponses GET de la vue par tenant et URL, validées (comme
+    l'ETag) par l'état durable de l'assistant
+    
+    ``time_sensitive`` : la réponse dépend aussi de l'heure (prévisions, fenêtres
+    glissantes) et n'est réutilisée que pendant la période de ttl en cours.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            async def wrapper(request, *args, **kwargs):
+                response, validators = _cache_lookup(request, time_sensitive)
+                if response is not None:
+                    return response
+                return _cache_store(await view(request, *args, **kwargs), validators)
+        else:
+            def wrapper(request, *args, **kwargs):
+                response, validators = _cache_lookup(request, time_sensitive)
+                if response is not None:
+                    return response
+                return _cache_store(view(request, *args, **kwargs), validators)
+        return functools.wraps(view)(wrapper)
+    return decorator
+
+# Bornes des API de prévision, du tableau de bord, des pages de transactions
+# et des rapports sur une période (une entrée ``by_day`` par jour)
+MAX_HORIZON = 90
+MAX_BATCH = 10000
+MAX_DASHBOARD_TRANSACTIONS = 100
+MAX_PAGE = 1000
+MAX_REPORT_DAYS = 366
 
 # ==================== VUES PRINCIPALES ====================
 
+@cached_response(time_sensitive=True)
 def home(request):
     """Page d'accueil avec dashboard"""
-    assistant = settings.FINANCIAL_ASSISTANT
+    assistant = _get_assistant(request)
     
-    # Données pour le template
+    # Données initiales incluses dans la page : aucun appel d'API au chargement
     context = {
-        'transactions': assistant.transactions[-10:][::-1],  # 10 dernières
-        'analysis': assistant.get_spending_analysis(),
-        'predictions': assistant.predict_next_week(),
-        'recommendations': assistant.get_savings_recommendations()[:3],
-        'total_balance': sum(t['amount'] for t in assistant.transactions),
+        'tenant': assistant.tenant,
         'categories': list(assistant.categories.keys()),
-        'budgets': assistant.budgets
+        'dashboard': assistant.get_dashboard(),
     }
     
     return render(request, 'index.html', context)
 
+def _dashboard_options(request):
+    """Masque de champs (``fields=analysis,predictions``) et nombre de transactions récentes"""
+    fields = request.GET.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    limit = int(request.GET.get('limit', 10))
+    if not 0 <= limit <= MAX_DASHBOARD_TRANSACTIONS:
+        raise ValueError(f'Limite hors bornes (0 à {MAX_DASHBOARD_TRANSACTIONS})')
+    return fields, limit
+
+@cached_response(time_sensitive=True)
+async def api_dashboard(request):
+    """API du tableau de bord : toutes les sections (ou celles du masque ``fields``)
+    calculées en un passage"""
+    try:
+        fields, limit = _dashboard_options(request)
+        dashboard = await _compute(
+            lambda assistant: assistant.get_dashboard(fields, limit), request)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return HttpResponse(services.get_json_dumps()({
+        'success': True,
+        'dashboard': dashboard
+    }), content_type='application/json')
+
 @csrf_exempt
 def api_add_transaction(request):
     """API pour ajouter une transaction"""
@@ -39,7 +187,7 @@ def api_add_transaction(request):
             category = data.get('category', 'autres')
             description = data.get('description', '')
             
-            assistant = settings.FINANCIAL_ASSISTANT
+            assistant = _get_assistant(request)
             transaction = assistant.add_transaction(amount, category, description)
             
             return JsonResponse({
@@ -56,10 +204,10 @@ def api_add_transaction(request):
     return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
 
 @csrf_exempt
-def api_predict(request):
+@cached_response(time_sensitive=True)
+async def api_predict(request):
     """API pour obtenir des prédictions"""
-    assistant = settings.FINANCIAL_ASSISTANT
-    predictions = assistant.predict_next_week()
+    predictions = await _compute(lambda assistant: assistant.predict_next_week(), request)
     
     if predictions:
         return JsonResponse({
@@ -72,10 +220,72 @@ def api_predict(request):
             'message': 'Pas assez de données pour la prédiction'
         })
 
-def api_analysis(request):
+@cached_response(time_sensitive=True)
+async def api_forecast(request):
+    """API de prévision sur ``horizon`` jours (7 par défaut, 90 au plus)"""
+    try:
+        horizon = int(request.GET.get('horizon', 7))
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f'Horizon hors limites (1 à {MAX_HORIZON})')
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    forecast = await _compute(lambda assistant: assistant.forecast(horizon), request)
+    
+    if forecast is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Pas assez de données pour la prédiction'
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'horizon': horizon,
+        'forecast': forecast
+    })
+
+@csrf_exempt
+async def api_predict_batch(request):
+    """API de prédiction par lots : ``{"windows": [[7 montants], ...], "horizon": 1,
+    "date": "AAAA-MM-JJ", "category": "autres"}``"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError('Objet JSON attendu')
+        windows = data.get('windows') or []
+        horizon = int(data.get('horizon', 1))
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f'Horizon hors limites (1 à {MAX_HORIZON})')
+        if len(windows) > MAX_BATCH:
+            raise ValueError(f'Au plus {MAX_BATCH} fenêtres par lot')
+        last_date = data.get('date')
+        last_date = datetime.strptime(last_date, "%Y-%m-%d").date() if last_date else None
+        category = data.get('category', 'autres')
+        
+        forecasts = await _compute(lambda assistant: assistant.predict_windows(
+            windows, last_date, category, horizon), request)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'horizon': horizon,
+        'forecasts': forecasts.tolist()
+    })
+
+@cached_response()
+async def api_analysis(request):
     """API pour l'analyse des dépenses"""
-    assistant = settings.FINANCIAL_ASSISTANT
-    analysis = assistant.get_spending_analysis()
+    analysis = await _compute(lambda assistant: assistant.get_spending_analysis(), request)
     
     return JsonResponse({
         'success': True,
@@ -84,23 +294,115 @@ def api_analysis(request):
 
 @csrf_exempt
 def api_train_model(request):
-    """API pour forcer l'entraînement du modèle"""
+    """API pour planifier un ré-entraînement du modèle en arrière-plan"""
     if request.method == 'POST':
-        assistant = settings.FINANCIAL_ASSISTANT
-        assistant.train_model()
+        mode = request.GET.get('mode', 'full')
+        if mode not in MODES:
+            return JsonResponse({
+                'success': False,
+                'error': f"Mode inconnu : {mode} ({', '.join(MODES)})"
+            }, status=400)
+        assistant = _get_assistant(request)
+        job = assistant.schedule_training('manual', mode=mode)
         
         return JsonResponse({
             'success': True,
-            'message': 'Modèle ré-entraîné avec succès',
-            'loss_history': assistant.network.loss_history[-10:] if assistant.network.loss_history else []
-        })
+            'message': 'Entraînement du modèle planifié',
+            'job': job.as_dict()
+        }, status=202)
     
     return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
 
-def api_recommendations(request):
+@csrf_exempt
+def api_model_search(request):
+    """API pour planifier une recherche d'hyperparamètres en arrière-plan
+    
+    Corps JSON facultatif : ``hidden_sizes``, ``learning_rates``, ``windows``
+    (listes), ``epochs``, ``holdout``, ``seed`` et ``promote`` (le meilleur
+    modèle devient le modèle servi, par défaut). Suivi par /api/train/status/<id>.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+    try:
+        data = json.loads(request.body or '{}')
+        if not isinstance(data, dict):
+            raise ValueError('Objet JSON attendu')
+        promote = bool(data.pop('promote', True))
+        assistant = _get_assistant(request)
+        # Validation immédiate : le job ne s'exécute qu'en arrière-plan
+        from core.search import search_options
+        search_options(assistant.hyperparameter_search, **data)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    job = assistant.schedule_training('search', mode='search', options=dict(data, promote=promote))
+    return JsonResponse({
+        'success': True,
+        'message': "Recherche d'hyperparamètres planifiée",
+        'job': job.as_dict()
+    }, status=202)
+
+def api_training_status(request, job_id=None):
+    """API pour suivre l'avancement d'un entraînement (le dernier par défaut)"""
+    assistant = _get_assistant(request)
+    queue = assistant.training_queue
+    job = queue.get(job_id) if job_id else queue.latest(assistant.tenant)
+    
+    if job is None or job.tenant != assistant.tenant:
+        return JsonResponse({
+            'success': False,
+            'error': 'Job introuvable'
+        }, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'job': job.as_dict(),
+        'loss_history': list(assistant.network.loss_history)[-10:],
+        'last_run': assistant.network.last_run
+    })
+
+def api_model_checkpoints(request):
+    """API pour lister les versions sauvegardées du modèle"""
+    assistant = _get_assistant(request)
+    
+    return JsonResponse({
+        'success': True,
+        'current_version': assistant.checkpoints.current_version(),
+        'checkpoints': assistant.checkpoints.describe()
+    })
+
+@csrf_exempt
+def api_model_rollback(request):
+    """API pour revenir à une version précédente du modèle"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or '{}')
+            version = data.get('version')
+            
+            assistant = _get_assistant(request)
+            version = assistant.rollback_model(int(version) if version is not None else None)
+            
+            return JsonResponse({
+                'success': True,
+                'message': f'Modèle restauré à la version {version}',
+                'version': version
+            })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+    
+    return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+
+@cached_response()
+async def api_recommendations(request):
     """API pour obtenir des recommandations"""
-    assistant = settings.FINANCIAL_ASSISTANT
-    recommendations = assistant.get_savings_recommendations()
+    recommendations = await _compute(
+        lambda assistant: assistant.get_savings_recommendations(), request)
     
     return JsonResponse({
         'success': True,
@@ -116,9 +418,9 @@ def api_set_budget(request):
             category = data.get('category')
             budget = float(data.get('budget', 0))
             
-            assistant = settings.FINANCIAL_ASSISTANT
+            assistant = _get_assistant(request)
             if category in assistant.budgets:
-                assistant.budgets[category] = budget
+                assistant.set_budget(category, budget)
                 
                 return JsonResponse({
                     'success': True,
@@ -137,124 +439,354 @@ def api_set_budget(request):
     
     return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
 
-def api_transactions(request):
-    """API pour obtenir toutes les transactions"""
-    assistant = settings.FINANCIAL_ASSISTANT
+def _sse_message(event):
+    return (f"id: {event['id']}\nevent: {event['type']}\n"
+            f"data: {json.dumps(event['data'], separators=(',', ':'))}\n\n")
+
+def _sse_events(feed, types, after, config):
+    """Server-sent events d'un flux, pour un serveur WSGI (un thread par client)"""
+    subscription = feed.subscribe(types, after)
+    deadline = time.monotonic() + config['max_duration']
+    try:
+        yield f"retry: {config['retry']}\n\n"
+        while (remaining := deadline - time.monotonic()) > 0:
+            events = subscription.wait(min(config['heartbeat'], remaining))
+            yield ''.join(map(_sse_message, events)) if events else ': ping\n\n'
+    finally:
+        subscription.close()
+
+async def _sse_events_async(feed, types, after, config):
+    """Variante asyncio de ``_sse_events`` (ASGI) : aucun thread bloqué par client"""
+    subscription = feed.subscribe(types, after)
+    deadline = time.monotonic() + config['max_duration']
+    try:
+        yield f"retry: {config['retry']}\n\n"
+        while (remaining := deadline - time.monotonic()) > 0:
+            events = await subscription.next(min(config['heartbeat'], remaining))
+            yield ''.join(map(_sse_message, events)) if events else ': ping\n\n'
+    finally:
+        subscription.close()
+
+def _event_stream(request, feed, types=None):
+    """Réponse ``text/event-stream`` des événements ``types`` de ``feed``
     
+    Un client reconnecté reprend après ``Last-Event-ID`` (ou ``?after=``), ou reçoit
+    un ``sync`` de motif ``resync`` si l'historique ne couvre plus sa reprise ; le
+    flux est fermé après MONEYWISE_EVENT_STREAM['max_duration'] secondes.
+    """
+    after = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    try:
+        after = int(after) if after else None
+    except ValueError:
+        raise BadRequest('Identifiant d\'événement invalide')
+    config = settings.MONEYWISE_EVENT_STREAM
+    events = (_sse_events_async if isinstance(request, ASGIRequest) else _sse_events)(
+        feed, types, after, config)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def api_alerts(request):
+    """API des alertes budgétaires : dépenses de la période courante par catégorie
+    et dernières alertes émises"""
+    assistant = _get_assistant(request)
+    period = request.GET.get('period', 'month')
+    if period not in PERIODS:
+        return JsonResponse({
+            'success': False,
+            'error': f"Période attendue : {' ou '.join(PERIODS)}"
+        }, status=400)
+    
+    with assistant.lock.read():
+        status = assistant.alerts.status(to_timestamp(datetime.now()), period)
     return JsonResponse({
         'success': True,
-        'transactions': assistant.transactions,
-        'count': len(assistant.transactions)
+        'status': status,
+        'alerts': assistant.events.recent(types={'alert'})
     })
 
-def api_statistics(request):
-    """API pour les statistiques détaillées"""
-    assistant = settings.FINANCIAL_ASSISTANT
-    transactions = assistant.transactions
+def api_alerts_stream(request):
+    """Flux des alertes budgétaires (server-sent events, événements ``alert``)"""
+    return _event_stream(request, _get_assistant(request).events, {'alert'})
+
+def api_stream(request):
+    """Flux des mises à jour du tableau de bord (server-sent events)
+
+    Deltas compacts au lieu de relectures complètes : transaction ajoutée avec
+    le solde et les dépenses de sa catégorie, budgets, prévision après un
+    entraînement, alertes, et ``sync`` quand un changement en bloc impose de
+    recharger ``/api/dashboard``. ``?types=transaction,alert`` restreint le flux.
+    """
+    types = request.GET.get('types')
+    if types:
+        types = {name.strip() for name in types.split(',') if name.strip()}
+        unknown = types - set(EVENT_TYPES)
+        if unknown:
+            return JsonResponse({
+                'success': False,
+                'error': f"Types d'événements inconnus : {', '.join(sorted(unknown))}"
+            }, status=400)
+    return _event_stream(request, _get_assistant(request).events, types or None)
+
+def _parse_date_bound(value, end=False):
+    """Convertit un paramètre de date (AAAA-MM-JJ[ HH:MM:SS]) en timestamp"""
+    if not value:
+        return None
+    try:
+        return to_timestamp(datetime.strptime(value, DATE_FORMAT))
+    except ValueError:
+        day = to_timestamp(datetime.strptime(value, "%Y-%m-%d"))
+        # Une date seule inclut toute la journée
+        return day + SECONDS_PER_DAY if end else day
+
+def _stream_transactions(assistant, after_id, filters):
+    """Encode les transactions en NDJSON, bloc par bloc (verrou de lecture par bloc)"""
+    dumps = services.get_json_dumps()
+    while True:
+        chunk, has_more = assistant.select_transactions(1000, after_id=after_id, **filters)
+        if chunk:
+            yield b''.join(dumps(record) + b'\n' for record in chunk)
+        if not has_more:
+            return
+        after_id = chunk[-1]['id']
+
+def _transaction_batches(assistant, after_id, filters, size=10000):
+    """Colonnes des transactions, lot par lot (le premier lot, éventuellement vide,
+    est toujours produit)"""
+    while True:
+        columns, has_more = assistant.select_transactions(
+            size, after_id=after_id, columns=True, **filters)
+        yield columns
+        if not has_more:
+            return
+        after_id = int(columns['id'][-1])
+
+# Formats de /api/transactions : pages (json, columns, msgpack) ou exports en flux
+TRANSACTION_FORMATS = ('json', 'columns', 'msgpack', 'arrow', 'ndjson')
+
+def api_transactions(request):
+    """API paginée des transactions (curseur sur l'identifiant), ou export en flux
+    
+    Format négocié par ``?format=`` ou l'en-tête ``Accept`` (voir
+    ``core.serialization``) : pages en enregistrements JSON (par défaut), en
+    colonnes JSON ou MessagePack ; exports NDJSON ou Arrow IPC.
+    """
+    from core import serialization
+    
+    assistant = _get_assistant(request)
     
-    if not transactions:
+    try:
+        limit = int(request.GET.get('limit', 100))
+        if not 1 <= limit <= MAX_PAGE:
+            raise ValueError(f'limit doit être compris entre 1 et {MAX_PAGE}')
+        cursor = request.GET.get('cursor')
+        after_id = int(cursor) if cursor else None
+        descending = request.GET.get('order', 'desc') == 'desc'
+        sign = request.GET.get('sign')
+        if sign not in (None, 'income', 'expense'):
+            raise ValueError(f'Signe non valide : {sign}')
+        filters = {
+            'descending': descending,
+            'category': request.GET.get('category'),
+            'start': _parse_date_bound(request.GET.get('from')),
+            'end': _parse_date_bound(request.GET.get('to'), end=True),
+            'sign': sign,
+        }
+        response_format = serialization.negotiate(
+            request.GET.get('format'), request.headers.get('Accept', ''), TRANSACTION_FORMATS)
+    except ValueError as e:
         return JsonResponse({
-            'success': True,
-            'statistics': {}
-        })
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    if not serialization.available(response_format):
+        return JsonResponse({
+            'success': False,
+            'error': f'Format {response_format} indisponible sur ce serveur',
+            'formats': [name for name in TRANSACTION_FORMATS if serialization.available(name)]
+        }, status=406)
     
-    # Calculs statistiques
-    amounts = [t['amount'] for t in transactions]
-    positive_amounts = [a for a in amounts if a > 0]
-    negative_amounts = [a for a in amounts if a < 0]
-    
-    stats = {
-        'total_transactions': len(transactions),
-        'average_income': np.mean(positive_amounts) if positive_amounts else 0,
-        'average_expense': np.mean(negative_amounts) if negative_amounts else 0,
-        'total_income': sum(positive_amounts),
-        'total_expenses': abs(sum(negative_amounts)),
-        'savings_rate': (sum(positive_amounts) - abs(sum(negative_amounts))) / sum(positive_amounts) * 100 if sum(positive_amounts) > 0 else 0,
-        'largest_income': max(positive_amounts) if positive_amounts else 0,
-        'largest_expense': min(negative_amounts) if negative_amounts else 0,
-        'transaction_frequency': len(transactions) / max(1, (datetime.now() - datetime.strptime(transactions[0]['date'], "%Y-%m-%d %H:%M:%S")).days)
-    }
+    # Validateur : tenant + dernière transaction intégrée (identifiants du journal
+    # croissants, jamais réutilisés) + paramètres de la requête + format
+    etag = '"%s"' % hashlib.md5(
+        f'{assistant.tenant}|{assistant.transactions.last_id}|{sorted(request.GET.lists())}'
+        f'|{response_format}'.encode()).hexdigest()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept', 'X-Tenant-ID'])
+        return response
+    
+    content_type = serialization.FORMATS[response_format]
+    if response_format == 'ndjson':
+        response = StreamingHttpResponse(
+            _stream_transactions(assistant, after_id, filters), content_type=content_type)
+    elif response_format == 'arrow':
+        response = StreamingHttpResponse(
+            serialization.arrow_stream(_transaction_batches(assistant, after_id, filters)),
+            content_type=content_type)
+    else:
+        with assistant.lock.read():
+            page, has_more = assistant.select_transactions(
+                limit, after_id=after_id, columns=response_format != 'json', **filters)
+            total = assistant.aggregates.count
+        ids = [record['id'] for record in page] if response_format == 'json' else page['id']
+        meta = {
+            'count': len(ids),
+            'total': total,
+            'has_more': has_more,
+            'next_cursor': str(ids[-1]) if has_more else None
+        }
+        dumps = services.get_json_dumps()
+        if response_format == 'json':
+            content = dumps({'success': True, 'transactions': page, **meta})
+        else:
+            content = serialization.encode_columns(
+                response_format, page, {'success': True, **meta}, dumps)
+        response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept', 'X-Tenant-ID'])
+    return response
+
+@csrf_exempt
+def api_import_transactions(request):
+    """API d'import en masse (CSV, NDJSON ou OFX) : fichier dans le corps de la
+    requête ou champ ``file`` d'un formulaire multipart, lu en flux et par lots"""
+    from core.importers import PARSERS, decode_lines, detect_format
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+    
+    # Le corps n'est pas chargé en mémoire : les lignes sont lues au fil de l'import
+    upload = request.FILES.get('file') if request.content_type == 'multipart/form-data' else None
+    source = upload or request
+    file_format = request.GET.get('format') or detect_format(
+        getattr(upload, 'name', ''), upload.content_type if upload else request.content_type)
+    if file_format not in PARSERS:
+        return JsonResponse({
+            'success': False,
+            'error': 'Format non reconnu (csv, ndjson ou ofx)'
+        }, status=400)
+    
+    try:
+        assistant = _get_assistant(request)
+        report = assistant.import_transactions(
+            PARSERS[file_format](decode_lines(source)),
+            default_category=request.GET.get('category', 'autres'))
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f"{report['imported']} transactions importées",
+        **report
+    })
+
+@cached_response(time_sensitive=True)
+async def api_statistics(request):
+    """API pour les statistiques détaillées"""
+    statistics = await _compute(lambda assistant: assistant.get_statistics(), request)
     
     return JsonResponse({
         'success': True,
-        'statistics': stats
+        'statistics': statistics
     })
 
+@cached_response(time_sensitive=True)
 def api_weekly_report(request):
-    """API pour un rapport hebdomadaire"""
-    assistant = settings.FINANCIAL_ASSISTANT
-    transactions = assistant.transactions
+    """API pour un rapport hebdomadaire, ou sur une période (``from``/``to``) d'au
+    plus ``MAX_REPORT_DAYS`` jours"""
+    try:
+        start = _parse_date_bound(request.GET.get('from'))
+        end = _parse_date_bound(request.GET.get('to'), end=True)
+        # Sans ``to``, la période s'arrête maintenant (voir ``get_weekly_report``)
+        stop = end if end is not None else to_timestamp(datetime.now()) + 1
+        if start is not None and start >= stop:
+            raise ValueError('La date de début doit précéder la date de fin')
+        if start is not None and stop - start > MAX_REPORT_DAYS * SECONDS_PER_DAY:
+            raise ValueError(f'Période limitée à {MAX_REPORT_DAYS} jours')
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
     
-    if len(transactions) < 7:
+    assistant = _get_assistant(request)
+    
+    if assistant.aggregates.count < 7:
         return JsonResponse({
             'success': False,
             'message': 'Pas assez de données'
         })
     
-    # Transactions de la semaine dernière
-    week_ago = datetime.now() - timedelta(days=7)
-    weekly_transactions = [
-        t for t in transactions 
-        if datetime.strptime(t['date'], "%Y-%m-%d %H:%M:%S") >= week_ago
-    ]
-    
-    # Analyse hebdomadaire
-    weekly_analysis = {
-        'total': sum(t['amount'] for t in weekly_transactions),
-        'income': sum(t['amount'] for t in weekly_transactions if t['amount'] > 0),
-        'expenses': abs(sum(t['amount'] for t in weekly_transactions if t['amount'] < 0)),
-        'count': len(weekly_transactions),
-        'by_day': {},
-        'top_categories': {}
-    }
-    
-    # Par jour
-    for i in range(7):
-        day = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-        day_transactions = [
-            t for t in weekly_transactions 
-            if t['date'].startswith(day)
-        ]
-        weekly_analysis['by_day'][day] = {
-            'count': len(day_transactions),
-            'total': sum(t['amount'] for t in day_transactions)
-        }
-    
-    # Par catégorie
-    for category in assistant.categories:
-        cat_amount = sum(t['amount'] for t in weekly_transactions 
-                       if t.get('category') == category and t['amount'] < 0)
-        if cat_amount < 0:
-            weekly_analysis['top_categories'][category] = abs(cat_amount)
-    
     return JsonResponse({
         'success': True,
-        'weekly_report': weekly_analysis
+        'weekly_report': assistant.get_weekly_report(start, end)
     })
 
-def api_health(request):
-    """API de santé du système"""
-    assistant = settings.FINANCIAL_ASSISTANT
+def _cache_available():
+    """Aller-retour d'écriture et de lecture dans le cache Django configuré"""
+    try:
+        probe = time.time()
+        cache.set('moneywise:health', probe, 10)
+        return cache.get('moneywise:health') == probe
+    except Exception:
+        return False
+
+def _health_status(assistant):
+    """État de santé d'un assistant (chargement éventuel du modèle depuis le disque)"""
+    latest_job = assistant.training_queue.latest(assistant.tenant)
     
-    health_status = {
+    return {
         'system': 'operational',
-        'transactions_count': len(assistant.transactions),
+        'tenant': assistant.tenant,
+        'tenants': services.get_registry().stats(),
+        'transactions_count': assistant.aggregates.count,
+        'transactions_resident': len(assistant.transactions),
+        'transactions_archived': assistant.retention.archived_rows,
         'model_trained': len(assistant.network.loss_history) > 0,
+        'model_version': assistant.model_version,
         'last_training_loss': assistant.network.loss_history[-1] if assistant.network.loss_history else None,
-        'cache_available': True,
+        'cache_available': _cache_available(),
+        'response_cache': services.get_response_cache().stats(),
+        'training': latest_job.as_dict() if latest_job else None,
         'predictions_available': len(assistant.transactions) >= 7
     }
+
+async def api_health(request):
+    """API de santé du système"""
+    health_status = await _compute(_health_status, request)
     
     return JsonResponse({
         'success': True,
         'health': health_status
     })
 
+def api_metrics(request):
+    """Métriques du processus au format texte Prometheus"""
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def api_metrics_profile(request, profile_id):
+    """Profil d'une requête échantillonnée, en piles repliées (flamegraph.pl, speedscope)"""
+    profile = services.get_profile_store().get(profile_id)
+    if profile is None:
+        raise Http404('Profil introuvable')
+    
+    response = HttpResponse(profile.collapsed(), content_type='text/plain; charset=utf-8')
+    response['X-Profile-Request'] = profile.label
+    response['X-Profile-Samples'] = str(profile.samples)
+    response['X-Profile-Duration'] = f'{profile.duration:.6f}'
+    return response
+
 # ==================== VUES DE DÉMONSTRATION ====================
 
 def demo_add_sample_data(request):
     """Vue pour ajouter des données de démonstration"""
-    assistant = settings.FINANCIAL_ASSISTANT
+    assistant = _get_assistant(request)
     
     # Données de démonstration
     sample_transactions = [
@@ -277,20 +809,20 @@ def demo_add_sample_data(request):
             transaction['description']
         )
     
-    # Entraîner le modèle
-    assistant.train_model()
+    # Entraîner le modèle en arrière-plan
+    job = assistant.schedule_training('demo')
     
     return JsonResponse({
         'success': True,
         'message': f'{len(sample_transactions)} transactions de démonstration ajoutées',
-        'total_transactions': len(assistant.transactions)
+        'training_job': job.id,
+        'total_transactions': assistant.aggregates.count
     })
 
 def reset_data(request):
     """Vue pour réinitialiser les données (démo uniquement)"""
-    assistant = settings.FINANCIAL_ASSISTANT
-    assistant.transactions = []
-    assistant.save_data()
+    assistant = _get_assistant(request)
+    assistant.reset()
     
     return JsonResponse({
         'success': True,